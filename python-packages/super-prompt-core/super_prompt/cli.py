@@ -967,13 +967,14 @@ def context(
         None, "--project-root", help="Project root directory"
     ),
     max_tokens: int = typer.Option(16000, "--max-tokens", help="Maximum context tokens"),
+    mode: str = typer.Option("full", "--mode", help="Collection mode (full/snippets)"),
 ):
     """Context collection and management"""
     try:
         collector = ContextCollector(str(project_root) if project_root else ".")
 
         if action == "collect" and query:
-            result = collector.collect_context(query, max_tokens=max_tokens)
+            result = collector.collect_context(query, max_tokens=max_tokens, mode=mode)
             typer.echo(f"📊 Collected context for: {query}")
             typer.echo(f"   Files: {len(result['files'])}")
             typer.echo(f"   Tokens: {result['metadata']['context_tokens']}")
@@ -0,0 +1,165 @@
+"""
+Blob Store - Content-addressed storage for cached file contents
+"""
+
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:  # Optional: zstd compression when the `zstandard` package is installed
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class BlobStore:
+    """
+    Stores each distinct content once, named by its blake2b digest.
+
+    Identical files (vendored copies, lockfiles) share one blob, and cache
+    entries only need to hold the 32-character digest. Blobs are written
+    atomically and the least recently used ones are pruned past `max_size_mb`.
+    """
+
+    _instances: Dict[Path, "BlobStore"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, store_dir: Path, max_size_mb: float = 100.0):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.compressed = zstandard is not None
+        self._lock = threading.Lock()
+        self._total_size = sum(
+            entry.stat().st_size for entry in self._iter_blob_entries()
+        )
+
+    @classmethod
+    def open(cls, store_dir: Path, max_size_mb: float = 100.0) -> "BlobStore":
+        """Return the process-wide blob store for a directory"""
+        resolved = Path(store_dir).resolve()
+        with cls._instances_lock:
+            store = cls._instances.get(resolved)
+            if store is None:
+                store = cls(resolved, max_size_mb=max_size_mb)
+                cls._instances[resolved] = store
+            return store
+
+    @staticmethod
+    def digest(content: str) -> str:
+        return hashlib.blake2b(content.encode("utf-8", errors="surrogatepass"), digest_size=16).hexdigest()
+
+    def put(self, content: str) -> str:
+        """Store content (if new) and return its digest"""
+        digest = self.digest(content)
+        path = self._path_for(digest)
+        with self._lock:
+            if path.exists():
+                try:
+                    os.utime(path)  # Mark as recently used
+                except OSError:
+                    pass
+                return digest
+
+            data = content.encode("utf-8", errors="surrogatepass")
+            if self.compressed:
+                data = zstandard.ZstdCompressor(level=3).compress(data)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._total_size += len(data)
+            except OSError:
+                return digest
+
+            if self._total_size > self.max_size_bytes:
+                self._prune()
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """Load content by digest, or None when missing/invalid"""
+        if not isinstance(digest, str) or not _DIGEST_RE.match(digest):
+            return None
+        path = self._path_for(digest)
+        if not path.exists():
+            # Written before/after zstandard was available
+            path = self.store_dir / digest[:2] / (digest if self.compressed else f"{digest}.zst")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if path.suffix == ".zst":
+            if zstandard is None:
+                return None
+            try:
+                data = zstandard.ZstdDecompressor().decompress(data)
+            except zstandard.ZstdError:
+                return None
+        return data.decode("utf-8", errors="surrogatepass")
+
+    def __contains__(self, digest: str) -> bool:
+        return isinstance(digest, str) and bool(_DIGEST_RE.match(digest)) and self._path_for(digest).exists()
+
+    def clear(self) -> None:
+        """Remove every blob"""
+        with self._lock:
+            for entry in list(self._iter_blob_entries()):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            self._total_size = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get blob store statistics"""
+        return {"blob_bytes": self._total_size, "blob_compression": "zstd" if self.compressed else "none"}
+
+    def _path_for(self, digest: str) -> Path:
+        name = f"{digest}.zst" if self.compressed else digest
+        return self.store_dir / digest[:2] / name
+
+    def _iter_blob_entries(self):
+        try:
+            shards = [e for e in os.scandir(self.store_dir) if e.is_dir()]
+        except OSError:
+            return
+        for shard in shards:
+            try:
+                for entry in os.scandir(shard.path):
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        yield entry
+            except OSError:
+                continue
+
+    def _prune(self) -> None:
+        """Delete least recently used blobs until below 80% of the budget"""
+        entries = []
+        for entry in self._iter_blob_entries():
+            try:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError:
+                continue
+        entries.sort()
+
+        target = int(self.max_size_bytes * 0.8)
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+        self._total_size = total
@@ -4,11 +4,15 @@ Context Cache - Cache context collection results
 
 import hashlib
 import json
+import os
+import threading
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 
+from .eviction import EvictionPolicy, create_policy
+
 
 @dataclass
 class CacheEntry:
@@ -18,6 +22,10 @@ class CacheEntry:
     timestamp: float
     hits: int = 0
     size_bytes: int = 0
+    expires_at: Optional[float] = None
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return self.expires_at is not None and (now or time.time()) >= self.expires_at
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -31,102 +39,222 @@ class ContextCache:
     """
     Cache for context collection results to improve performance
     and reduce redundant processing.
+
+    Entries are persisted to an append-only log (`context_cache.log`, one JSON
+    record per line). Writes cost O(entry); the log is compacted once dead
+    records outweigh live ones, and a torn final record is skipped on replay.
+
+    Eviction is delegated to a pluggable policy (`lru`, `lfu` or `tinylfu`,
+    default from SUPER_PROMPT_CACHE_POLICY) and the byte total is kept as a
+    running counter, so size accounting and victim selection are O(1).
+
+    Per-entry TTLs are enforced lazily on read; long-running processes can
+    also start a background sweeper (see `start_sweeper`).
+
+    `max_size_mb` is the total disk budget of the cache directory: file
+    contents live in the blob store next to the log (`blob_max_size_mb`),
+    and the entries themselves (digests and collection results) get the rest.
     """
 
-    def __init__(self, cache_dir: Optional[Path] = None, max_size_mb: float = 100.0):
+    # Never compact logs smaller than this
+    COMPACT_MIN_BYTES = 1024 * 1024
+    # Share of `max_size_mb` given to the blob store holding file contents
+    BLOB_SHARE = 0.75
+
+    _instances: Dict[Path, "ContextCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_size_mb: float = 100.0,
+        eviction_policy: Optional[str] = None,
+    ):
         self.cache_dir = cache_dir or Path(".super-prompt") / "cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "context_cache.json"
-        self.max_size_bytes = int(max_size_mb * 1024 * 1024)  # Convert MB to bytes
+        self.cache_file = self.cache_dir / "context_cache.json"  # Legacy snapshot format
+        self.log_file = self.cache_dir / "context_cache.log"
+        self.blob_max_size_mb = max_size_mb * self.BLOB_SHARE
+        self.max_size_bytes = int((max_size_mb - self.blob_max_size_mb) * 1024 * 1024)  # Convert MB to bytes
 
         # In-memory cache
         self.memory_cache: Dict[str, CacheEntry] = {}
+        self.policy: EvictionPolicy = create_policy(
+            eviction_policy or os.environ.get("SUPER_PROMPT_CACHE_POLICY", "lru")
+        )
+        self._total_size = 0
+        self._requests = 0
+        self._request_hits = 0
+        self._log_bytes = 0
+        self._lock = threading.RLock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
         self._load_cache()
 
+    @classmethod
+    def open(cls, cache_dir: Optional[Path] = None) -> "ContextCache":
+        """Return the process-wide cache for a directory, so recency survives across collectors"""
+        resolved = (cache_dir or Path(".super-prompt") / "cache").resolve()
+        with cls._instances_lock:
+            cache = cls._instances.get(resolved)
+            if cache is None:
+                cache = cls(resolved)
+                cls._instances[resolved] = cache
+                sweep_interval = float(os.environ.get("SUPER_PROMPT_CACHE_SWEEP_INTERVAL", "0") or 0)
+                if sweep_interval > 0:
+                    cache.start_sweeper(sweep_interval)
+            return cache
+
     # Mapping-style helpers -------------------------------------------------
     def __contains__(self, key: str) -> bool:
         """Support `key in cache` syntax."""
-        return key in self.memory_cache
+        with self._lock:
+            return self._live_entry(key) is not None
 
     def __getitem__(self, key: str) -> Any:
         """Allow dictionary-style access while tracking hits."""
-        entry = self.memory_cache[key]
-        entry.hits += 1
-        return entry.content
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                raise KeyError(key)
+            self._record_hit(entry)
+            return entry.content
 
     def __setitem__(self, key: str, content: Any) -> None:
         """Allow dictionary-style assignment."""
         self.set(key, content)
 
     def __len__(self) -> int:
-        return len(self.memory_cache)
+        """Number of unexpired entries (what `in` and `get` can see)"""
+        now = time.time()
+        with self._lock:
+            return sum(1 for entry in self.memory_cache.values() if not entry.is_expired(now))
 
     def get(self, key: str) -> Optional[Any]:
         """Get cached content by key"""
-        # Check memory cache first
-        if key in self.memory_cache:
-            entry = self.memory_cache[key]
-            entry.hits += 1
-            return entry.content
+        with self._lock:
+            self._requests += 1
+            entry = self._live_entry(key)
+            if entry is not None:
+                self._request_hits += 1
+                self._record_hit(entry)
+                return entry.content
 
         return None
 
-    def set(self, key: str, content: Any, ttl_seconds: int = 3600) -> None:
-        """Set cache entry with optional TTL"""
+    def set(self, key: str, content: Any, ttl_seconds: Optional[int] = 3600) -> None:
+        """Set cache entry with optional TTL (None or <= 0 means no expiry)"""
         # Calculate content size
         content_str = json.dumps(content, default=str)
         size_bytes = len(content_str.encode('utf-8'))
-
-        # Check if we have space
-        if self._get_total_size() + size_bytes > self.max_size_bytes:
-            self._evict_old_entries(size_bytes)
-
-        # Create cache entry
-        entry = CacheEntry(
-            key=key,
-            content=content,
-            timestamp=time.time(),
-            hits=0,
-            size_bytes=size_bytes
-        )
-
-        self.memory_cache[key] = entry
-        self._save_cache()
+        now = time.time()
+
+        with self._lock:
+            if size_bytes > self.max_size_bytes:
+                # Larger than the whole cache; caching it would only flush everything else
+                self.invalidate(key)
+                return
+
+            # Create cache entry
+            entry = CacheEntry(
+                key=key,
+                content=content,
+                timestamp=now,
+                hits=0,
+                size_bytes=size_bytes,
+                expires_at=now + ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+            )
+
+            self._insert(entry)
+            self._append_records([{"op": "set", "entry": entry.to_dict()}])
+
+            # Make space; the policy picks the victims
+            if self._total_size > self.max_size_bytes:
+                self._evict_old_entries(0)
 
     def invalidate(self, key: str) -> bool:
         """Invalidate a specific cache entry"""
-        if key in self.memory_cache:
-            del self.memory_cache[key]
-            self._save_cache()
-            return True
-        return False
+        with self._lock:
+            if key in self.memory_cache:
+                self._remove(key)
+                self._append_records([{"op": "del", "key": key}])
+                return True
+            return False
+
+    def invalidate_where(self, predicate: Callable[[str], bool]) -> int:
+        """Invalidate every entry whose key satisfies `predicate`"""
+        with self._lock:
+            keys = [key for key in self.memory_cache if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            if keys:
+                self._append_records([{"op": "del", "key": key} for key in keys])
+        return len(keys)
 
     def clear(self) -> None:
         """Clear all cache entries"""
-        self.memory_cache.clear()
-        self._save_cache()
+        with self._lock:
+            for key in list(self.memory_cache):
+                self._remove(key)
+            self._compact()
 
-    def cleanup_expired(self, max_age_seconds: int = 86400) -> int:
-        """Clean up expired cache entries"""
+    def cleanup_expired(self, max_age_seconds: Optional[int] = 86400) -> int:
+        """Clean up entries past their TTL or older than `max_age_seconds`"""
         current_time = time.time()
-        expired_keys = []
 
-        for key, entry in self.memory_cache.items():
-            if current_time - entry.timestamp > max_age_seconds:
-                expired_keys.append(key)
+        with self._lock:
+            expired_keys = [
+                key for key, entry in self.memory_cache.items()
+                if entry.is_expired(current_time)
+                or (max_age_seconds is not None and current_time - entry.timestamp > max_age_seconds)
+            ]
 
-        for key in expired_keys:
-            del self.memory_cache[key]
+            for key in expired_keys:
+                self._remove(key)
 
-        if expired_keys:
-            self._save_cache()
+            if expired_keys:
+                self._append_records([{"op": "del", "key": key} for key in expired_keys])
 
         return len(expired_keys)
 
+    def start_sweeper(self, interval_seconds: float = 300.0) -> None:
+        """Expire entries periodically from a daemon thread (for long-running servers)"""
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._sweeper_stop.clear()
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop,
+                args=(interval_seconds,),
+                name="context-cache-sweeper",
+                daemon=True,
+            )
+            self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper if it is running"""
+        self._sweeper_stop.set()
+        sweeper = self._sweeper
+        if sweeper is not None and sweeper is not threading.current_thread():
+            sweeper.join(timeout=5)
+        self._sweeper = None
+
+    def _sweep_loop(self, interval_seconds: float) -> None:
+        while not self._sweeper_stop.wait(interval_seconds):
+            try:
+                self.cleanup_expired(max_age_seconds=None)
+            except Exception:
+                # Never let the sweeper die on a transient error
+                continue
+
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        with self._lock:
+            return self._collect_stats()
+
+    def _collect_stats(self) -> Dict[str, Any]:
         total_entries = len(self.memory_cache)
-        total_size = sum(entry.size_bytes for entry in self.memory_cache.values())
+        total_size = self._total_size
         total_hits = sum(entry.hits for entry in self.memory_cache.values())
 
         if total_entries > 0:
@@ -143,59 +271,146 @@ class ContextCache:
             "total_hits": total_hits,
             "average_age_seconds": round(avg_age, 1),
             "average_size_bytes": round(avg_size, 1),
-            "cache_hit_ratio": round(total_hits / max(total_entries, 1), 3)
+            "cache_hit_ratio": round(total_hits / max(total_entries, 1), 3),
+            "eviction_policy": self.policy.name,
+            "request_hit_ratio": round(self._request_hits / max(self._requests, 1), 3)
         }
 
     def _load_cache(self) -> None:
-        """Load cache from disk"""
-        if not self.cache_file.exists():
+        """Load cache from disk by replaying the log"""
+        if self.cache_file.exists():
+            self._migrate_legacy_snapshot()
+
+        if not self.log_file.exists():
             return
 
+        # Counted from scratch; a migration may have just compacted into this log
+        self._log_bytes = 0
+        try:
+            with open(self.log_file, 'rb+') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn final record from a crash mid-append; cut it off so
+                        # the next append starts on a fresh line
+                        f.truncate(self._log_bytes)
+                        break
+                    self._log_bytes += len(line)
+                    try:
+                        record = json.loads(line)
+                        if record.get("op") == "set":
+                            entry = CacheEntry.from_dict(record["entry"])
+                            if entry.is_expired():
+                                self._remove(entry.key)
+                            else:
+                                self._insert(entry)
+                        elif record.get("op") == "del":
+                            self._remove(record["key"])
+                    except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                        # Corrupt record; skip it
+                        continue
+        except OSError:
+            for key in list(self.memory_cache):
+                self._remove(key)
+
+    def _migrate_legacy_snapshot(self) -> None:
+        """Import a pre-log `context_cache.json` snapshot once, then drop it"""
         try:
             with open(self.cache_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
 
-            for key, entry_data in data.items():
-                self.memory_cache[key] = CacheEntry.from_dict(entry_data)
+            for entry_data in data.values():
+                self._insert(CacheEntry.from_dict(entry_data))
 
-        except (json.JSONDecodeError, KeyError, TypeError):
+            if not self.log_file.exists():
+                self._compact()
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError, OSError):
             # Invalid cache file, start fresh
-            self.memory_cache.clear()
+            for key in list(self.memory_cache):
+                self._remove(key)
 
-    def _save_cache(self) -> None:
-        """Save cache to disk"""
         try:
-            data = {key: entry.to_dict() for key, entry in self.memory_cache.items()}
+            self.cache_file.unlink()
+        except OSError:
+            pass
+
+    def _append_records(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the log, compacting when it is mostly dead records"""
+        try:
+            data = "".join(json.dumps(record, default=str) + "\n" for record in records).encode('utf-8')
+            with open(self.log_file, 'ab') as f:
+                f.write(data)
+            self._log_bytes += len(data)
+        except Exception:
+            # If we can't save, just continue
+            return
 
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
+        if self._log_bytes > max(self.COMPACT_MIN_BYTES, 2 * self._get_total_size()):
+            self._compact()
 
+    def _compact(self) -> None:
+        """Rewrite the log with only live entries (atomic replace)"""
+        tmp_file = self.log_file.with_suffix(".log.tmp")
+        try:
+            with open(tmp_file, 'wb') as f:
+                size = 0
+                for entry in self.memory_cache.values():
+                    line = (json.dumps({"op": "set", "entry": entry.to_dict()}, default=str) + "\n").encode('utf-8')
+                    f.write(line)
+                    size += len(line)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.log_file)
+            self._log_bytes = size
         except Exception:
             # If we can't save, just continue
             pass
 
+    def _insert(self, entry: CacheEntry) -> None:
+        """Add or replace an entry, keeping policy and byte counter in sync"""
+        previous = self.memory_cache.get(entry.key)
+        if previous is not None:
+            self._total_size -= previous.size_bytes
+        self.memory_cache[entry.key] = entry
+        self._total_size += entry.size_bytes
+        self.policy.record_insert(entry.key)
+
+    def _remove(self, key: str, evicted: bool = False) -> Optional[CacheEntry]:
+        """Drop an entry, keeping policy and byte counter in sync"""
+        entry = self.memory_cache.pop(key, None)
+        if entry is not None:
+            self._total_size -= entry.size_bytes
+            if evicted:
+                self.policy.record_evict(key)
+            else:
+                self.policy.record_remove(key)
+        return entry
+
+    def _live_entry(self, key: str) -> Optional[CacheEntry]:
+        """Return an unexpired entry, lazily dropping it once past its TTL"""
+        entry = self.memory_cache.get(key)
+        if entry is not None and entry.is_expired():
+            self._remove(key)
+            self._append_records([{"op": "del", "key": key}])
+            return None
+        return entry
+
+    def _record_hit(self, entry: CacheEntry) -> None:
+        entry.hits += 1
+        self.policy.record_access(entry.key)
+
     def _get_total_size(self) -> int:
         """Get total cache size in bytes"""
-        return sum(entry.size_bytes for entry in self.memory_cache.values())
+        return self._total_size
 
     def _evict_old_entries(self, needed_bytes: int) -> None:
-        """Evict old entries to make space"""
-        # Sort by last access time (oldest first)
-        entries = sorted(
-            self.memory_cache.items(),
-            key=lambda x: x[1].timestamp
-        )
-
-        freed_bytes = 0
-        to_remove = []
-
-        for key, entry in entries:
-            to_remove.append(key)
-            freed_bytes += entry.size_bytes
+        """Evict entries chosen by the eviction policy until `needed_bytes` more fit"""
+        evicted = []
 
-            if freed_bytes >= needed_bytes:
+        while self.memory_cache and self._total_size + needed_bytes > self.max_size_bytes:
+            key = self.policy.victim()
+            if key is None or self._remove(key, evicted=True) is None:
                 break
+            evicted.append(key)
 
-        # Remove the entries
-        for key in to_remove:
-            del self.memory_cache[key]
+        if evicted:
+            self._append_records([{"op": "del", "key": key} for key in evicted])
@@ -2,17 +2,28 @@
 Context Collector - Advanced context collection with ripgrep and caching
 """
 
-import os
+import asyncio
+import re
 import subprocess
 import hashlib
 import shutil
+import sqlite3
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
-import pathspec
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from .tokenizer import Tokenizer
 from .cache import ContextCache
+from .blob_store import BlobStore
+from .reader import find_hit_lines, read_head, read_line_ranges, read_windows
+from . import summarizer
+from ..utils.git import GitRepo
+from .file_index import FileIndex
+from .ignore import IgnoreMatcher
+from .import_graph import ImportGraph
+from .keyword_index import KeywordIndex
 
 
 class ContextCollector:
@@ -21,14 +32,48 @@ class ContextCollector:
     and intelligent .gitignore processing with caching.
     """
 
+    # Maximum priority boost given to the best keyword (BM25) match
+    RELEVANCE_WEIGHT = 15.0
+
+    # Files importing or imported by keyword hits: boost for a direct neighbor of
+    # the best match (halved per extra hop), how far to look, and how many
+    # neighbors to pull in that no search phase found
+    GRAPH_WEIGHT = 8.0
+    GRAPH_MAX_DISTANCE = 2
+    GRAPH_SEEDS = 10
+    GRAPH_MAX_NEIGHBORS = 20
+
+    # Files above this size are cached head-truncated
+    MAX_FILE_SIZE = 102400
+
+    # How much of an oversized file is scanned to outline it
+    SUMMARY_SCAN_SIZE = 1048576
+
+    # Concurrent file reads ahead of budget selection
+    PREFETCH_WORKERS = 8
+    PREFETCH_DEPTH = 16
+
+    # Snippet mode: lines kept around each keyword hit, and the longest merged window
+    SNIPPET_CONTEXT_LINES = 3
+    SNIPPET_MAX_LINES = 40
+
+    COLLECTION_MODES = ("full", "snippets")
+
     def __init__(self, project_root: str = "."):
         self.project_root = Path(project_root).resolve()
-        self.gitignore_spec = self._load_gitignore()
-        self.cache = ContextCache()
+        self.ignore_matcher = IgnoreMatcher.open(self.project_root)
+        self.cache = ContextCache.open()
+        self.blob_store = BlobStore.open(self.cache.cache_dir / "blobs", self.cache.blob_max_size_mb)
         self.tokenizer = Tokenizer()
         self.ripgrep_available = self._check_ripgrep_available()
-
-    def collect_context(self, query: str, max_tokens: int = 16000, use_cache: bool = True) -> Dict[str, any]:
+        self.git = GitRepo.open(self.project_root)
+        self.file_index = FileIndex.open(self.project_root, self.ignore_matcher)
+        self.keyword_index = KeywordIndex.open(self.project_root)
+        self.import_graph = ImportGraph.open(self.project_root)
+
+    def collect_context(
+        self, query: str, max_tokens: int = 16000, use_cache: bool = True, mode: str = "full"
+    ) -> Dict[str, any]:
         """
         Collect relevant context for a given query with caching and token optimization.
 
@@ -36,39 +81,115 @@ class ContextCollector:
             query: The user's query/request
             max_tokens: Maximum token budget for context
             use_cache: Whether to use caching for performance
+            mode: "full" for whole (or summarized) files, "snippets" for windows
+                around keyword hits
 
         Returns:
             Dictionary containing collected context
         """
         start_time = time.time()
+        mode = mode if mode in self.COLLECTION_MODES else "full"
+
+        # Bring the file index up to date (incremental, directory-mtime based);
+        # its fingerprint keys the result cache
+        self.file_index.refresh()
 
         # Create cache key
-        cache_key = self._create_cache_key(query, max_tokens)
+        cache_key = self._create_cache_key(query, max_tokens, mode)
 
         # Check cache first
         if use_cache:
-            cached_result = self.cache.get(cache_key)
+            cached_result = self._get_cached_result(cache_key, query)
             if cached_result:
-                cached_result["metadata"]["cached"] = True
                 return cached_result
 
         # Phase 1: Recent changes (git-based)
         recent_files = self._get_recent_changes()
 
-        # Phase 2: Query-relevant files (ripgrep-based)
+        # Phase 2: Query-relevant files (index/ripgrep-based)
         relevant_files = self._find_relevant_files(query)
 
         # Phase 3: Important artifacts
         important_files = self._get_important_artifacts()
 
         # Combine and prioritize
-        all_files = self._prioritize_files(recent_files + relevant_files + important_files)
+        keywords = self._extract_keywords(query)
+        all_files = self._prioritize_files(
+            recent_files + relevant_files + important_files,
+            keywords=keywords,
+        )
 
         # Extract content with token budgeting
-        context_parts = self._extract_content_with_budget(all_files, max_tokens)
+        context_parts = self._extract_context(all_files, keywords, max_tokens, mode)
+
+        return self._finish_result(query, cache_key, all_files, context_parts, start_time, use_cache)
+
+    async def collect_context_async(
+        self, query: str, max_tokens: int = 16000, use_cache: bool = True, mode: str = "full"
+    ) -> Dict[str, any]:
+        """
+        Async variant of collect_context for event-loop hosts such as the MCP server.
+
+        git and ripgrep run via asyncio subprocesses, and the three discovery
+        phases run concurrently; blocking index and file work is moved to threads.
+        """
+        start_time = time.time()
+        mode = mode if mode in self.COLLECTION_MODES else "full"
+
+        # Index refresh, the key's fingerprint and the cache read all touch disk
+        cache_key, cached_result = await asyncio.to_thread(
+            self._refresh_and_lookup, query, max_tokens, mode, use_cache
+        )
+        if cached_result:
+            return cached_result
+
+        recent_files, relevant_files, important_files = await asyncio.gather(
+            self._get_recent_changes_async(),
+            self._find_relevant_files_async(query),
+            asyncio.to_thread(self._get_important_artifacts),
+        )
+
+        keywords = self._extract_keywords(query)
+        all_files = await asyncio.to_thread(
+            self._prioritize_files,
+            recent_files + relevant_files + important_files,
+            keywords,
+        )
+        context_parts = await asyncio.to_thread(self._extract_context, all_files, keywords, max_tokens, mode)
+
+        # Storing the result may compact the cache log
+        return await asyncio.to_thread(
+            self._finish_result, query, cache_key, all_files, context_parts, start_time, use_cache
+        )
 
+    def _refresh_and_lookup(
+        self, query: str, max_tokens: int, mode: str, use_cache: bool
+    ) -> Tuple[str, Optional[Dict[str, any]]]:
+        """Bring the file index up to date, then build the cache key and look it up"""
+        self.file_index.refresh()
+        cache_key = self._create_cache_key(query, max_tokens, mode)
+        return cache_key, self._get_cached_result(cache_key, query) if use_cache else None
+
+    def _get_cached_result(self, cache_key: str, query: str) -> Optional[Dict[str, any]]:
+        cached_result = self.cache.get(cache_key)
+        if cached_result:
+            # May have been stored for an equivalent query with different wording
+            cached_result["query"] = query
+            cached_result["metadata"]["cached"] = True
+        return cached_result
+
+    def _finish_result(
+        self,
+        query: str,
+        cache_key: str,
+        all_files: List[Tuple[Path, float]],
+        context_parts: List[Dict],
+        start_time: float,
+        use_cache: bool,
+    ) -> Dict[str, any]:
+        """Assemble the result payload and cache it"""
         # Calculate total tokens
-        total_tokens = sum(self.tokenizer.estimate_tokens(part.get("content", "")) for part in context_parts)
+        total_tokens = sum(part.get("tokens", 0) for part in context_parts)
 
         result = {
             "query": query,
@@ -89,85 +210,60 @@ class ContextCollector:
 
         return result
 
-    def _load_gitignore(self) -> Optional[pathspec.PathSpec]:
-        """Load and parse .gitignore patterns"""
-        gitignore_path = self.project_root / ".gitignore"
-
-        if not gitignore_path.exists():
-            return None
-
-        try:
-            with open(gitignore_path, 'r', encoding='utf-8') as f:
-                patterns = f.read().splitlines()
-
-            # Add common ignore patterns
-            patterns.extend([
-                ".git/",
-                "__pycache__/",
-                "*.pyc",
-                ".DS_Store",
-                "node_modules/",
-                ".next/",
-                "dist/",
-                "build/"
-            ])
-
-            return pathspec.PathSpec.from_lines('gitwildmatch', patterns)
-        except Exception as e:
-            # Silent error handling for clean MCP operation
-            return None
-
-    def _is_ignored(self, path: Path) -> bool:
-        """Check if path should be ignored"""
-        if not self.gitignore_spec:
-            return False
-
-        try:
-            relative_path = path.relative_to(self.project_root)
-            return self.gitignore_spec.match_file(str(relative_path))
-        except ValueError:
-            # Path is outside project root
-            return True
-
     def _get_recent_changes(self, days: int = 1) -> List[Path]:
-        """Get files changed recently via git"""
+        """Get files changed recently via git (shared, cached per repository state)"""
+        return self._filter_recent_changes(self.git.recent_changes(days))
+
+    async def _get_recent_changes_async(self, days: int = 1) -> List[Path]:
+        """Async variant of _get_recent_changes"""
+        return self._filter_recent_changes(await self.git.recent_changes_async(days))
+
+    def _filter_recent_changes(self, paths: Optional[List[str]]) -> List[Path]:
+        return [
+            self.project_root / rel_path
+            for rel_path in paths or ()
+            if not rel_path.startswith(".git") and rel_path in self.file_index
+        ]
+
+    async def _run_subprocess_async(self, cmd: List[str], timeout: float) -> Optional[str]:
+        """Run a command without blocking the event loop; None on failure or timeout"""
         try:
-            # Get files modified in last N days
-            since = f"{days}.days.ago"
-            result = subprocess.run(
-                ["git", "log", "--since", since, "--name-only", "--pretty=format:"],
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
                 cwd=self.project_root,
-                capture_output=True,
-                text=True,
-                timeout=10
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
             )
+        except (OSError, ValueError):
+            return None
 
-            if result.returncode == 0:
-                files = set()
-                for line in result.stdout.splitlines():
-                    line = line.strip()
-                    if line and not line.startswith(".git"):
-                        file_path = self.project_root / line
-                        if file_path.exists() and not self._is_ignored(file_path):
-                            files.add(file_path)
-
-                return list(files)
-
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
-            pass
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return None
 
-        return []
+        if process.returncode != 0:
+            return None
+        return stdout.decode("utf-8", errors="ignore")
 
     def _check_ripgrep_available(self) -> bool:
         """Check if ripgrep is available on the system"""
         return shutil.which("rg") is not None
 
     def _find_relevant_files(self, query: str, max_files: int = 50) -> List[Path]:
-        """Find files relevant to the query using ripgrep or fallback"""
+        """Find files relevant to the query using the keyword index, ripgrep or fallback"""
         if not query.strip():
             return []
 
-        # Try ripgrep first if available
+        # Answer from the inverted index (re-indexes only changed files)
+        try:
+            return self._find_with_keyword_index(query, max_files)
+        except sqlite3.Error:
+            pass
+
+        # Try ripgrep if available
         if self.ripgrep_available:
             try:
                 return self._find_with_ripgrep(query, max_files)
@@ -178,6 +274,36 @@ class ContextCollector:
         # Fallback: basic file search
         return self._find_with_basic_search(query, max_files)
 
+    async def _find_relevant_files_async(self, query: str, max_files: int = 50) -> List[Path]:
+        """Async variant of _find_relevant_files"""
+        if not query.strip():
+            return []
+
+        try:
+            return await asyncio.to_thread(self._find_with_keyword_index, query, max_files)
+        except sqlite3.Error:
+            pass
+
+        if self.ripgrep_available:
+            keywords = self._extract_keywords(query)
+            if not keywords:
+                return []
+            output = await self._run_subprocess_async(self._ripgrep_command(keywords), timeout=15)
+            if output is not None:
+                return self._parse_ripgrep_output(output, max_files)
+
+        return await asyncio.to_thread(self._find_with_basic_search, query, max_files)
+
+    def _find_with_keyword_index(self, query: str, max_files: int) -> List[Path]:
+        """Find files using the persistent inverted keyword index"""
+        keywords = self._extract_keywords(query)
+        if not keywords:
+            return []
+
+        self.keyword_index.update(self.file_index)
+        ranked = self.keyword_index.search(keywords, max_files)
+        return [self.project_root / rel_path for rel_path, _ in ranked if rel_path in self.file_index]
+
     def _find_with_ripgrep(self, query: str, max_files: int) -> List[Path]:
         """Find files using ripgrep for fast searching"""
         # Extract keywords from query
@@ -186,18 +312,8 @@ class ContextCollector:
         if not keywords:
             return []
 
-        # Build ripgrep command with optimizations
-        rg_cmd = [
-            "rg",
-            "--files-with-matches",
-            "--smart-case",
-            "--hidden",  # Include hidden files
-            "--glob", "!{.git,node_modules,__pycache__,.next,.DS_Store}/**"  # Exclude common dirs
-        ]
-        rg_cmd.extend(keywords[:3])  # Limit to top 3 keywords
-
         result = subprocess.run(
-            rg_cmd,
+            self._ripgrep_command(keywords),
             cwd=self.project_root,
             capture_output=True,
             text=True,
@@ -205,17 +321,34 @@ class ContextCollector:
         )
 
         if result.returncode == 0:
-            files = []
-            for line in result.stdout.splitlines():
-                file_path = self.project_root / line.strip()
-                if file_path.exists() and not self._is_ignored(file_path):
-                    files.append(file_path)
-                    if len(files) >= max_files:
-                        break
-            return files
+            return self._parse_ripgrep_output(result.stdout, max_files)
 
         return []
 
+    @staticmethod
+    def _ripgrep_command(keywords: List[str]) -> List[str]:
+        """Build ripgrep command with optimizations"""
+        rg_cmd = [
+            "rg",
+            "--files-with-matches",
+            "--smart-case",
+            "--hidden",  # Include hidden files
+            "--glob", "!{.git,node_modules,__pycache__,.next,.DS_Store}/**"  # Exclude common dirs
+        ]
+        for keyword in keywords[:3]:  # Limit to top 3 keywords
+            rg_cmd.extend(["-e", keyword])
+        return rg_cmd
+
+    def _parse_ripgrep_output(self, output: str, max_files: int) -> List[Path]:
+        files = []
+        for line in output.splitlines():
+            rel_path = Path(line.strip()).as_posix()
+            if rel_path in self.file_index:
+                files.append(self.project_root / rel_path)
+                if len(files) >= max_files:
+                    break
+        return files
+
     def _find_with_basic_search(self, query: str, max_files: int) -> List[Path]:
         """Fallback file search using basic Python methods"""
         keywords = self._extract_keywords(query)
@@ -224,52 +357,68 @@ class ContextCollector:
 
         matching_files = []
 
-        # Walk through project files
-        for root, dirs, files in os.walk(self.project_root):
-            # Skip ignored directories
-            dirs[:] = [d for d in dirs if not self._is_ignored(Path(root) / d)]
-
-            for file in files:
-                file_path = Path(root) / file
-
-                # Skip ignored files
-                if self._is_ignored(file_path):
-                    continue
-
-                # Check if file contains keywords
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read(10000)  # Read first 10KB
+        # Scan indexed (non-ignored) project files instead of walking the tree
+        for entry in self.file_index.iter_files():
+            file_path = self.project_root / entry.path
 
-                    content_lower = content.lower()
-                    matches = sum(1 for keyword in keywords if keyword in content_lower)
+            # Check if file contains keywords
+            try:
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read(10000)  # Read first 10KB
 
-                    if matches > 0:
-                        matching_files.append((file_path, matches))
-                        if len(matching_files) >= max_files:
-                            break
+                content_lower = content.lower()
+                matches = sum(1 for keyword in keywords if keyword in content_lower)
 
-                except Exception:
-                    continue
+                if matches > 0:
+                    matching_files.append((file_path, matches))
+                    if len(matching_files) >= max_files:
+                        break
 
-            if len(matching_files) >= max_files:
-                break
+            except Exception:
+                continue
 
         # Sort by number of matches and return files
         matching_files.sort(key=lambda x: x[1], reverse=True)
         return [file_path for file_path, _ in matching_files]
 
-    def _create_cache_key(self, query: str, max_tokens: int) -> str:
-        """Create a cache key for the query and parameters"""
+    def _create_cache_key(self, query: str, max_tokens: int, mode: str = "full") -> str:
+        """
+        Create a cache key for the query, parameters and repository state.
+
+        The query contributes its normalized keywords, so rewordings that only
+        differ in stop words, case, order or inflection share an entry. The file
+        index fingerprint (HEAD plus dirty-file mtimes) invalidates entries once
+        the working tree changes.
+        """
         key_components = [
-            query.strip().lower(),
+            " ".join(self._normalize_keywords(self._extract_keywords(query))),
             str(max_tokens),
+            mode,
             str(self.project_root),
-            str(self.ripgrep_available)
+            str(self.ripgrep_available),
+            self.file_index.fingerprint()
         ]
         key_string = "|".join(key_components)
         return hashlib.md5(key_string.encode('utf-8')).hexdigest()
 
+    @staticmethod
+    def _normalize_keywords(keywords: List[str]) -> List[str]:
+        """Sorted, de-duplicated keyword stems (caches/cached/caching -> cach)"""
+        stems = set()
+        for word in keywords:
+            if word.endswith("ies") and len(word) > 4:
+                word = word[:-3] + "y"
+            elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+                word = word[:-1]
+            for suffix in ("ing", "ed"):
+                if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                    word = word[:-len(suffix)]
+                    break
+            if word.endswith("e") and len(word) > 3:
+                word = word[:-1]
+            stems.add(word)
+        return sorted(stems)
+
     def _get_important_artifacts(self) -> List[Path]:
         """Get important project artifacts that should always be considered"""
         important_patterns = [
@@ -291,28 +440,47 @@ class ContextCollector:
         for pattern in important_patterns:
             try:
                 if "**" in pattern:
-                    # Handle glob patterns
-                    import glob
-                    matches = glob.glob(str(self.project_root / pattern), recursive=True)
-                    for match in matches[:5]:  # Limit per pattern
-                        file_path = Path(match)
-                        if file_path.exists() and not self._is_ignored(file_path):
-                            important_files.append(file_path)
-                else:
-                    file_path = self.project_root / pattern
-                    if file_path.exists() and not self._is_ignored(file_path):
-                        important_files.append(file_path)
+                    # Handle glob patterns against the file index
+                    important_files.extend(self.file_index.glob(pattern, limit=5))  # Limit per pattern
+                elif pattern in self.file_index:
+                    important_files.append(self.project_root / pattern)
             except Exception:
                 continue
 
         return important_files
 
-    def _prioritize_files(self, files: List[Path]) -> List[Tuple[Path, int]]:
-        """Prioritize files by relevance and recency"""
+    def _prioritize_files(self, files: List[Path], keywords: Optional[List[str]] = None) -> List[Tuple[Path, float]]:
+        """Prioritize files by keyword relevance (BM25), import-graph proximity, file type and recency"""
         prioritized = []
+        files = list(dict.fromkeys(files))  # De-duplicate, keeping first-seen order
+
+        relevance: Dict[str, float] = {}
+        if keywords:
+            try:
+                rel_paths = [self.file_index.relative(f) for f in files]
+                relevance = self.keyword_index.bm25_scores(keywords, [p for p in rel_paths if p])
+            except sqlite3.Error:
+                relevance = {}
+        best_score = max(relevance.values(), default=0.0)
+
+        proximity = self._graph_proximity(relevance, best_score) if best_score > 0 else {}
+        known = {self.file_index.relative(f) for f in files}
+        neighbors = sorted(
+            (rel_path for rel_path in proximity if rel_path not in known and rel_path in self.file_index),
+            key=lambda rel_path: (-proximity[rel_path], rel_path),
+        )
+        files.extend(self.project_root / rel_path for rel_path in neighbors[:self.GRAPH_MAX_NEIGHBORS])
 
         for file_path in files:
-            priority = 1  # Base priority
+            priority = 1.0  # Base priority
+            rel_path = self.file_index.relative(file_path) or ""
+
+            # Boost priority by keyword match strength, normalized to the best match
+            if best_score > 0:
+                priority += self.RELEVANCE_WEIGHT * relevance.get(rel_path, 0.0) / best_score
+
+            # Boost modules that import, or are imported by, strong matches
+            priority += self.GRAPH_WEIGHT * proximity.get(rel_path, 0.0)
 
             # Boost priority for certain file types
             if file_path.name in ["README.md", "package.json", "pyproject.toml"]:
@@ -323,39 +491,194 @@ class ContextCollector:
                 priority += 3
 
             # Boost priority for recently modified files
-            try:
-                mtime = file_path.stat().st_mtime
-                hours_old = (time.time() - mtime) / 3600
+            entry = self.file_index.lookup(file_path)
+            if entry is not None:
+                hours_old = (time.time() - entry.mtime) / 3600
                 if hours_old < 24:  # Last 24 hours
                     priority += 5
                 elif hours_old < 168:  # Last week
                     priority += 2
-            except OSError:
-                pass
 
-            prioritized.append((file_path, priority))
+            prioritized.append((file_path, round(priority, 2)))
 
         # Sort by priority (descending)
         prioritized.sort(key=lambda x: x[1], reverse=True)
         return prioritized
 
-    def _extract_content_with_budget(self, prioritized_files: List[Tuple[Path, int]], max_tokens: int) -> List[Dict]:
-        """Extract content from files respecting token budget"""
+    def _graph_proximity(self, relevance: Dict[str, float], best_score: float) -> Dict[str, float]:
+        """
+        Import-graph closeness to the strongest keyword hits, in [0, 1].
+
+        Each seed contributes its normalized relevance, halved per hop; a file
+        keeps its best contribution. Seeds themselves are left to BM25.
+        """
+        try:
+            self.import_graph.update(self.file_index)
+        except sqlite3.Error:
+            return {}
+
+        seeds = sorted(relevance, key=lambda rel_path: -relevance[rel_path])[:self.GRAPH_SEEDS]
+        proximity: Dict[str, float] = {}
+        for seed in seeds:
+            strength = relevance[seed] / best_score
+            for rel_path, distance in self.import_graph.distances([seed], self.GRAPH_MAX_DISTANCE).items():
+                if distance:
+                    score = strength / 2 ** (distance - 1)
+                    if score > proximity.get(rel_path, 0.0):
+                        proximity[rel_path] = score
+        for seed in seeds:
+            proximity.pop(seed, None)
+        return proximity
+
+    def _extract_context(
+        self, prioritized_files: List[Tuple[Path, float]], keywords: List[str], max_tokens: int, mode: str
+    ) -> List[Dict]:
+        if mode == "snippets" and keywords:
+            return self._extract_snippets_with_budget(prioritized_files, keywords, max_tokens)
+        return self._extract_content_with_budget(prioritized_files, max_tokens)
+
+    def _extract_snippets_with_budget(
+        self, prioritized_files: List[Tuple[Path, float]], keywords: List[str], max_tokens: int
+    ) -> List[Dict]:
+        """
+        Extract windows around keyword hits instead of whole files.
+
+        Windows from all files compete for the budget by hit density (hits per
+        line, ties broken by file priority), and a window that doesn't fit is
+        skipped, so one large file can't crowd out the other matches.
+        """
+        pattern = self._hit_pattern(keywords)
+        if pattern is None or not prioritized_files:
+            return self._extract_content_with_budget(prioritized_files, max_tokens)
+
+        def load(file_path: Path) -> List[Tuple[int, int, int, str]]:
+            try:
+                return self._snippet_windows(file_path, pattern)
+            except Exception:
+                # Silent error handling for clean MCP operation
+                return []
+
+        with ThreadPoolExecutor(max_workers=min(self.PREFETCH_WORKERS, len(prioritized_files))) as pool:
+            file_windows = list(pool.map(load, [file_path for file_path, _ in prioritized_files]))
+
+        candidates = []
+        for rank, windows in enumerate(file_windows):
+            for start, end, hits, text in windows:
+                candidates.append((hits / (end - start), rank, start, end, text))
+
+        window_tokens = self.tokenizer.count_tokens_many(candidate[4] for candidate in candidates)
+        order = sorted(range(len(candidates)), key=lambda i: (-candidates[i][0], candidates[i][1], candidates[i][2]))
+
+        selected: Dict[int, List[Tuple[int, int, str, int]]] = {}
+        used_tokens = 0
+        for index in order:
+            _, rank, start, end, text = candidates[index]
+            # One extra token for the newline joining windows
+            cost = window_tokens[index] + 1
+            if used_tokens + cost <= max_tokens:
+                selected.setdefault(rank, []).append((start, end, text, cost))
+                used_tokens += cost
+
+        context_parts = []
+        for rank in sorted(selected):
+            file_path, priority = prioritized_files[rank]
+            windows = sorted(selected[rank])
+            context_parts.append({
+                "path": str(file_path.relative_to(self.project_root)),
+                "content": "\n".join(text for _, _, text, _ in windows),
+                "priority": priority,
+                "tokens": sum(cost for _, _, _, cost in windows) - 1,
+                "snippets": [[start + 1, end] for start, end, _, _ in windows]
+            })
+        return context_parts
+
+    @staticmethod
+    def _hit_pattern(keywords: List[str]) -> Optional["re.Pattern"]:
+        """Case-insensitive alternation of the keywords' index terms"""
+        terms = {term for _, term in KeywordIndex.query_terms(keywords)}
+        if not terms:
+            return None
+        return re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+
+    def _snippet_windows(self, file_path: Path, pattern: "re.Pattern") -> List[Tuple[int, int, int, str]]:
+        """(start, end, hits, text) line windows around a file's keyword hits"""
+        if file_path.stat().st_size > self.MAX_FILE_SIZE:
+            # The cache only holds the head of oversized files; search the whole mapped file
+            byte_pattern = re.compile(pattern.pattern.encode("utf-8"), re.IGNORECASE)
+            hit_lines, line_count = find_hit_lines(file_path, byte_pattern)
+            windows = self._hit_windows(hit_lines, line_count)
+            texts = read_line_ranges(file_path, [(start, end) for start, end, _ in windows])
+        else:
+            content = self._load_file_text(file_path)
+            lines = content.split("\n")
+            windows = self._hit_windows(self._content_hit_lines(content, pattern), len(lines))
+            texts = ["\n".join(lines[start:end]) for start, end, _ in windows]
+        return [
+            (start, end, hits, f"[lines {start + 1}-{end}]\n{text}")
+            for (start, end, hits), text in zip(windows, texts)
+        ]
+
+    @staticmethod
+    def _content_hit_lines(content: str, pattern: "re.Pattern") -> Dict[int, int]:
+        """Pattern hits per zero-based line"""
+        hit_lines: Dict[int, int] = {}
+        line = 0
+        position = 0
+        for match in pattern.finditer(content):
+            line += content.count("\n", position, match.start())
+            position = match.start()
+            hit_lines[line] = hit_lines.get(line, 0) + 1
+        return hit_lines
+
+    def _hit_windows(self, hit_lines: Dict[int, int], line_count: int) -> List[Tuple[int, int, int]]:
+        """Merged (start, end, hits) line windows around hit lines"""
+        windows: List[List[int]] = []
+        for line, hits in hit_lines.items():
+            start = max(0, line - self.SNIPPET_CONTEXT_LINES)
+            end = min(line_count, line + self.SNIPPET_CONTEXT_LINES + 1)
+            if windows and start <= windows[-1][1]:
+                if end - windows[-1][0] <= self.SNIPPET_MAX_LINES:
+                    windows[-1][1] = end
+                    windows[-1][2] += hits
+                    continue
+                start = windows[-1][1]
+            windows.append([start, end, hits])
+        return [(start, end, hits) for start, end, hits in windows if end > start]
+
+    def _extract_content_with_budget(self, prioritized_files: List[Tuple[Path, float]], max_tokens: int) -> List[Dict]:
+        """
+        Extract content from files respecting token budget.
+
+        A bounded thread pool reads and estimates the next PREFETCH_DEPTH files
+        while selection consumes results strictly in priority order, so the
+        outcome is identical to a sequential pass.
+        """
         context_parts = []
         used_tokens = 0
+        if not prioritized_files:
+            return context_parts
 
-        for file_path, priority in prioritized_files:
-            try:
-                # Check cache first
-                cache_key = self._get_cache_key(file_path)
-                if cache_key in self.cache:
-                    content = self.cache[cache_key]
-                else:
-                    content = self._read_file_content(file_path)
-                    self.cache[cache_key] = content
+        pool = ThreadPoolExecutor(max_workers=min(self.PREFETCH_WORKERS, len(prioritized_files)))
+        remaining_files = iter(prioritized_files)
+        pending = deque()
+
+        def prefetch_next() -> None:
+            item = next(remaining_files, None)
+            if item is not None:
+                pending.append((item, pool.submit(self._load_file_content, item[0])))
 
-                # Estimate tokens (rough approximation: 1 token ≈ 4 chars)
-                content_tokens = len(content) // 4
+        for _ in range(self.PREFETCH_DEPTH):
+            prefetch_next()
+
+        try:
+            while pending:
+                (file_path, priority), future = pending.popleft()
+                prefetch_next()
+                try:
+                    content, content_tokens = future.result()
+                except Exception:
+                    # Silent error handling for clean MCP operation
+                    continue
 
                 if used_tokens + content_tokens <= max_tokens:
                     context_parts.append({
@@ -369,31 +692,51 @@ class ContextCollector:
                     # Try to fit a summary
                     remaining_tokens = max_tokens - used_tokens
                     if remaining_tokens > 200:  # Minimum useful content
-                        summary = self._summarize_content(content, remaining_tokens)
-                        summary_tokens = len(summary) // 4
-
-                        context_parts.append({
-                            "path": str(file_path.relative_to(self.project_root)),
-                            "content": summary,
-                            "priority": priority,
-                            "tokens": summary_tokens,
-                            "truncated": True
-                        })
-                        used_tokens += summary_tokens
+                        try:
+                            summary = self._summarize_file(file_path, content, remaining_tokens)
+                            summary_tokens = self.tokenizer.estimate_tokens(summary)
+                            if summary_tokens > remaining_tokens:
+                                summary = self.tokenizer.truncate_to_tokens(summary, remaining_tokens)
+                                summary_tokens = self.tokenizer.estimate_tokens(summary)
+
+                            context_parts.append({
+                                "path": str(file_path.relative_to(self.project_root)),
+                                "content": summary,
+                                "priority": priority,
+                                "tokens": summary_tokens,
+                                "truncated": True
+                            })
+                            used_tokens += summary_tokens
+                        except Exception:
+                            # Silent error handling for clean MCP operation
+                            pass
 
                     break
-
-            except Exception as e:
-                # Silent error handling for clean MCP operation
-                pass
-            continue
+        finally:
+            # Drop prefetches that haven't started and wait for the running ones,
+            # so no prefetch thread writes to the cache after this call returns
+            pool.shutdown(wait=True, cancel_futures=True)
 
         return context_parts
 
+    def _load_file_content(self, file_path: Path) -> Tuple[str, int]:
+        """Load file content through the cache and estimate its tokens (runs on prefetch threads)"""
+        content = self._load_file_text(file_path)
+        return content, self.tokenizer.estimate_tokens(content)
+
+    def _load_file_text(self, file_path: Path) -> str:
+        """Load file content through the cache without counting its tokens"""
+        # Check cache first (entries map path:mtime:size to a content digest)
+        cache_key = self._get_cache_key(file_path)
+        digest = self.cache.get(cache_key)
+        content = self.blob_store.get(digest) if digest else None
+        if content is None:
+            content = self._read_file_content(file_path)
+            self.cache[cache_key] = self.blob_store.put(content)
+        return content
+
     def _extract_keywords(self, query: str) -> List[str]:
         """Extract meaningful keywords from query"""
-        import re
-
         # Remove common stop words and split
         stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "is", "are", "was", "were"}
         words = re.findall(r'\b\w+\b', query.lower())
@@ -409,31 +752,63 @@ class ContextCollector:
         """Generate cache key for file"""
         try:
             stat = file_path.stat()
-            return f"{file_path}:{stat.st_mtime}:{stat.st_size}"
+            return f"file:{file_path}:{stat.st_mtime}:{stat.st_size}"
         except OSError:
-            return str(file_path)
+            return f"file:{file_path}"
+
+    @staticmethod
+    def file_cache_path(cache_key: str) -> Optional[str]:
+        """The file path a `_get_cache_key` key refers to (None for other keys)"""
+        if not cache_key.startswith("file:"):
+            return None
+        parts = cache_key[5:].rsplit(":", 2)
+        if len(parts) == 3 and parts[2].isdigit():
+            return parts[0]
+        return cache_key[5:]
 
-    def _read_file_content(self, file_path: Path, max_size: int = 102400) -> str:
+    def _read_file_content(self, file_path: Path, max_size: Optional[int] = None) -> str:
         """Read file content with size limit"""
+        max_size = max_size or self.MAX_FILE_SIZE
         try:
             if file_path.stat().st_size > max_size:
-                # For large files, read first part
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    return f.read(max_size // 2) + "\n\n[File truncated due to size]"
+                # For large files, decode only a line-aligned head of the mapped buffer
+                head, _ = read_head(file_path, max_size // 2)
+                return head + "\n\n[File truncated due to size]"
 
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
+            content, _ = read_head(file_path, max_size)
+            return content
         except Exception:
             return "[Error reading file]"
 
-    def _summarize_content(self, content: str, max_tokens: int) -> str:
-        """Create a summary of content fitting within token limit"""
-        max_chars = max_tokens * 4
+    def _summarize_file(self, file_path: Path, content: str, max_tokens: int) -> str:
+        """Summarize a file at the budget edge, looking past the cached head when the file is oversized"""
+        try:
+            if file_path.stat().st_size > self.MAX_FILE_SIZE:
+                text, _ = read_head(file_path, self.SUMMARY_SCAN_SIZE)
+                summary = summarizer.summarize(text, max_tokens, file_path.suffix)
+                if summary:
+                    return summary
+                windows = read_windows(file_path, (max_tokens * Tokenizer.CHARS_PER_TOKEN) // 3)
+                return "\n\n[...content truncated...]\n\n".join(windows)
+        except OSError:
+            pass
+        return self._summarize_content(content, max_tokens, file_path.suffix)
 
-        if len(content) <= max_chars:
+    def _summarize_content(self, content: str, max_tokens: int, suffix: str = "") -> str:
+        """Create a summary of content fitting within token limit"""
+        content_tokens = self.tokenizer.estimate_tokens(content)
+        if content_tokens <= max_tokens:
             return content
 
-        # Simple summarization: take beginning, middle, and end
+        # Prefer the file's head plus an outline of its symbols
+        summary = summarizer.summarize(content, max_tokens, suffix)
+        if summary:
+            return summary
+
+        # Scale by this content's own characters-per-token ratio
+        max_chars = int(len(content) * max_tokens / content_tokens)
+
+        # No outline for this file type: take beginning, middle, and end
         part_size = max_chars // 3
 
         beginning = content[:part_size]
@@ -446,10 +821,16 @@ class ContextCollector:
     def clear_cache(self):
         """Clear the content cache"""
         self.cache.clear()
+        self.blob_store.clear()
 
     def get_stats(self) -> Dict[str, any]:
         """Get collector statistics"""
         return {
             "cache_size": len(self.cache),
-            "gitignore_loaded": self.gitignore_spec is not None
+            **self.blob_store.get_stats(),
+            "gitignore_loaded": self.ignore_matcher.has_gitignore,
+            **self.file_index.get_stats(),
+            **self.keyword_index.get_stats(),
+            **self.import_graph.get_stats(),
+            "tokenizer_backend": self.tokenizer.backend_name()
         }
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Eviction Policies - Constant-time bookkeeping for ContextCache eviction
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class EvictionPolicy(ABC):
+    """
+    Base class for cache eviction policies.
+
+    The cache reports inserts, accesses and removals; `victim()` names the
+    next key to evict without changing any state, and the cache reports the
+    eviction back through `record_evict`.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def record_insert(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def record_access(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def record_remove(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def victim(self) -> Optional[str]:
+        ...
+
+    def record_evict(self, key: str) -> None:
+        """A key was removed to make space (policies that learn capacity override this)"""
+        self.record_remove(key)
+
+
+class LRUPolicy(EvictionPolicy):
+    """Least recently used, backed by an OrderedDict"""
+
+    name = "lru"
+
+    def __init__(self):
+        self._order: "OrderedDict[str, None]" = OrderedDict()
+
+    def record_insert(self, key: str) -> None:
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def record_access(self, key: str) -> None:
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def record_remove(self, key: str) -> None:
+        self._order.pop(key, None)
+
+    def victim(self) -> Optional[str]:
+        return next(iter(self._order), None)
+
+
+class LFUPolicy(EvictionPolicy):
+    """Least frequently used with O(1) frequency buckets (LRU among equal counts)"""
+
+    name = "lfu"
+
+    def __init__(self):
+        self._freq: Dict[str, int] = {}
+        self._buckets: Dict[int, "OrderedDict[str, None]"] = {}
+        # Non-empty bucket frequencies linked in increasing order, so the minimum
+        # is known in O(1) even after removals
+        self._lower: Dict[int, Optional[int]] = {}
+        self._higher: Dict[int, Optional[int]] = {}
+        self._min_freq: Optional[int] = None
+
+    def record_insert(self, key: str) -> None:
+        if key in self._freq:
+            self.record_access(key)
+            return
+        self._freq[key] = 1
+        self._add(key, 1, None)
+
+    def record_access(self, key: str) -> None:
+        freq = self._freq.get(key)
+        if freq is None:
+            return
+        # Link the next bucket while this one is still in the list
+        self._freq[key] = freq + 1
+        self._add(key, freq + 1, freq)
+        self._discard(key, freq)
+
+    def record_remove(self, key: str) -> None:
+        freq = self._freq.pop(key, None)
+        if freq is not None:
+            self._discard(key, freq)
+
+    def victim(self) -> Optional[str]:
+        if self._min_freq is None:
+            return None
+        return next(iter(self._buckets[self._min_freq]))
+
+    def _add(self, key: str, freq: int, lower: Optional[int]) -> None:
+        """Add a key to a bucket, linking a new bucket right above `lower`"""
+        bucket = self._buckets.get(freq)
+        if bucket is None:
+            bucket = self._buckets[freq] = OrderedDict()
+            higher = self._min_freq if lower is None else self._higher[lower]
+            self._lower[freq] = lower
+            self._higher[freq] = higher
+            if lower is None:
+                self._min_freq = freq
+            else:
+                self._higher[lower] = freq
+            if higher is not None:
+                self._lower[higher] = freq
+        bucket[key] = None
+
+    def _discard(self, key: str, freq: int) -> None:
+        """Remove a key from its bucket, unlinking the bucket once empty"""
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if bucket:
+            return
+        del self._buckets[freq]
+        lower = self._lower.pop(freq)
+        higher = self._higher.pop(freq)
+        if lower is None:
+            self._min_freq = higher
+        else:
+            self._higher[lower] = higher
+        if higher is not None:
+            self._lower[higher] = lower
+
+
+class _FrequencySketch:
+    """Count-min sketch with periodic halving, used as the TinyLFU admission filter"""
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows: List[List[int]] = [[0] * width for _ in range(depth)]
+        self.sample_size = 10 * width
+        self.additions = 0
+
+    def _indexes(self, key: str):
+        h = hash(key)
+        for row in range(self.depth):
+            yield row, (h ^ (h >> (row * 8 + 1)) ^ (row * 0x9E3779B1)) % self.width
+
+    def increment(self, key: str) -> None:
+        for row, index in self._indexes(key):
+            if self.rows[row][index] < 15:
+                self.rows[row][index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            # Age all counters so old popularity fades
+            self.rows = [[count >> 1 for count in row] for row in self.rows]
+            self.additions //= 2
+
+    def estimate(self, key: str) -> int:
+        return min(self.rows[row][index] for row, index in self._indexes(key))
+
+
+class TinyLFUPolicy(EvictionPolicy):
+    """
+    W-TinyLFU: a small LRU admission window in front of a main LRU region.
+
+    Entries leaving the window are admitted freely while the main region has
+    room. Once it is full (capacity is learned from the entry count at each
+    eviction), the window's oldest entry competes with the main region's
+    LRU victim on estimated access frequency. The loser moves to a rejected
+    queue that is evicted first; a hit sends it back to the window.
+    """
+
+    name = "tinylfu"
+
+    def __init__(self, window_fraction: float = 0.01):
+        self.window_fraction = window_fraction
+        self._window: "OrderedDict[str, None]" = OrderedDict()
+        self._main: "OrderedDict[str, None]" = OrderedDict()
+        self._rejected: "OrderedDict[str, None]" = OrderedDict()
+        self._sketch = _FrequencySketch()
+        self._capacity: Optional[int] = None  # Entries that fit, as of the last eviction
+
+    def _window_limit(self) -> int:
+        total = len(self._window) + len(self._main) + len(self._rejected)
+        return max(1, int(total * self.window_fraction))
+
+    def record_insert(self, key: str) -> None:
+        self._sketch.increment(key)
+        if key in self._main:
+            self._main.move_to_end(key)
+            return
+        self._rejected.pop(key, None)
+        self._enter_window(key)
+
+    def record_access(self, key: str) -> None:
+        self._sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._main:
+            self._main.move_to_end(key)
+        elif key in self._rejected:
+            del self._rejected[key]
+            self._enter_window(key)
+
+    def record_remove(self, key: str) -> None:
+        self._window.pop(key, None)
+        self._main.pop(key, None)
+        self._rejected.pop(key, None)
+
+    def record_evict(self, key: str) -> None:
+        # The cache only evicts when over budget, so one entry fewer is what fits
+        self._capacity = len(self._window) + len(self._main) + len(self._rejected) - 1
+        self.record_remove(key)
+
+    def victim(self) -> Optional[str]:
+        for region in (self._rejected, self._main, self._window):
+            if region:
+                return next(iter(region))
+        return None
+
+    def _enter_window(self, key: str) -> None:
+        self._window[key] = None
+        self._window.move_to_end(key)
+        while len(self._window) > self._window_limit():
+            self._admit(self._window.popitem(last=False)[0])
+
+    def _admit(self, candidate: str) -> None:
+        """Admission filter for an entry leaving the window"""
+        main_victim = next(iter(self._main), None)
+        main_capacity = None if self._capacity is None else self._capacity - self._window_limit()
+        if main_victim is None or main_capacity is None or len(self._main) < main_capacity:
+            self._main[candidate] = None
+        elif self._sketch.estimate(candidate) > self._sketch.estimate(main_victim):
+            # The candidate takes the main victim's place; the victim goes first
+            del self._main[main_victim]
+            self._main[candidate] = None
+            self._rejected[main_victim] = None
+        else:
+            self._rejected[candidate] = None
+
+
+EVICTION_POLICIES = {
+    LRUPolicy.name: LRUPolicy,
+    LFUPolicy.name: LFUPolicy,
+    TinyLFUPolicy.name: TinyLFUPolicy,
+}
+
+
+def create_policy(name: str) -> EvictionPolicy:
+    """Create an eviction policy by name (lru, lfu, tinylfu); unknown names fall back to LRU"""
+    return EVICTION_POLICIES.get((name or "").strip().lower(), LRUPolicy)()
@@ -0,0 +1,596 @@
+"""
+File Index - Persistent, incrementally refreshed index of project files
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..utils.git import GitRepo
+from .ignore import IgnoreMatcher
+
+
+# Directories that are never worth indexing, regardless of .gitignore
+DEFAULT_EXCLUDED_DIRS = {".git", ".super-prompt", ".hg", ".svn"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    suffix TEXT NOT NULL,
+    ignored INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    ignored INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class IndexedFile:
+    """Indexed file metadata (path is relative to the project root, POSIX style)"""
+    path: str
+    mtime: float
+    size: int
+    suffix: str
+    ignored: bool = False
+
+
+@dataclass
+class FileChanges:
+    """Paths (relative, POSIX style) affected by one refresh or batch of watcher events"""
+    added: List[str]
+    modified: List[str]
+    removed: List[str]
+
+
+class FileIndex:
+    """
+    On-disk index of project files stored under `.super-prompt/cache`.
+
+    Directory mtimes tell us which directories gained or lost entries, so only
+    those are re-listed. In-place edits are picked up from `git status` deltas
+    (or a stat-only pass outside git), avoiding a full rescan per query.
+
+    When a file watcher feeds `apply_events`, refreshes skip the walk entirely
+    until HEAD or the ignore rules change. Subscribers are told about every
+    change, whichever path detected it.
+
+    Without a watcher, `refresh()` runs at most once per `min_refresh_interval`
+    seconds, and in-place edits are found through a `git status` cached for
+    `GitRepo.STATUS_MAX_AGE` seconds. An edit made within about two seconds of
+    the previous refresh can therefore be missed (and cached results built
+    from the old state served) until the next refresh; run a `FileWatcher` or
+    call `refresh(force=True)` when that window matters.
+
+    Queries take the index lock, so they never see a refresh half applied.
+    """
+
+    _instances: Dict[Path, "FileIndex"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        project_root: Path,
+        ignore_matcher: Optional[IgnoreMatcher] = None,
+        index_dir: Optional[Path] = None,
+        min_refresh_interval: float = 2.0,
+    ):
+        self.project_root = Path(project_root).resolve()
+        self.ignore_matcher = ignore_matcher or IgnoreMatcher.open(self.project_root)
+        self.git = GitRepo.open(self.project_root)
+        self.index_dir = index_dir or self.project_root / ".super-prompt" / "cache"
+        self.db_path = self.index_dir / "file_index.db"
+        self.min_refresh_interval = min_refresh_interval
+
+        self.files: Dict[str, IndexedFile] = {}
+        self.dirs: Dict[str, Tuple[float, bool]] = {}
+        self._children: Dict[str, Set[str]] = {}
+        self._dir_files: Dict[str, Set[str]] = {}
+        self._sorted_paths: Optional[List[str]] = None
+        self._meta: Dict[str, str] = {}
+        self._last_refresh = 0.0
+        self.generation = 0  # Bumped whenever a refresh changes file entries
+        self._dirty_paths: Optional[List[str]] = None  # From the last refresh; None outside git
+        self._fingerprint: Optional[str] = None
+        self._added: Set[str] = set()
+        self._listeners: List[Callable[[FileChanges], None]] = []
+        self.watching = False  # Set while a watcher keeps the index current
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._load()
+
+    @classmethod
+    def open(
+        cls, project_root: Path, ignore_matcher: Optional[IgnoreMatcher] = None
+    ) -> "FileIndex":
+        """Return the process-wide index for a project root"""
+        root = Path(project_root).resolve()
+        with cls._instances_lock:
+            index = cls._instances.get(root)
+            if index is None:
+                index = cls(root, ignore_matcher=ignore_matcher)
+                cls._instances[root] = index
+            return index
+
+    # Queries ---------------------------------------------------------------
+    def __contains__(self, rel_path: str) -> bool:
+        with self._lock:
+            entry = self.files.get(rel_path)
+        return entry is not None and not entry.ignored
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.files)
+
+    def get(self, rel_path: str) -> Optional[IndexedFile]:
+        """Get indexed metadata for a relative path"""
+        with self._lock:
+            return self.files.get(rel_path)
+
+    def lookup(self, file_path: Path) -> Optional[IndexedFile]:
+        """Get indexed metadata for an absolute path"""
+        rel_path = self.relative(file_path)
+        if rel_path is None:
+            return None
+        with self._lock:
+            return self.files.get(rel_path)
+
+    def relative(self, file_path: Path) -> Optional[str]:
+        """Convert an absolute path to the index's relative key"""
+        try:
+            return Path(file_path).relative_to(self.project_root).as_posix()
+        except ValueError:
+            return None
+
+    def iter_files(self, include_ignored: bool = False) -> Iterator[IndexedFile]:
+        """Iterate indexed files in stable path order"""
+        with self._lock:
+            if self._sorted_paths is None:
+                self._sorted_paths = sorted(self.files)
+            entries = [self.files[rel_path] for rel_path in self._sorted_paths]
+        for entry in entries:
+            if include_ignored or not entry.ignored:
+                yield entry
+
+    def glob(self, pattern: str, limit: Optional[int] = None) -> List[Path]:
+        """Match indexed files against a glob pattern (supports `**/`)"""
+        prefix, recursive, tail = pattern.partition("**/")
+        matches = []
+        for entry in self.iter_files():
+            if recursive:
+                matched = entry.path.startswith(prefix) and fnmatch(
+                    PurePosixPath(entry.path).name, tail
+                )
+            else:
+                matched = self._match_segments(entry.path, pattern)
+            if matched:
+                matches.append(self.project_root / entry.path)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    @staticmethod
+    def _match_segments(rel_path: str, pattern: str) -> bool:
+        """Glob-style match where `*` never crosses a `/`"""
+        path_parts = rel_path.split("/")
+        pattern_parts = pattern.split("/")
+        if len(path_parts) != len(pattern_parts):
+            return False
+        return all(fnmatch(part, pat) for part, pat in zip(path_parts, pattern_parts))
+
+    def fingerprint(self) -> str:
+        """
+        Cheap digest of the working-tree state as of the last refresh.
+
+        Inside git this is HEAD plus the mtimes/sizes of the files `git status`
+        reports; outside git it covers every indexed file.
+        """
+        with self._lock:
+            if self._fingerprint is None:
+                digest = hashlib.blake2b(digest_size=16)
+                digest.update(self._meta.get("head", "").encode("utf-8"))
+                paths = self._dirty_paths if self._dirty_paths is not None else self.files
+                for rel_path in sorted(paths):
+                    entry = self.files.get(rel_path)
+                    state = f"{entry.mtime}:{entry.size}" if entry else "-"
+                    digest.update(f"\0{rel_path}:{state}".encode("utf-8", errors="surrogatepass"))
+                self._fingerprint = digest.hexdigest()
+            return self._fingerprint
+
+    def modified_since(self, timestamp: float) -> List[Path]:
+        """Files whose indexed mtime is newer than the timestamp"""
+        return [
+            self.project_root / entry.path
+            for entry in self.iter_files()
+            if entry.mtime >= timestamp
+        ]
+
+    # Refresh ---------------------------------------------------------------
+    def subscribe(self, listener: Callable[[FileChanges], None]) -> None:
+        """Call `listener` with the paths affected by every change to the index"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Bring the index up to date with the working tree.
+
+        Calls within `min_refresh_interval` of the previous refresh return
+        immediately unless `force` is set (see the class docstring).
+        Returns the number of file entries that were added, changed or removed.
+        """
+        with self._lock:
+            now = time.time()
+            if not force and self.files and now - self._last_refresh < self.min_refresh_interval:
+                return 0
+
+            changed: Dict[str, Optional[IndexedFile]] = {}
+            changed_dirs: Dict[str, Optional[Tuple[float, bool]]] = {}
+
+            head = self.git.head()
+            ignore_signature = self._ignore_signature()
+            full = force or not self.files or ignore_signature != self._meta.get("ignore_signature")
+            if self.watching and not full and (head or "") == self._meta.get("head"):
+                # Watcher events already keep entries current
+                self._last_refresh = now
+                return 0
+            if full:
+                self.ignore_matcher.reset()
+            self._added.clear()
+
+            self._walk(full, changed, changed_dirs)
+
+            if head is not None:
+                previous = self._previous_dirty_paths()
+                self._set_dirty_paths(self._git_dirty_paths())
+                restat_all = previous is None or head != self._meta.get("head")
+                # Files edited back to their committed content drop out of `git status`,
+                # so whatever was dirty last time is re-checked once more
+                targets = self.files.keys() if restat_all else set(previous).union(self._dirty_paths)
+            else:
+                # Outside git there is no cheap delta source; a stat pass still avoids listing
+                self._dirty_paths = None
+                targets = self.files.keys()
+            self._restat(list(targets), changed)
+
+            if not full:
+                self._recheck_ignore_rules(changed, changed_dirs)
+
+            self._meta["head"] = head or ""
+            self._meta["ignore_signature"] = ignore_signature
+            self._last_refresh = now
+            self._finish(changed, changed_dirs)
+            return len(changed)
+
+    def apply_events(self, rel_paths: Iterable[str]) -> int:
+        """
+        Update entries for paths a file watcher reported as created, modified or deleted.
+
+        Each affected directory is re-listed once (which re-stats its files);
+        newly created sub-directories are walked. Returns the number of file
+        entries that changed.
+        """
+        with self._lock:
+            changed: Dict[str, Optional[IndexedFile]] = {}
+            changed_dirs: Dict[str, Optional[Tuple[float, bool]]] = {}
+            self._added.clear()
+
+            for rel_dir in sorted({self._parent(rel_path) for rel_path in rel_paths}):
+                known = self.dirs.get(rel_dir)
+                if known is None or known[1]:
+                    # Unknown directories are picked up when their parent is re-listed
+                    continue
+                abs_dir = self.project_root / rel_dir if rel_dir else self.project_root
+                try:
+                    dir_mtime = abs_dir.stat().st_mtime
+                except OSError:
+                    self._drop_dir(rel_dir, changed, changed_dirs)
+                    continue
+                self.dirs[rel_dir] = (dir_mtime, False)
+                changed_dirs[rel_dir] = self.dirs[rel_dir]
+                descend = self._scan_dir(rel_dir, abs_dir, changed, changed_dirs)
+                new_dirs = [child for child in descend if child not in self.dirs]
+                if new_dirs:
+                    self._walk(True, changed, changed_dirs, roots=new_dirs)
+
+            self._recheck_ignore_rules(changed, changed_dirs)
+            if changed and self._dirty_paths is not None:
+                self._set_dirty_paths(sorted(set(self._dirty_paths).union(changed)))
+            self._finish(changed, changed_dirs)
+            return len(changed)
+
+    def _recheck_ignore_rules(
+        self,
+        changed: Dict[str, Optional[IndexedFile]],
+        changed_dirs: Dict[str, Optional[Tuple[float, bool]]],
+    ) -> None:
+        if any(rel_path.rpartition("/")[2] == ".gitignore" for rel_path in changed):
+            # A nested .gitignore appeared, changed or vanished: recompute ignore flags
+            self.ignore_matcher.reset()
+            self._walk(True, changed, changed_dirs)
+
+    def _finish(
+        self,
+        changed: Dict[str, Optional[IndexedFile]],
+        changed_dirs: Dict[str, Optional[Tuple[float, bool]]],
+    ) -> None:
+        """Persist a batch of changes and tell subscribers about it"""
+        self._fingerprint = None
+        if changed:
+            self.generation += 1
+        self._persist(changed, changed_dirs)
+        if not changed or not self._listeners:
+            return
+
+        changes = FileChanges(
+            added=sorted(path for path, entry in changed.items() if entry is not None and path in self._added),
+            modified=sorted(path for path, entry in changed.items() if entry is not None and path not in self._added),
+            removed=sorted(path for path, entry in changed.items() if entry is None),
+        )
+        for listener in list(self._listeners):
+            try:
+                listener(changes)
+            except Exception:
+                # A failing subscriber must not break indexing
+                pass
+
+    def _walk(
+        self,
+        full: bool,
+        changed: Dict[str, Optional[IndexedFile]],
+        changed_dirs: Dict[str, Optional[Tuple[float, bool]]],
+        roots: Optional[List[str]] = None,
+    ) -> None:
+        """Walk directories, re-listing only those whose mtime moved"""
+        stack = list(roots) if roots else [""]
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = self.project_root / rel_dir if rel_dir else self.project_root
+            try:
+                dir_mtime = abs_dir.stat().st_mtime
+            except OSError:
+                self._drop_dir(rel_dir, changed, changed_dirs)
+                continue
+
+            known = self.dirs.get(rel_dir)
+            if not full and known is not None and known == (dir_mtime, False):
+                stack.extend(
+                    child for child in self._children.get(rel_dir, ())
+                    if not self.dirs.get(child, (0.0, False))[1]
+                )
+                continue
+
+            self.dirs[rel_dir] = (dir_mtime, False)
+            changed_dirs[rel_dir] = self.dirs[rel_dir]
+            stack.extend(self._scan_dir(rel_dir, abs_dir, changed, changed_dirs))
+
+    def _scan_dir(
+        self,
+        rel_dir: str,
+        abs_dir: Path,
+        changed: Dict[str, Optional[IndexedFile]],
+        changed_dirs: Dict[str, Optional[Tuple[float, bool]]],
+    ) -> List[str]:
+        """List one directory, returning the sub-directories to descend into"""
+        seen_files: Set[str] = set()
+        subdirs: Set[str] = set()
+        descend: List[str] = []
+
+        try:
+            entries = list(os.scandir(abs_dir))
+        except OSError:
+            entries = []
+
+        for dir_entry in entries:
+            rel_path = f"{rel_dir}/{dir_entry.name}" if rel_dir else dir_entry.name
+            try:
+                if dir_entry.is_dir(follow_symlinks=False):
+                    if dir_entry.name in DEFAULT_EXCLUDED_DIRS:
+                        continue
+                    subdirs.add(rel_path)
+                    if self.ignore_matcher.is_dir_ignored(rel_path):
+                        # Ignored directories are remembered but never descended into
+                        known = self.dirs.get(rel_path)
+                        if known is None or not known[1]:
+                            self._drop_dir(rel_path, changed, changed_dirs)
+                            self.dirs[rel_path] = (dir_entry.stat(follow_symlinks=False).st_mtime, True)
+                            changed_dirs[rel_path] = self.dirs[rel_path]
+                        continue
+                    descend.append(rel_path)
+                elif dir_entry.is_file():
+                    seen_files.add(rel_path)
+                    stat = dir_entry.stat()
+                    entry = IndexedFile(
+                        path=rel_path,
+                        mtime=stat.st_mtime,
+                        size=stat.st_size,
+                        suffix=Path(dir_entry.name).suffix,
+                        ignored=self.ignore_matcher.is_ignored(rel_path),
+                    )
+                    if self.files.get(rel_path) != entry:
+                        self._add_file(entry)
+                        changed[rel_path] = entry
+            except OSError:
+                continue
+
+        # Forget entries that disappeared from this directory
+        for rel_path in self._dir_files.get(rel_dir, set()) - seen_files:
+            self._remove_file(rel_path)
+            changed[rel_path] = None
+        for rel_path in self._children.get(rel_dir, set()) - subdirs:
+            self._drop_dir(rel_path, changed, changed_dirs)
+
+        self._children[rel_dir] = subdirs
+        return descend
+
+    def _restat(self, rel_paths: List[str], changed: Dict[str, Optional[IndexedFile]]) -> None:
+        """Refresh mtime/size for files that may have been edited in place"""
+        for rel_path in rel_paths:
+            entry = self.files.get(rel_path)
+            if entry is None:
+                continue
+            try:
+                stat = (self.project_root / rel_path).stat()
+            except OSError:
+                self._remove_file(rel_path)
+                changed[rel_path] = None
+                continue
+            if stat.st_mtime != entry.mtime or stat.st_size != entry.size:
+                entry.mtime = stat.st_mtime
+                entry.size = stat.st_size
+                changed[rel_path] = entry
+
+    def _add_file(self, entry: IndexedFile) -> None:
+        if entry.path not in self.files:
+            self._sorted_paths = None
+            self._added.add(entry.path)
+        self.files[entry.path] = entry
+        self._dir_files.setdefault(self._parent(entry.path), set()).add(entry.path)
+
+    def _remove_file(self, rel_path: str) -> None:
+        if self.files.pop(rel_path, None) is not None:
+            self._sorted_paths = None
+        siblings = self._dir_files.get(self._parent(rel_path))
+        if siblings is not None:
+            siblings.discard(rel_path)
+
+    def _drop_dir(
+        self,
+        rel_dir: str,
+        changed: Dict[str, Optional[IndexedFile]],
+        changed_dirs: Dict[str, Optional[Tuple[float, bool]]],
+    ) -> None:
+        """Remove a directory and everything below it"""
+        for child in self._children.pop(rel_dir, set()):
+            self._drop_dir(child, changed, changed_dirs)
+        for rel_path in self._dir_files.pop(rel_dir, set()):
+            if self.files.pop(rel_path, None) is not None:
+                self._sorted_paths = None
+            changed[rel_path] = None
+        if self.dirs.pop(rel_dir, None) is not None:
+            changed_dirs[rel_dir] = None
+
+    @staticmethod
+    def _parent(rel_path: str) -> str:
+        return rel_path.rpartition("/")[0]
+
+    # Git helpers -----------------------------------------------------------
+    def _git_dirty_paths(self) -> List[str]:
+        """Paths reported as modified by `git status` (every file when it can't run)"""
+        paths = self.git.status_paths()
+        return list(self.files) if paths is None else paths
+
+    def _previous_dirty_paths(self) -> Optional[List[str]]:
+        """Dirty paths of the last refresh, from the persisted index after a restart"""
+        if self._dirty_paths is not None:
+            return self._dirty_paths
+        stored = self._meta.get("dirty_paths")
+        if stored is None:
+            return None
+        return [path for path in stored.split("\0") if path]
+
+    def _set_dirty_paths(self, paths: List[str]) -> None:
+        self._dirty_paths = paths
+        self._meta["dirty_paths"] = "\0".join(paths)
+
+    def _ignore_signature(self) -> str:
+        """Signature of ignore sources; a change forces ignore flags to be recomputed"""
+        parts = []
+        for candidate in (self.project_root / ".gitignore", self.project_root / ".git" / "info" / "exclude"):
+            try:
+                stat = candidate.stat()
+                parts.append(f"{candidate.name}:{stat.st_mtime}:{stat.st_size}")
+            except OSError:
+                parts.append(f"{candidate.name}:-")
+        return "|".join(parts)
+
+    # Persistence -----------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _load(self) -> None:
+        """Load the persisted index"""
+        try:
+            conn = self._connect()
+            for path, mtime, size, suffix, ignored in conn.execute(
+                "SELECT path, mtime, size, suffix, ignored FROM files"
+            ):
+                self._add_file(IndexedFile(path, mtime, size, suffix, bool(ignored)))
+            for path, mtime, ignored in conn.execute("SELECT path, mtime, ignored FROM dirs"):
+                self.dirs[path] = (mtime, bool(ignored))
+                if path:
+                    self._children.setdefault(self._parent(path), set()).add(path)
+            self._meta = dict(conn.execute("SELECT key, value FROM meta"))
+        except sqlite3.Error:
+            # Corrupt or unreadable index, rebuild from scratch
+            self.files.clear()
+            self.dirs.clear()
+            self._children.clear()
+            self._dir_files.clear()
+            self._meta = {}
+
+    def _persist(
+        self,
+        changed: Dict[str, Optional[IndexedFile]],
+        changed_dirs: Dict[str, Optional[Tuple[float, bool]]],
+    ) -> None:
+        """Write only the rows that changed during a refresh"""
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, mtime, size, suffix, ignored) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (e.path, e.mtime, e.size, e.suffix, int(e.ignored))
+                        for e in changed.values() if e is not None
+                    ],
+                )
+                conn.executemany(
+                    "DELETE FROM files WHERE path = ?",
+                    [(p,) for p, e in changed.items() if e is None],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO dirs (path, mtime, ignored) VALUES (?, ?, ?)",
+                    [(p, d[0], int(d[1])) for p, d in changed_dirs.items() if d is not None],
+                )
+                conn.executemany(
+                    "DELETE FROM dirs WHERE path = ?",
+                    [(p,) for p, d in changed_dirs.items() if d is None],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    list(self._meta.items()),
+                )
+        except sqlite3.Error:
+            # The in-memory index stays valid even if persisting fails
+            pass
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get index statistics"""
+        with self._lock:
+            entries = list(self.files.values())
+            dir_count = len(self.dirs)
+        ignored = sum(1 for e in entries if e.ignored)
+        return {
+            "indexed_files": len(entries) - ignored,
+            "ignored_files": ignored,
+            "indexed_dirs": dir_count,
+        }
@@ -0,0 +1,148 @@
+"""
+Ignore Matcher - Compiled .gitignore rules with nested file support
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pathspec
+
+
+# Always ignored, whether or not the project has a .gitignore
+DEFAULT_IGNORE_PATTERNS = [
+    ".git/",
+    "__pycache__/",
+    "*.pyc",
+    ".DS_Store",
+    "node_modules/",
+    ".next/",
+    "dist/",
+    "build/",
+]
+
+# (directory the rules are relative to, compiled rules)
+_Rules = Tuple[str, pathspec.PathSpec]
+
+
+class IgnoreMatcher:
+    """
+    Git-style ignore decisions for paths relative to a project root.
+
+    Rules come from the built-in defaults, `.git/info/exclude`, the root
+    `.gitignore` and every nested `.gitignore`, each compiled once and read
+    lazily as directories are reached. As in git, the last matching rule wins
+    (deeper files override shallower ones, `!pattern` re-includes), and
+    nothing below an ignored directory is considered. Directory decisions are
+    memoized, so walkers can prune whole subtrees for the cost of one lookup.
+    """
+
+    _instances: Dict[Path, "IgnoreMatcher"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, project_root: Path):
+        self.project_root = Path(project_root).resolve()
+        self._lock = threading.RLock()
+        self.reset()
+
+    @classmethod
+    def open(cls, project_root: Path) -> "IgnoreMatcher":
+        """Return the process-wide matcher for a project root"""
+        root = Path(project_root).resolve()
+        with cls._instances_lock:
+            matcher = cls._instances.get(root)
+            if matcher is None:
+                matcher = cls(root)
+                cls._instances[root] = matcher
+            return matcher
+
+    def reset(self) -> None:
+        """Drop compiled rules and memoized decisions (after a .gitignore changed)"""
+        with self._lock:
+            self._dir_rules: Dict[str, Optional[pathspec.PathSpec]] = {}
+            self._chains: Dict[str, List[_Rules]] = {}
+            self._dir_decisions: Dict[str, bool] = {"": False}
+            self._base_rules = self._compile(
+                DEFAULT_IGNORE_PATTERNS + self._read_lines(self.project_root / ".git" / "info" / "exclude")
+            )
+
+    @property
+    def has_gitignore(self) -> bool:
+        return (self.project_root / ".gitignore").is_file()
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Whether a POSIX path relative to the project root is ignored"""
+        rel_path = rel_path.strip("/")
+        if not rel_path:
+            return False
+        if is_dir:
+            return self.is_dir_ignored(rel_path)
+        parent = rel_path.rpartition("/")[0]
+        if self.is_dir_ignored(parent):
+            return True
+        return self._decide(parent, rel_path, False)
+
+    def is_dir_ignored(self, rel_dir: str) -> bool:
+        """Memoized decision for a directory (ignored when any ancestor is)"""
+        decision = self._dir_decisions.get(rel_dir)
+        if decision is not None:
+            return decision
+        with self._lock:
+            parent = rel_dir.rpartition("/")[0]
+            decision = self.is_dir_ignored(parent) or self._decide(parent, rel_dir, True)
+            self._dir_decisions[rel_dir] = decision
+            return decision
+
+    def is_path_ignored(self, path: Path) -> bool:
+        """Absolute-path variant; paths outside the project root count as ignored"""
+        try:
+            rel_path = Path(path).relative_to(self.project_root).as_posix()
+        except ValueError:
+            return True
+        return self.is_ignored(rel_path, Path(path).is_dir())
+
+    def _decide(self, parent: str, rel_path: str, is_dir: bool) -> bool:
+        # Later sources are more specific; the last matching rule wins
+        for base, rules in reversed(self._chain(parent)):
+            candidate = rel_path[len(base) + 1:] if base else rel_path
+            if is_dir:
+                candidate += "/"
+            for pattern in reversed(rules.patterns):
+                if pattern.include is not None and pattern.match_file(candidate) is not None:
+                    return pattern.include
+        return False
+
+    def _chain(self, rel_dir: str) -> List[_Rules]:
+        """Rules that apply inside a directory, shallowest first"""
+        chain = self._chains.get(rel_dir)
+        if chain is not None:
+            return chain
+        with self._lock:
+            if rel_dir:
+                chain = list(self._chain(rel_dir.rpartition("/")[0]))
+            else:
+                chain = [("", self._base_rules)]
+            rules = self._rules_for(rel_dir)
+            if rules is not None:
+                chain.append((rel_dir, rules))
+            self._chains[rel_dir] = chain
+            return chain
+
+    def _rules_for(self, rel_dir: str) -> Optional[pathspec.PathSpec]:
+        if rel_dir not in self._dir_rules:
+            directory = self.project_root / rel_dir if rel_dir else self.project_root
+            lines = self._read_lines(directory / ".gitignore")
+            self._dir_rules[rel_dir] = self._compile(lines) if lines else None
+        return self._dir_rules[rel_dir]
+
+    @staticmethod
+    def _compile(lines: List[str]) -> pathspec.PathSpec:
+        return pathspec.PathSpec.from_lines("gitwildmatch", lines)
+
+    @staticmethod
+    def _read_lines(path: Path) -> List[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return []
@@ -0,0 +1,344 @@
+"""
+Import Graph - Persistent module dependency graph over project files
+"""
+
+import ast
+import posixpath
+import re
+import sqlite3
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .file_index import FileIndex
+
+
+_PYTHON_SUFFIXES = {".py", ".pyi"}
+_JS_SUFFIXES = {".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"}
+
+# Extensions tried, in order, when resolving an extension-less JS/TS specifier
+_JS_RESOLVE_SUFFIXES = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs")
+
+_JS_IMPORT_RE = re.compile(
+    r"""(?:\bimport\s*(?:[\w*${}\s,]+?\s*from\s*)?|\bexport\s*[\w*${}\s,]+?\s*from\s*"""
+    r"""|\brequire\s*\(\s*|\bimport\s*\(\s*)(['"])([^'"\n]+)\1"""
+)
+# Fallback for Python sources that don't parse (syntax errors, truncated files)
+_PY_IMPORT_RE = re.compile(
+    r"^[ \t]*(?:from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+\(?([\w., \t*]+)|import[ \t]+([\w., \t]+))",
+    re.MULTILINE,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imports (
+    src TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    PRIMARY KEY (src, spec)
+) WITHOUT ROWID;
+"""
+
+
+def python_import_specs(content: str, rel_path: str) -> List[str]:
+    """
+    Import specifiers of a Python file.
+
+    Absolute imports become `mod:<dotted name>` (resolved against the project's
+    module names later); relative imports become `path:<relative module path>`.
+    `from a import b` yields both `a.b` (b may be a submodule) and `a`.
+    """
+    package = rel_path.rpartition("/")[0]
+    specs: List[str] = []
+
+    def add(module: str, level: int, names: Iterable[str]) -> None:
+        if level:
+            base = package
+            for _ in range(level - 1):
+                base = base.rpartition("/")[0]
+            prefix = "/".join(part for part in [base] + module.split(".") if part)
+            specs.extend(f"path:{prefix}/{name}" if prefix else f"path:{name}" for name in names if name != "*")
+            if prefix:
+                specs.append(f"path:{prefix}")
+        else:
+            specs.extend(f"mod:{module}.{name}" for name in names if name != "*")
+            specs.append(f"mod:{module}")
+
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        tree = None
+
+    if tree is not None:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                specs.extend(f"mod:{alias.name}" for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                add(node.module or "", node.level, [alias.name for alias in node.names])
+    else:
+        for match in _PY_IMPORT_RE.finditer(content):
+            source, names, modules = match.groups()
+            if modules is not None:
+                specs.extend(f"mod:{name.split()[0]}" for name in modules.split(",") if name.strip())
+            else:
+                module = source.lstrip(".")
+                names_list = [name.split()[0] for name in names.replace("(", "").split(",") if name.strip()]
+                add(module, len(source) - len(module), names_list)
+
+    return list(dict.fromkeys(specs))
+
+
+def js_import_specs(content: str, rel_path: str) -> List[str]:
+    """Relative `import`/`export from`/`require`/dynamic `import()` targets of a JS/TS file"""
+    directory = rel_path.rpartition("/")[0]
+    specs = []
+    for match in _JS_IMPORT_RE.finditer(content):
+        target = match.group(2).split("?", 1)[0]
+        if not target.startswith("."):
+            continue  # Packages resolve outside the project
+        resolved = posixpath.normpath(posixpath.join(directory, target))
+        if not resolved.startswith(".."):
+            specs.append(f"js:{resolved}")
+    return list(dict.fromkeys(specs))
+
+
+class ImportGraph:
+    """
+    Which project files import which, stored in SQLite.
+
+    Import specifiers are extracted per file (Python via `ast`, JS/TS via
+    regexes) and re-extracted only when a file's mtime/size in the FileIndex
+    changed. Specifiers are resolved to project files in memory, so adding or
+    removing a module re-links the graph without re-reading any source.
+
+    Absolute Python imports resolve only by full dotted name, counted from
+    the directory above each top-level package (a directory with
+    `__init__.py`) or from a source root; a module outside any package also
+    sees its own directory, as a script would. Stdlib and third-party imports
+    stay unlinked.
+    """
+
+    # Directories whose plain modules are importable by bare name ("" is the project root)
+    SOURCE_ROOTS = ("", "src", "lib")
+
+    _instances: Dict[Path, "ImportGraph"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        project_root: Path,
+        index_dir: Optional[Path] = None,
+        max_file_size: int = 1048576,
+        source_roots: Optional[Iterable[str]] = None,
+    ):
+        self.project_root = Path(project_root).resolve()
+        self.source_roots = set(self.SOURCE_ROOTS if source_roots is None else source_roots)
+        self.index_dir = index_dir or self.project_root / ".super-prompt" / "cache"
+        self.db_path = self.index_dir / "import_graph.db"
+        self.max_file_size = max_file_size
+
+        self._docs: Dict[str, tuple] = {}
+        self._specs: Dict[str, List[str]] = {}
+        self._imports: Dict[str, Set[str]] = {}
+        self._importers: Dict[str, Set[str]] = {}
+        self._synced_generation = -1
+        self._lock = threading.RLock()
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._load()
+
+    @classmethod
+    def open(cls, project_root: Path) -> "ImportGraph":
+        """Return the process-wide import graph for a project root"""
+        root = Path(project_root).resolve()
+        with cls._instances_lock:
+            graph = cls._instances.get(root)
+            if graph is None:
+                graph = cls(root)
+                cls._instances[root] = graph
+            return graph
+
+    def update(self, file_index: FileIndex) -> int:
+        """Re-parse files whose mtime/size changed; returns the number of updated files"""
+        with self._lock:
+            if file_index.generation == self._synced_generation:
+                return 0
+
+            current = {
+                entry.path: entry for entry in file_index.iter_files()
+                if entry.suffix.lower() in _PYTHON_SUFFIXES | _JS_SUFFIXES and entry.size <= self.max_file_size
+            }
+            removed = [path for path in self._docs if path not in current]
+            stale = [
+                entry for path, entry in current.items()
+                if self._docs.get(path) != (entry.mtime, entry.size)
+            ]
+
+            try:
+                with self._conn:
+                    for path in removed:
+                        self._delete_doc(path)
+                    for entry in stale:
+                        self._index_doc(entry.path, entry.mtime, entry.size, entry.suffix.lower())
+            except sqlite3.Error:
+                # The transaction was rolled back; resync the in-memory view
+                self._load()
+                raise
+
+            if removed or stale:
+                self._link()
+            self._synced_generation = file_index.generation
+            return len(removed) + len(stale)
+
+    def imports_of(self, rel_path: str) -> Set[str]:
+        """Project files a file imports"""
+        return set(self._imports.get(rel_path, ()))
+
+    def importers_of(self, rel_path: str) -> Set[str]:
+        """Project files that import a file"""
+        return set(self._importers.get(rel_path, ()))
+
+    def distances(self, seeds: Iterable[str], max_distance: int = 2) -> Dict[str, int]:
+        """
+        Import-graph distance from the nearest seed file, following edges both ways.
+
+        Seeds themselves are at distance 0; files further than `max_distance`
+        are omitted.
+        """
+        with self._lock:
+            distance = {seed: 0 for seed in seeds}
+            queue = deque(distance)
+            while queue:
+                current = queue.popleft()
+                if distance[current] >= max_distance:
+                    continue
+                for neighbor in self._imports.get(current, set()) | self._importers.get(current, set()):
+                    if neighbor not in distance:
+                        distance[neighbor] = distance[current] + 1
+                        queue.append(neighbor)
+            return distance
+
+    def _index_doc(self, rel_path: str, mtime: float, size: int, suffix: str) -> None:
+        """Extract one file's import specifiers and replace its rows"""
+        self._delete_doc(rel_path)
+        try:
+            with open(self.project_root / rel_path, "r", encoding="utf-8", errors="ignore") as f:
+                content = f.read(self.max_file_size)
+        except OSError:
+            return
+
+        if suffix in _PYTHON_SUFFIXES:
+            specs = python_import_specs(content, rel_path)
+        else:
+            specs = js_import_specs(content, rel_path)
+
+        self._conn.execute(
+            "INSERT INTO docs (path, mtime, size) VALUES (?, ?, ?)", (rel_path, mtime, size)
+        )
+        self._conn.executemany(
+            "INSERT INTO imports (src, spec) VALUES (?, ?)", [(rel_path, spec) for spec in specs]
+        )
+        self._docs[rel_path] = (mtime, size)
+        self._specs[rel_path] = specs
+
+    def _delete_doc(self, rel_path: str) -> None:
+        if self._docs.pop(rel_path, None) is None:
+            return
+        self._specs.pop(rel_path, None)
+        self._conn.execute("DELETE FROM imports WHERE src = ?", (rel_path,))
+        self._conn.execute("DELETE FROM docs WHERE path = ?", (rel_path,))
+
+    def _load(self) -> None:
+        self._docs.clear()
+        self._specs.clear()
+        for path, mtime, size in self._conn.execute("SELECT path, mtime, size FROM docs"):
+            self._docs[path] = (mtime, size)
+            self._specs[path] = []
+        for src, spec in self._conn.execute("SELECT src, spec FROM imports"):
+            self._specs.setdefault(src, []).append(spec)
+        self._link()
+
+    def _link(self) -> None:
+        """Resolve every file's specifiers against the current set of files"""
+        paths = set(self._docs)
+
+        package_dirs = {
+            posixpath.dirname(path) for path in paths if posixpath.basename(path) in ("__init__.py", "__init__.pyi")
+        }
+        package_dirs.discard("")
+
+        # Full dotted module names -> files
+        modules: Dict[str, List[str]] = {}
+        for path in paths:
+            stem = posixpath.splitext(posixpath.basename(path))[0]
+            if posixpath.splitext(path)[1] not in _PYTHON_SUFFIXES or "." in stem:
+                continue
+            parts = [] if stem == "__init__" else [stem]
+            directory = posixpath.dirname(path)
+            while directory in package_dirs:
+                parts.append(posixpath.basename(directory))
+                directory = posixpath.dirname(directory)
+            if parts and (directory != posixpath.dirname(path) or directory in self.source_roots):
+                modules.setdefault(".".join(reversed(parts)), []).append(path)
+
+        imports: Dict[str, Set[str]] = {}
+        importers: Dict[str, Set[str]] = {}
+        for src, specs in self._specs.items():
+            targets = set()
+            for spec in specs:
+                target = self._resolve(spec, src, paths, modules, package_dirs)
+                if target is not None and target != src:
+                    targets.add(target)
+            if targets:
+                imports[src] = targets
+                for target in targets:
+                    importers.setdefault(target, set()).add(src)
+        self._imports = imports
+        self._importers = importers
+
+    @staticmethod
+    def _resolve(
+        spec: str, src: str, paths: Set[str], modules: Dict[str, List[str]], package_dirs: Set[str]
+    ) -> Optional[str]:
+        kind, _, target = spec.partition(":")
+        if kind == "mod":
+            candidates = modules.get(target)
+            if not candidates:
+                directory = posixpath.dirname(src)
+                if directory in package_dirs:
+                    return None
+                # A script's own directory is on sys.path, so it can import its siblings
+                return ImportGraph._resolve(
+                    "path:" + posixpath.join(directory, target.replace(".", "/")), src, paths, modules, package_dirs
+                )
+            if len(candidates) == 1:
+                return candidates[0]
+            # Same name in several packages: prefer the one closest to the importer
+            return max(candidates, key=lambda path: (len(posixpath.commonprefix([path, src])), -len(path)))
+        if kind == "path":
+            for candidate in (f"{target}.py", f"{target}/__init__.py", f"{target}.pyi"):
+                if candidate in paths:
+                    return candidate
+            return None
+        if kind == "js":
+            if target in paths:
+                return target
+            for suffix in _JS_RESOLVE_SUFFIXES:
+                if target + suffix in paths:
+                    return target + suffix
+            for suffix in _JS_RESOLVE_SUFFIXES:
+                if f"{target}/index{suffix}" in paths:
+                    return f"{target}/index{suffix}"
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get graph statistics"""
+        return {
+            "import_graph_files": len(self._docs),
+            "import_graph_edges": sum(len(targets) for targets in self._imports.values()),
+        }
@@ -0,0 +1,269 @@
+"""
+Keyword Index - Persistent inverted index over project files
+"""
+
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .file_index import FileIndex
+
+
+_WORD_RE = re.compile(r"\w+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# Files that never carry useful keywords
+_BINARY_SUFFIXES = {
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".webp", ".pdf", ".zip", ".gz", ".tar",
+    ".woff", ".woff2", ".ttf", ".eot", ".so", ".dll", ".dylib", ".exe", ".pyc", ".db",
+    ".sqlite", ".lock", ".bin", ".mp3", ".mp4", ".mov",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+"""
+
+
+def split_identifier(word: str) -> List[str]:
+    """Split an identifier into lowercase terms (`ContextCache_v2` -> contextcache_v2, context, cache, v2)"""
+    terms = [word.lower()]
+    parts = []
+    for piece in word.split("_"):
+        if piece:
+            parts.extend(_CAMEL_RE.findall(piece) or [piece])
+    if len(parts) > 1:
+        terms.extend(part.lower() for part in parts)
+    return terms
+
+
+def tokenize(text: str, min_length: int = 3) -> Counter:
+    """Tokenize text into identifier-split term frequencies"""
+    words = Counter(_WORD_RE.findall(text))
+    terms: Counter = Counter()
+    for word, count in words.items():
+        if word.isdigit():
+            continue
+        for term in split_identifier(word):
+            if len(term) >= min_length and not term.isdigit():
+                terms[term] += count
+    return terms
+
+
+class KeywordIndex:
+    """
+    Inverted index (term -> file, term frequency) stored in SQLite.
+
+    Files are re-tokenized only when their mtime/size in the FileIndex changed,
+    so queries are answered from postings instead of scanning the repository.
+    Results are ranked with Okapi BM25.
+    """
+
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    _instances: Dict[Path, "KeywordIndex"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, project_root: Path, index_dir: Optional[Path] = None, max_file_size: int = 1048576):
+        self.project_root = Path(project_root).resolve()
+        self.index_dir = index_dir or self.project_root / ".super-prompt" / "cache"
+        self.db_path = self.index_dir / "keyword_index.db"
+        self.max_file_size = max_file_size
+
+        self._docs: Dict[str, Tuple[int, float, int]] = {}
+        self._doc_paths: Dict[int, str] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._synced_generation = -1
+        self._lock = threading.RLock()
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._load_docs()
+
+    @classmethod
+    def open(cls, project_root: Path) -> "KeywordIndex":
+        """Return the process-wide keyword index for a project root"""
+        root = Path(project_root).resolve()
+        with cls._instances_lock:
+            index = cls._instances.get(root)
+            if index is None:
+                index = cls(root)
+                cls._instances[root] = index
+            return index
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def update(self, file_index: FileIndex) -> int:
+        """Re-index files whose mtime/size changed; returns the number of updated documents"""
+        with self._lock:
+            if file_index.generation == self._synced_generation:
+                return 0
+
+            current = {
+                entry.path: entry for entry in file_index.iter_files()
+                if entry.suffix.lower() not in _BINARY_SUFFIXES and entry.size <= self.max_file_size
+            }
+            removed = [path for path in self._docs if path not in current]
+            stale = [
+                entry for path, entry in current.items()
+                if self._docs.get(path, (None, None, None))[1:] != (entry.mtime, entry.size)
+            ]
+
+            try:
+                with self._conn:
+                    for path in removed:
+                        self._delete_doc(path)
+                    for entry in stale:
+                        self._index_doc(entry.path, entry.mtime, entry.size)
+            except sqlite3.Error:
+                # The transaction was rolled back; resync the in-memory view
+                self._load_docs()
+                raise
+
+            self._synced_generation = file_index.generation
+            return len(removed) + len(stale)
+
+    def search(self, keywords: Iterable[str], max_files: int = 50) -> List[Tuple[str, float]]:
+        """Rank files containing any of the keywords by BM25 score"""
+        scores = self.bm25_scores(keywords)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:max_files]
+
+    def bm25_scores(self, keywords: Iterable[str], paths: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Okapi BM25 scores for the keywords.
+
+        Args:
+            keywords: Query keywords (expanded with the index tokenizer)
+            paths: Restrict scoring to these relative paths (default: all matching files)
+
+        Returns:
+            Mapping of relative path to score; files without matches are omitted
+        """
+        terms = self.query_terms(keywords)
+        if not terms:
+            return {}
+
+        with self._lock:
+            doc_count = len(self._docs)
+            if not doc_count:
+                return {}
+            avg_length = max(self._total_length / doc_count, 1.0)
+            wanted = None
+            if paths is not None:
+                wanted = {self._docs[p][0] for p in paths if p in self._docs}
+
+            scores: Dict[int, float] = {}
+            for _, term in terms:
+                postings = self._postings(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings:
+                    if wanted is not None and doc_id not in wanted:
+                        continue
+                    length = self._doc_lengths.get(doc_id, avg_length)
+                    norm = self.K1 * (1.0 - self.B + self.B * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1.0) / (tf + norm)
+
+            return {
+                self._doc_paths[doc_id]: score
+                for doc_id, score in scores.items() if doc_id in self._doc_paths
+            }
+
+    @staticmethod
+    def query_terms(keywords: Iterable[str]) -> List[Tuple[str, str]]:
+        """Expand query keywords into (keyword, term) pairs using the index tokenizer"""
+        pairs = []
+        for keyword in keywords:
+            for term in split_identifier(keyword):
+                term = term.lower()
+                if len(term) >= 3 and (keyword, term) not in pairs:
+                    pairs.append((keyword, term))
+        return pairs
+
+    def _postings(self, term: str) -> List[Tuple[int, int]]:
+        """Postings for a term; terms of 4+ chars also match as prefixes (collect -> collector)"""
+        if len(term) >= 4:
+            return self._conn.execute(
+                "SELECT doc_id, SUM(tf) FROM postings WHERE term >= ? AND term < ? GROUP BY doc_id",
+                (term, term + "\uffff"),
+            ).fetchall()
+        return self._conn.execute(
+            "SELECT doc_id, tf FROM postings WHERE term = ?", (term,)
+        ).fetchall()
+
+    def _load_docs(self) -> None:
+        self._docs.clear()
+        self._doc_paths.clear()
+        self._doc_lengths.clear()
+        self._total_length = 0
+        for doc_id, path, mtime, size, length in self._conn.execute(
+            "SELECT id, path, mtime, size, length FROM docs"
+        ):
+            self._docs[path] = (doc_id, mtime, size)
+            self._doc_paths[doc_id] = path
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def _index_doc(self, rel_path: str, mtime: float, size: int) -> None:
+        """Tokenize one file and replace its postings"""
+        self._delete_doc(rel_path)
+        try:
+            with open(self.project_root / rel_path, "rb") as f:
+                raw = f.read(self.max_file_size)
+        except OSError:
+            return
+        if b"\0" in raw[:8192]:
+            terms: Counter = Counter()
+        else:
+            terms = tokenize(raw.decode("utf-8", errors="ignore"))
+
+        length = sum(terms.values())
+        cursor = self._conn.execute(
+            "INSERT INTO docs (path, mtime, size, length) VALUES (?, ?, ?, ?)",
+            (rel_path, mtime, size, length),
+        )
+        doc_id = cursor.lastrowid
+        self._conn.executemany(
+            "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+            [(term, doc_id, tf) for term, tf in terms.items()],
+        )
+        self._docs[rel_path] = (doc_id, mtime, size)
+        self._doc_paths[doc_id] = rel_path
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def _delete_doc(self, rel_path: str) -> None:
+        doc = self._docs.pop(rel_path, None)
+        if doc is None:
+            return
+        self._doc_paths.pop(doc[0], None)
+        self._total_length -= self._doc_lengths.pop(doc[0], 0)
+        self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc[0],))
+        self._conn.execute("DELETE FROM docs WHERE id = ?", (doc[0],))
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get index statistics"""
+        return {"indexed_documents": len(self._docs)}
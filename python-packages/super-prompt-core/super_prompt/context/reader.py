@@ -0,0 +1,166 @@
+"""
+Reader - Memory-mapped, range-limited file reading
+"""
+
+import mmap
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+# Files below this size are read directly; mapping them costs more than it saves
+MMAP_THRESHOLD = 64 * 1024
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+def read_head(file_path: Path, max_bytes: int) -> Tuple[str, bool]:
+    """
+    Decode at most `max_bytes` from the start of a file.
+
+    The cut is moved back to a line (or at least UTF-8 character) boundary,
+    and only the selected range is decoded.
+
+    Returns:
+        (text, truncated)
+    """
+    with open(file_path, "rb") as f:
+        size = _file_size(f)
+        if size <= max_bytes:
+            return f.read().decode("utf-8", errors="ignore"), False
+        if size < MMAP_THRESHOLD:
+            data = f.read(max_bytes + 1)
+            end = _align_end(data, 0, max_bytes)
+            return data[:end].decode("utf-8", errors="ignore"), True
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            end = _align_end(buf, 0, max_bytes)
+            return buf[:end].decode("utf-8", errors="ignore"), True
+
+
+def read_windows(file_path: Path, window_bytes: int, count: int = 3) -> List[str]:
+    """
+    Decode `count` evenly spaced windows (head, middle..., tail) of a file.
+
+    Windows are aligned to line boundaries on the raw buffer, so the file is
+    never decoded as a whole.
+    """
+    with open(file_path, "rb") as f:
+        size = _file_size(f)
+        if size == 0:
+            return [""]
+        if size <= window_bytes * count:
+            return [f.read().decode("utf-8", errors="ignore")]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return [
+                buf[start:end].decode("utf-8", errors="ignore")
+                for start, end in window_ranges(buf, size, window_bytes, count)
+            ]
+
+
+def find_hit_lines(file_path: Path, pattern: "re.Pattern[bytes]") -> Tuple[Dict[int, int], int]:
+    """
+    Matches of a bytes pattern per line over a whole file.
+
+    The file is mapped and searched without decoding it. Returns (hits per
+    zero-based line, line count).
+    """
+    with open(file_path, "rb") as f:
+        if _file_size(f) == 0:
+            return {}, 1
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            hit_lines: Dict[int, int] = {}
+            line = 0
+            position = 0
+            for match in pattern.finditer(buf):
+                line += _count_newlines(buf, position, match.start())
+                position = match.start()
+                hit_lines[line] = hit_lines.get(line, 0) + 1
+            return hit_lines, _count_newlines(buf, 0, len(buf)) + 1
+
+
+def read_line_ranges(file_path: Path, ranges: Iterable[Tuple[int, int]]) -> List[str]:
+    """
+    Decode line ranges `[start, end)` (zero-based, ascending) of a file.
+
+    The mapped buffer is walked once from the top; only the requested lines
+    are decoded.
+    """
+    texts = []
+    with open(file_path, "rb") as f:
+        size = _file_size(f)
+        if size == 0:
+            return ["" for _ in ranges]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            line = 0
+            offset = 0
+            for start, end in ranges:
+                offset, _ = _skip_lines(buf, offset, start - line, size)
+                range_end, complete = _skip_lines(buf, offset, end - start, size)
+                line = end
+                # A complete range ends after its last line's newline; drop it like str.split would
+                text_end = range_end - 1 if complete and range_end > offset else range_end
+                texts.append(buf[offset:text_end].decode("utf-8", errors="ignore"))
+                offset = range_end
+    return texts
+
+
+def window_ranges(buf: Buffer, size: int, window_bytes: int, count: int = 3) -> List[Tuple[int, int]]:
+    """Byte ranges for evenly spaced, line-aligned windows over a buffer"""
+    if count < 2:
+        return [(0, _align_end(buf, 0, min(window_bytes, size)))]
+
+    ranges = []
+    step = (size - window_bytes) / (count - 1)
+    for index in range(count):
+        start = int(step * index)
+        if index:
+            start = _align_start(buf, start, size)
+        end = size if index == count - 1 else _align_end(buf, start, start + window_bytes)
+        if end > start:
+            ranges.append((start, end))
+    return ranges
+
+
+def _count_newlines(buf: Buffer, start: int, end: int, block: int = 1048576) -> int:
+    # mmap has no count(); slices are copied a bounded block at a time
+    return sum(buf[offset:min(end, offset + block)].count(b"\n") for offset in range(start, end, block))
+
+
+def _skip_lines(buf: Buffer, offset: int, lines: int, size: int) -> Tuple[int, bool]:
+    """
+    Offset just after the `lines`-th newline from `offset`, and whether that
+    many were found (otherwise the offset is the end of the buffer).
+    """
+    for _ in range(lines):
+        newline = buf.find(b"\n", offset)
+        if newline == -1:
+            return size, False
+        offset = newline + 1
+    return offset, True
+
+
+def _file_size(f) -> int:
+    f.seek(0, 2)
+    size = f.tell()
+    f.seek(0)
+    return size
+
+
+def _align_end(buf: Buffer, start: int, end: int) -> int:
+    """Move `end` back to just after a newline, or at least off a UTF-8 continuation byte"""
+    end = min(end, len(buf))
+    newline = buf.rfind(b"\n", start + (end - start) // 2, end)
+    if newline != -1:
+        return newline + 1
+    while end > start and end < len(buf) and (buf[end] & 0xC0) == 0x80:
+        end -= 1
+    return end
+
+
+def _align_start(buf: Buffer, start: int, size: int) -> int:
+    """Move `start` forward to the beginning of the next line when one is near"""
+    newline = buf.find(b"\n", start, min(size, start + 512))
+    if newline != -1:
+        return newline + 1
+    while start < size and (buf[start] & 0xC0) == 0x80:
+        start += 1
+    return start
@@ -0,0 +1,190 @@
+"""
+Summarizer - Structure-aware outlines for files cut at the budget edge
+"""
+
+import ast
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .blob_store import BlobStore
+from .tokenizer import Tokenizer
+
+# (line number, outline text)
+OutlineEntry = Tuple[int, str]
+
+OUTLINE_MARKER = "[...outline of the rest; bodies omitted...]"
+MAX_OUTLINE_LINE = 200
+# Outlines are cached per content digest; only the most recent ones are kept
+OUTLINE_CACHE_SIZE = 256
+
+_JS_PATTERN = re.compile(
+    r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:declare[ \t]+)?(?:abstract[ \t]+)?(?:async[ \t]+)?"
+    r"(?:function\b|class\b|interface\b|enum\b|type[ \t]+\w+[ \t]*=|namespace\b"
+    r"|(?:const|let|var)[ \t]+\w+[ \t]*=[ \t]*(?:async[ \t]*)?(?:function\b|\([^)\n]*\)[ \t]*=>|\w+[ \t]*=>))"
+    r"|^[ \t]+(?:(?:public|private|protected|static|async|get|set|readonly)[ \t]+)*"
+    r"(?!(?:if|for|while|switch|catch|return|function)\b)\w+[ \t]*\([^)\n]*\)[ \t]*(?::[^{\n]+)?\{",
+    re.MULTILINE,
+)
+_C_FAMILY_PATTERN = re.compile(
+    r"^[ \t]*(?:(?:public|private|protected|internal|static|final|abstract|sealed|override|virtual"
+    r"|async|open|data|suspend|inline|export|template<[^>\n]*>)[ \t]+)*"
+    r"(?:class|interface|enum|struct|record|object|fun|namespace)\b"
+    r"|^[ \t]*(?:(?:public|private|protected|internal|static|final|abstract|override|virtual|async"
+    r"|synchronized|inline|const|unsigned)[ \t]+)*"
+    r"(?!(?:if|for|while|switch|catch|return|else|new|delete)\b)[\w<>\[\]:*&,][\w<>\[\]:*&, ]*?[ \t*&]\w+[ \t]*\([^;{\n]*\)"
+    r"[^;\n]*\{?[ \t]*$",
+    re.MULTILINE,
+)
+
+_OUTLINE_PATTERNS = {
+    ".py": re.compile(r"^[ \t]*(?:async[ \t]+def|def|class)[ \t]+\w+", re.MULTILINE),
+    ".go": re.compile(r"^(?:func|type[ \t]+\w+[ \t]+(?:struct|interface))\b", re.MULTILINE),
+    ".rs": re.compile(
+        r"^[ \t]*(?:pub(?:\([\w:]+\))?[ \t]+)?(?:async[ \t]+)?(?:unsafe[ \t]+)?"
+        r"(?:fn|struct|enum|trait|impl|mod|type)\b",
+        re.MULTILINE,
+    ),
+    ".rb": re.compile(r"^[ \t]*(?:def|class|module)[ \t]+", re.MULTILINE),
+    ".sh": re.compile(r"^[ \t]*(?:function[ \t]+)?[\w-]+[ \t]*\(\)[ \t]*\{", re.MULTILINE),
+    ".md": re.compile(r"^#{1,6}[ \t]+\S", re.MULTILINE),
+}
+for _suffix in (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"):
+    _OUTLINE_PATTERNS[_suffix] = _JS_PATTERN
+for _suffix in (".java", ".kt", ".kts", ".cs", ".c", ".h", ".cc", ".cpp", ".hpp", ".swift", ".scala"):
+    _OUTLINE_PATTERNS[_suffix] = _C_FAMILY_PATTERN
+for _suffix, _alias in ((".bash", ".sh"), (".zsh", ".sh"), (".mdx", ".md"), (".pyi", ".py")):
+    _OUTLINE_PATTERNS[_suffix] = _OUTLINE_PATTERNS[_alias]
+
+_cache: "OrderedDict[Tuple[str, str], List[OutlineEntry]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def outline(content: str, suffix: str) -> List[OutlineEntry]:
+    """
+    Signatures, class/function headers and first docstring lines of a file.
+
+    Python is parsed with `ast` (falling back to regexes when the source does
+    not parse, e.g. a truncated head); other languages use regex outlines.
+    Results are cached per content digest.
+    """
+    suffix = suffix.lower()
+    key = (BlobStore.digest(content), suffix)
+    with _cache_lock:
+        entries = _cache.get(key)
+        if entries is not None:
+            _cache.move_to_end(key)
+            return entries
+
+    entries = None
+    if suffix in (".py", ".pyi"):
+        entries = _python_outline(content)
+    if entries is None:
+        pattern = _OUTLINE_PATTERNS.get(suffix)
+        entries = _regex_outline(content, pattern) if pattern else []
+
+    with _cache_lock:
+        _cache[key] = entries
+        while len(_cache) > OUTLINE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return entries
+
+
+def summarize(content: str, max_tokens: int, suffix: str) -> Optional[str]:
+    """
+    Fit a file into `max_tokens` as its head followed by an outline of the rest.
+
+    The outline is reserved first; leftover budget goes to the beginning of the
+    file, and outline entries the head already shows are dropped. Returns None
+    when no outline is available for the file type.
+    """
+    entries = outline(content, suffix)
+    if not entries:
+        return None
+
+    marker_tokens = Tokenizer.estimate_tokens(OUTLINE_MARKER) + 1
+    costs = Tokenizer.count_tokens_many(text for _, text in entries)
+    budget = max_tokens - marker_tokens
+
+    # Keep as much of the outline as fits, in file order
+    kept = []
+    for entry, cost in zip(entries, costs):
+        if cost + 1 > budget:
+            break
+        kept.append(entry)
+        budget -= cost + 1
+
+    head = ""
+    if len(kept) == len(entries) and budget > 0:
+        head = Tokenizer.truncate_to_tokens(content, budget)
+        if len(head) < len(content):
+            head = head[:head.rfind("\n") + 1]
+        head_lines = head.count("\n")
+        kept = [(line, text) for line, text in kept if line > head_lines]
+
+    parts = [head.rstrip("\n")] if head else []
+    if kept:
+        parts.append(OUTLINE_MARKER)
+        parts.extend(text for _, text in kept)
+    return "\n".join(parts)
+
+
+def _python_outline(content: str) -> Optional[List[OutlineEntry]]:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines = content.splitlines()
+    entries: List[OutlineEntry] = []
+
+    docstring = ast.get_docstring(tree)
+    if docstring and tree.body:
+        entries.append((tree.body[0].lineno, _docstring_line(docstring, "")))
+
+    def visit(nodes) -> None:
+        for node in nodes:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            start = min([decorator.lineno for decorator in node.decorator_list] + [node.lineno])
+            first_stmt = node.body[0]
+            header_end = max(node.lineno, first_stmt.lineno - 1)
+            header = "\n".join(_clip(line.rstrip()) for line in lines[start - 1:header_end] if line.strip())
+            entries.append((start, header))
+
+            docstring = ast.get_docstring(node)
+            if docstring:
+                indent = " " * first_stmt.col_offset
+                entries.append((first_stmt.lineno, _docstring_line(docstring, indent)))
+            if isinstance(node, ast.ClassDef):
+                visit(node.body)
+
+    visit(tree.body)
+    return entries
+
+
+def _regex_outline(content: str, pattern: re.Pattern) -> List[OutlineEntry]:
+    entries: List[OutlineEntry] = []
+    line = 1
+    position = 0
+    last_line = 0
+    for match in pattern.finditer(content):
+        start = content.rfind("\n", 0, match.start()) + 1
+        line += content.count("\n", position, start)
+        position = start
+        if line == last_line:
+            continue
+        end = content.find("\n", start)
+        entries.append((line, _clip(content[start:end if end != -1 else len(content)].rstrip())))
+        last_line = line
+    return entries
+
+
+def _docstring_line(docstring: str, indent: str) -> str:
+    first = docstring.strip().splitlines()[0] if docstring.strip() else ""
+    return _clip(f'{indent}"""{first}"""')
+
+
+def _clip(line: str) -> str:
+    return line if len(line) <= MAX_OUTLINE_LINE else line[:MAX_OUTLINE_LINE] + " ..."
@@ -2,38 +2,343 @@
 Tokenizer - Token counting and estimation utilities
 """
 
+import base64
+import os
 import re
-from typing import List, Dict, Any
+import threading
+from collections import Counter
+from bisect import bisect_right
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
+
+try:  # Exact BPE counts; falls back to a character estimate without `tiktoken`
+    import tiktoken
+except ImportError:  # pragma: no cover - depends on the environment
+    tiktoken = None
+
+
+# cl100k_base rank file shipped with the package, so counting works offline
+PACKAGED_VOCAB = Path(__file__).parent / "vocab" / "cl100k_base.tiktoken"
+
+
+# Pre-tokenization pattern of the cl100k family of BPE vocabularies
+_BPE_PATTERN = r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+
+# Approximation of the same pre-tokenization with the stdlib `re` module
+_PIECE_RE = re.compile(
+    r"'(?:[sdmt]|ll|ve|re)"
+    r"| ?[^\W\d_]+"
+    r"|\d{1,3}"
+    r"| ?(?:[^\s\w]|_)+"
+    r"|\s*\n+"
+    r"|\s+(?!\S)"
+    r"|\s+"
+)
+
+_CODE_INDICATOR_RE = re.compile(
+    r"def |class |import |function|const |let |var |if |for |while "
+    r"|<html|<\?php|#include|public |private |protected ",
+    re.IGNORECASE,
+)
+
+
+def _is_code(text: str) -> bool:
+    """Detect if text appears to be code (one scan, stops at the third distinct indicator)"""
+    if "{" in text or "}" in text:
+        return True
+    seen = set()
+    for match in _CODE_INDICATOR_RE.finditer(text):
+        seen.add(match.group().lower())
+        if len(seen) > 2:
+            return True
+    return False
+
+
+def _strip_line_ending(line: str) -> str:
+    if line.endswith("\r\n"):
+        return line[:-2]
+    return line[:-1] if line.endswith(("\n", "\r")) else line
+
+
+class CharEstimateBackend:
+    """
+    Rough estimate from character counts.
+
+    ASCII costs one token per four characters (20% more when the text looks
+    like code); other text costs one token per three UTF-8 bytes (about one
+    per CJK character), so non-English text isn't undercounted. Costs little
+    more than `len()`; used when `tiktoken` isn't installed.
+    """
+
+    name = "estimate"
+
+    # Average characters per token for English text and code
+    CHARS_PER_TOKEN = 4
+    # Average UTF-8 bytes per token for non-ASCII text
+    BYTES_PER_TOKEN = 3
+    # Code splits into more tokens than prose
+    CODE_FACTOR = 1.2
+    # Costs are summed in 1/60 token units, where a character of prose (15),
+    # a character of code (18) and a non-ASCII byte (20) are whole numbers
+    UNITS_PER_TOKEN = 60
+    # line_costs() reports units, so chunking scales its budget by this
+    line_cost_scale = UNITS_PER_TOKEN
+
+    def _weights(self, code: bool) -> Tuple[int, int]:
+        """Units per ASCII character and per UTF-8 byte of other characters"""
+        ascii_weight = self.UNITS_PER_TOKEN // self.CHARS_PER_TOKEN
+        if code:
+            ascii_weight = round(ascii_weight * self.CODE_FACTOR)
+        return ascii_weight, self.UNITS_PER_TOKEN // self.BYTES_PER_TOKEN
+
+    @staticmethod
+    def _units(text: str, weights: Tuple[int, int]) -> int:
+        """Unrounded cost of text in units"""
+        ascii_weight, byte_weight = weights
+        if text.isascii():
+            return len(text) * ascii_weight
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        return ascii_chars * ascii_weight + (len(text.encode("utf-8")) - ascii_chars) * byte_weight
+
+    def count(self, text: str) -> int:
+        return -(-self._units(text, self._weights(_is_code(text))) // self.UNITS_PER_TOKEN)
+
+    def count_many(self, texts: Iterable[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+    def line_costs(self, text: str) -> List[int]:
+        # Classified once for the whole text; costs are unrounded units, so they
+        # add up to exactly what count() rounds for the whole text
+        weights = self._weights(_is_code(text))
+        newline = weights[0]
+        units = self._units
+        costs = [units(line, weights) + newline for line in text.split("\n")]
+        # The last line has no newline
+        costs[-1] -= newline
+        return costs
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        end = min(len(text), max_tokens * self.CHARS_PER_TOKEN)
+        while end and self.count(text[:end]) > max_tokens:
+            # Non-ASCII text costs more per character; shrink in proportion
+            end = min(end - 1, end * max_tokens // self.count(text[:end]))
+        return text[:end]
+
+
+class HeuristicBackend:
+    """
+    BPE-shaped estimate without a vocabulary.
+
+    Text is split the way BPE pre-tokenizes it (words, digit groups,
+    punctuation runs, whitespace), then each piece is costed: short words
+    are one token, long identifiers split every few characters, non-ASCII
+    text costs roughly one token per three UTF-8 bytes.
+    """
+
+    name = "heuristic"
+    line_cost_scale = 1
+
+    # Source text repeats a small vocabulary of pieces; remember their costs
+    _MAX_CACHED_PIECES = 65536
+
+    def __init__(self):
+        self._costs: Dict[str, int] = {}
+
+    def _cost(self, piece: str) -> int:
+        cost = self._costs.get(piece)
+        if cost is None:
+            if len(self._costs) >= self._MAX_CACHED_PIECES:
+                self._costs = {}
+            cost = self._costs[piece] = self._piece_cost(piece)
+        return cost
+
+    @staticmethod
+    def _piece_cost(piece: str) -> int:
+        if not piece.isascii():
+            if piece.isspace():
+                return 1
+            return max(1, (len(piece.encode("utf-8")) + 2) // 3)
+        first = piece[1:2] if piece[0] == " " else piece[:1]
+        if first.isalpha():
+            length = len(piece) - (piece[0] == " ")
+            return 1 if length <= 8 else 1 + (length - 4) // 5
+        if first.isdigit() or first.isspace() or not first:
+            return 1
+        return (len(piece.strip()) + 1) // 2 or 1
+
+    def count(self, text: str) -> int:
+        # Cost each distinct piece once
+        cost = self._cost
+        return sum(cost(piece) * repeats for piece, repeats in Counter(_PIECE_RE.findall(text)).items())
+
+    def count_many(self, texts: Iterable[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+    def line_costs(self, text: str) -> List[int]:
+        """Per-line token costs from a single pass (pieces count toward the line they start on)"""
+        costs = [0] * (text.count("\n") + 1)
+        cost = self._cost
+        line = 0
+        for piece in _PIECE_RE.findall(text):
+            costs[line] += cost(piece)
+            if "\n" in piece:
+                # Newlines only occur in whitespace pieces, which end the line they start on
+                line += piece.count("\n")
+        return costs
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        used = 0
+        cost = self._cost
+        for match in _PIECE_RE.finditer(text):
+            used += cost(match.group())
+            if used > max_tokens:
+                return text[:match.start()]
+        return text
+
+
+class TiktokenBackend:
+    """Exact counts from a locally loaded BPE vocabulary via `tiktoken`"""
+
+    name = "tiktoken"
+    line_cost_scale = 1
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+
+    @classmethod
+    def from_name(cls, encoding_name: str = "cl100k_base") -> "TiktokenBackend":
+        """Use one of tiktoken's named encodings (downloaded and cached by tiktoken)"""
+        return cls(tiktoken.get_encoding(encoding_name))
+
+    @classmethod
+    def from_vocab(cls, vocab_path: Path) -> "TiktokenBackend":
+        """Build an encoding from a `.tiktoken` rank file without network access"""
+        encoding = tiktoken.Encoding(
+            name=Path(vocab_path).stem,
+            pat_str=_BPE_PATTERN,
+            mergeable_ranks=_load_ranks(Path(vocab_path)),
+            special_tokens={},
+        )
+        return cls(encoding)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def count_many(self, texts: Iterable[str]) -> List[int]:
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(list(texts))]
+
+    def line_costs(self, text: str) -> List[int]:
+        # Lines keep their newline so its tokens are paid for; split on "\n" only
+        # so costs line up with the chunker's line starts
+        lines = text.split("\n")
+        return self.count_many([line + "\n" for line in lines[:-1]] + lines[-1:])
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self.encoding.encode_ordinary(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens], errors="ignore")
+
+
+def _load_ranks(vocab_path: Path) -> Dict[bytes, int]:
+    """Parse a `.tiktoken` rank file (base64 token and rank per line)"""
+    ranks = {}
+    with open(vocab_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                token, rank = line.split()
+                ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _create_backend():
+    """
+    Pick a backend from the environment.
+
+    SUPER_PROMPT_TOKENIZER: auto (default), tiktoken, heuristic or estimate
+    SUPER_PROMPT_TOKENIZER_VOCAB: path to a `.tiktoken` rank file
+
+    `auto` and `tiktoken` count with the configured vocabulary, or the
+    packaged cl100k_base one, and never touch the network; only `tiktoken`
+    with neither available lets tiktoken fetch and cache cl100k_base.
+    Without tiktoken counts fall back to the character-count estimate.
+    """
+    choice = os.environ.get("SUPER_PROMPT_TOKENIZER", "auto").strip().lower()
+    if choice == "heuristic":
+        return HeuristicBackend()
+    if choice in ("auto", "tiktoken") and tiktoken is not None:
+        configured = os.environ.get("SUPER_PROMPT_TOKENIZER_VOCAB")
+        vocab_path = Path(configured).expanduser() if configured else PACKAGED_VOCAB
+        try:
+            if vocab_path.is_file():
+                return TiktokenBackend.from_vocab(vocab_path)
+            if choice == "tiktoken":
+                return TiktokenBackend.from_name()
+        except Exception:
+            # Silent error handling for clean MCP operation
+            pass
+    return CharEstimateBackend()
+
+
+def get_backend():
+    """Return the process-wide token counting backend"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend()
+    return _backend
+
+
+def set_backend(backend: Optional[Any]) -> None:
+    """Install a token counting backend (None re-detects from the environment)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
 
 
 class Tokenizer:
     """
     Token counting and estimation utilities.
-    Provides rough token estimation for LLM context budgeting.
+
+    All context budgeting goes through `estimate_tokens` / `count_tokens_many`,
+    which delegate to the active backend (BPE with the packaged cl100k_base
+    vocabulary, or a character-count estimate without `tiktoken`).
     """
 
-    # Rough estimation: 1 token ≈ 4 characters for English text
+    # Average characters per token; only used to size reads before counting
     CHARS_PER_TOKEN = 4
 
     @staticmethod
     def estimate_tokens(text: str) -> int:
-        """Estimate token count for a text string"""
+        """Count tokens for a text string"""
         if not text:
             return 0
+        return max(1, get_backend().count(text))
 
-        # Basic estimation: characters / 4
-        char_count = len(text)
-        estimated_tokens = char_count // Tokenizer.CHARS_PER_TOKEN
-
-        # Adjust for code (more tokens per character)
-        if Tokenizer._is_code(text):
-            estimated_tokens = int(estimated_tokens * 1.2)
+    @staticmethod
+    def count_tokens_many(texts: Iterable[str]) -> List[int]:
+        """Count tokens for many texts in one batched call"""
+        texts = list(texts)
+        if not texts:
+            return []
+        return [max(1, count) if text else 0 for text, count in zip(texts, get_backend().count_many(texts))]
 
-        # Adjust for non-English text
-        if Tokenizer._has_non_english(text):
-            estimated_tokens = int(estimated_tokens * 1.5)
+    @staticmethod
+    def truncate_to_tokens(text: str, max_tokens: int) -> str:
+        """Cut text so it fits within `max_tokens`"""
+        if max_tokens <= 0:
+            return ""
+        return get_backend().truncate(text, max_tokens)
 
-        return max(1, estimated_tokens)
+    @staticmethod
+    def backend_name() -> str:
+        return get_backend().name
 
     @staticmethod
     def count_words(text: str) -> int:
@@ -42,71 +347,90 @@ class Tokenizer:
 
     @staticmethod
     def split_into_chunks(text: str, max_tokens: int) -> List[str]:
-        """Split text into chunks that fit within token limit"""
-        if Tokenizer.estimate_tokens(text) <= max_tokens:
-            return [text]
+        """Split text on line boundaries into chunks that fit within token limit"""
+        return list(Tokenizer.iter_chunks(text, max_tokens))
+
+    @staticmethod
+    def iter_chunks(source: Union[str, Path], max_tokens: int) -> Iterator[str]:
+        """
+        Lazily yield line-aligned chunks that fit within token limit.
 
-        chunks = []
-        lines = text.split('\n')
-        current_chunk = []
-        current_tokens = 0
+        Args:
+            source: Text to chunk, or a file path to stream from
+            max_tokens: Token limit per chunk (a single longer line becomes its own chunk)
+        """
+        if isinstance(source, str):
+            return Tokenizer._iter_text_chunks(source, max_tokens)
+        return Tokenizer._iter_file_chunks(Path(source), max_tokens)
 
-        for line in lines:
-            line_tokens = Tokenizer.estimate_tokens(line)
+    @staticmethod
+    def _iter_text_chunks(text: str, max_tokens: int) -> Iterator[str]:
+        backend = get_backend()
+        # prefix[i] is the cost of lines [0, i), so any line range costs O(1)
+        prefix = list(accumulate(backend.line_costs(text), initial=0))
+        budget = max_tokens * backend.line_cost_scale
+        if prefix[-1] <= budget:
+            yield text
+            return
 
-            if current_tokens + line_tokens > max_tokens and current_chunk:
-                # Save current chunk and start new one
-                chunks.append('\n'.join(current_chunk))
-                current_chunk = [line]
-                current_tokens = line_tokens
-            else:
-                current_chunk.append(line)
-                current_tokens += line_tokens
+        line_starts = [0]
+        line_starts.extend(match.end() for match in re.finditer('\n', text))
+        line_count = len(line_starts)
 
-        if current_chunk:
-            chunks.append('\n'.join(current_chunk))
+        start = 0
+        while start < line_count:
+            # Longest run of lines starting at `start` within the budget
+            end = bisect_right(prefix, prefix[start] + budget, start + 1) - 1
+            end = max(end, start + 1)
+            # Chunks exclude the newline that separates them from the next one
+            yield text[line_starts[start]:line_starts[end] - 1] if end < line_count else text[line_starts[start]:]
+            start = end
 
-        return chunks
+    @staticmethod
+    def _iter_file_chunks(file_path: Path, max_tokens: int, batch_lines: int = 1024) -> Iterator[str]:
+        backend = get_backend()
+        chunk: List[str] = []
+        chunk_tokens = 0
+        with open(file_path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+            while True:
+                lines = list(islice(f, batch_lines))
+                if not lines:
+                    break
+                for line, line_tokens in zip(lines, backend.count_many(lines)):
+                    if chunk and chunk_tokens + line_tokens > max_tokens:
+                        # Drop the line ending that separates this chunk from the next
+                        yield _strip_line_ending("".join(chunk))
+                        chunk = []
+                        chunk_tokens = 0
+                    chunk.append(line)
+                    chunk_tokens += line_tokens
+        if chunk:
+            yield "".join(chunk)
 
     @staticmethod
-    def prioritize_chunks(chunks: List[str], max_tokens: int, priorities: List[int] = None) -> List[str]:
-        """Select and prioritize chunks within token budget"""
+    def prioritize_chunks(chunks: Iterable[str], max_tokens: int, priorities: List[int] = None) -> List[str]:
+        """
+        Select chunks by priority within token budget.
+
+        Chunks are costed in one batched call; a chunk that doesn't fit is
+        skipped so smaller, lower-priority chunks can still use the budget.
+        """
+        chunks = list(chunks)
         if not priorities:
             priorities = list(range(len(chunks)))
 
         # Sort by priority (lower number = higher priority)
-        chunk_priority_pairs = list(zip(chunks, priorities))
-        chunk_priority_pairs.sort(key=lambda x: x[1])
+        order = sorted(range(len(chunks)), key=lambda index: priorities[index])
+        chunk_tokens = Tokenizer.count_tokens_many(chunks)
 
         selected_chunks = []
-        total_tokens = 0
-
-        for chunk, priority in chunk_priority_pairs:
-            chunk_tokens = Tokenizer.estimate_tokens(chunk)
-            if total_tokens + chunk_tokens <= max_tokens:
-                selected_chunks.append(chunk)
-                total_tokens += chunk_tokens
-            else:
+        remaining_tokens = max_tokens
+
+        for index in order:
+            if remaining_tokens <= 0:
                 break
+            if chunk_tokens[index] <= remaining_tokens:
+                selected_chunks.append(chunks[index])
+                remaining_tokens -= chunk_tokens[index]
 
         return selected_chunks
-
-    @staticmethod
-    def _is_code(text: str) -> bool:
-        """Detect if text appears to be code"""
-        code_indicators = [
-            'def ', 'class ', 'import ', 'function', 'const ', 'let ', 'var ',
-            'if ', 'for ', 'while ', '<html', '<?php', '#include',
-            'public ', 'private ', 'protected '
-        ]
-
-        text_lower = text.lower()
-        code_matches = sum(1 for indicator in code_indicators if indicator in text_lower)
-
-        return code_matches > 2 or '{' in text or '}' in text
-
-    @staticmethod
-    def _has_non_english(text: str) -> bool:
-        """Check if text contains non-English characters"""
-        # Simple check for non-ASCII characters
-        return any(ord(char) > 127 for char in text)
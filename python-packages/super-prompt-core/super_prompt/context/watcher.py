@@ -0,0 +1,268 @@
+"""
+File Watcher - Live invalidation of the file index and context cache
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from .cache import ContextCache
+from .collector import ContextCollector
+from .file_index import DEFAULT_EXCLUDED_DIRS, FileChanges, FileIndex
+
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal ctypes binding over a non-blocking inotify descriptor"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: Path) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read(self, timeout: float) -> List[tuple]:
+        """(wd, mask, name) events, waiting at most `timeout` seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class FileWatcher:
+    """
+    Keeps a FileIndex current from file system events.
+
+    On Linux, inotify watches every non-ignored directory and batches of
+    events are applied with `FileIndex.apply_events`, so only the touched
+    directories are re-listed. Elsewhere (or when the watch limit is hit) a
+    polling thread runs the index's incremental refresh instead. Either way,
+    index subscribers hear about each change as it happens.
+    """
+
+    # Events arriving within this window are applied as one batch
+    DEBOUNCE_SECONDS = 0.1
+
+    def __init__(self, file_index: FileIndex, poll_interval: float = 2.0, use_inotify: bool = True):
+        self.file_index = file_index
+        self.project_root = file_index.project_root
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend: Optional[str] = None
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching in a daemon thread (no-op when already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.file_index.refresh(force=True)
+
+        self.backend = "polling"
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                self._add_tree("")
+                self.backend = "inotify"
+            except (OSError, AttributeError):
+                # No inotify (non-Linux) or out of watches: fall back to polling
+                self._close_inotify()
+
+        target = self._inotify_loop if self.backend == "inotify" else self._poll_loop
+        self.file_index.watching = self.backend == "inotify"
+        self._thread = threading.Thread(target=target, name="super-prompt-file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching; the index goes back to refreshing on demand"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.file_index.watching = False
+        self._close_inotify()
+
+    def _poll_loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.file_index.refresh()
+            except Exception:
+                # Silent error handling for clean MCP operation
+                pass
+
+    def _inotify_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                events = self._inotify.read(timeout=1.0)
+                if not events:
+                    continue
+                # Collect the rest of a burst (editor saves, checkouts) into one batch
+                while True:
+                    more = self._inotify.read(timeout=self.DEBOUNCE_SECONDS)
+                    if not more:
+                        break
+                    events.extend(more)
+                self._handle_events(events)
+            except Exception:
+                # Silent error handling for clean MCP operation
+                if self._stop.wait(self.poll_interval):
+                    break
+
+    def _handle_events(self, events: List[tuple]) -> None:
+        paths: Set[str] = set()
+        overflow = False
+        for wd, mask, name in events:
+            if mask & _IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            rel_dir = self._watches.get(wd)
+            if rel_dir is None:
+                continue
+            if mask & _IN_IGNORED:
+                # The kernel dropped the watch (directory removed)
+                self._watches.pop(wd, None)
+                continue
+            if not name:
+                continue
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if self._excluded(rel_path):
+                continue
+            paths.add(rel_path)
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                try:
+                    self._add_tree(rel_path)
+                except OSError:
+                    overflow = True
+
+        if overflow:
+            # Events were lost; fall back to one full refresh
+            self.file_index.refresh(force=True)
+        elif paths:
+            self.file_index.apply_events(paths)
+
+    def _add_tree(self, rel_dir: str) -> None:
+        """Watch a directory and its non-ignored sub-directories"""
+        matcher = self.file_index.ignore_matcher
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            abs_dir = self.project_root / current if current else self.project_root
+            try:
+                wd = self._inotify.add_watch(abs_dir)
+            except OSError as exc:
+                if exc.errno in (errno.ENOSPC, errno.EMFILE):
+                    raise
+                continue
+            self._watches[wd] = current
+            try:
+                entries = list(os.scandir(abs_dir))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False) or entry.name in DEFAULT_EXCLUDED_DIRS:
+                    continue
+                child = f"{current}/{entry.name}" if current else entry.name
+                if not matcher.is_dir_ignored(child):
+                    stack.append(child)
+
+    @staticmethod
+    def _excluded(rel_path: str) -> bool:
+        return rel_path.partition("/")[0] in DEFAULT_EXCLUDED_DIRS
+
+    def _close_inotify(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+
+
+_watchers: Dict[Path, FileWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def watch_project(project_root: Path, poll_interval: float = 2.0, use_inotify: bool = True) -> FileWatcher:
+    """
+    Start (once per process) a watcher for a project.
+
+    Changes flow into the shared FileIndex and invalidate the shared
+    ContextCache's cached contents of the affected files. Further consumers
+    can `file_index.subscribe` to the same stream.
+    """
+    root = Path(project_root).resolve()
+    with _watchers_lock:
+        watcher = _watchers.get(root)
+        if watcher is None:
+            file_index = FileIndex.open(root)
+            file_index.subscribe(_cache_invalidator(root, ContextCache.open()))
+            watcher = FileWatcher(file_index, poll_interval=poll_interval, use_inotify=use_inotify)
+            _watchers[root] = watcher
+        watcher.start()
+        return watcher
+
+
+def _cache_invalidator(project_root: Path, cache: ContextCache):
+    def invalidate(changes: FileChanges) -> None:
+        stale = {str(project_root / rel_path) for rel_path in changes.modified + changes.removed}
+        if stale:
+            cache.invalidate_where(lambda key: ContextCollector.file_cache_path(key) in stale)
+
+    return invalidate
@@ -6,6 +6,7 @@
 import os
 import sys
 import sqlite3
+import threading
 import time
 import json
 import traceback
@@ -18,7 +19,17 @@ class SpanManager:
     def __init__(self):
         self.spans: Dict[str, Dict[str, Any]] = {}
         self._span_counter = 0
-        self._init_db()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Tools run on a thread pool: spans, the counter and the connection are shared
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """span 데이터베이스 연결 (처음 사용할 때 열림)"""
+        with self._lock:
+            if self._conn is None:
+                self._init_db()
+            return self._conn
 
     def _init_db(self):
         """메모리 데이터베이스 초기화"""
@@ -27,8 +38,8 @@ class SpanManager:
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
         self.db_path = str(db_path)
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.execute(
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
             """
             CREATE TABLE IF NOT EXISTS spans (
                 id TEXT PRIMARY KEY,
@@ -44,71 +55,75 @@ class SpanManager:
             )
         """
         )
-        self.conn.commit()
+        self._conn.commit()
 
     def start_span(self, meta: Dict[str, Any]) -> str:
         """새로운 span 시작"""
-        span_id = f"span_{self._span_counter}"
-        self._span_counter += 1
-
-        self.spans[span_id] = {
-            "id": span_id,
-            "start_time": time.time(),
-            "meta": meta,
-            "events": [],
-            "status": "active",
-        }
+        with self._lock:
+            span_id = f"span_{self._span_counter}"
+            self._span_counter += 1
+
+            self.spans[span_id] = {
+                "id": span_id,
+                "start_time": time.time(),
+                "meta": meta,
+                "events": [],
+                "status": "active",
+            }
 
         # Silent span start for clean MCP operation
         return span_id
 
     def write_event(self, span_id: str, event: Dict[str, Any]) -> None:
         """span에 이벤트 기록"""
-        if span_id in self.spans:
-            event_with_time = {"timestamp": time.time(), **event}
-            self.spans[span_id]["events"].append(event_with_time)
+        event_with_time = {"timestamp": time.time(), **event}
+        with self._lock:
+            if span_id in self.spans:
+                self.spans[span_id]["events"].append(event_with_time)
             # Silent event recording for clean MCP operation
 
     def end_span(
         self, span_id: str, status: str = "ok", extra: Optional[Dict[str, Any]] = None
     ) -> None:
         """span 종료"""
-        if span_id in self.spans:
-            span = self.spans[span_id]
-            span["end_time"] = time.time()
-            span["duration"] = span["end_time"] - span["start_time"]
-            span["status"] = status
-            if extra:
-                span["extra"] = extra
+        with self._lock:
+            if span_id in self.spans:
+                span = self.spans[span_id]
+                span["end_time"] = time.time()
+                span["duration"] = span["end_time"] - span["start_time"]
+                span["status"] = status
+                if extra:
+                    span["extra"] = extra
 
-            # Silent span end for clean MCP operation
+                # Silent span end for clean MCP operation
 
-            # 데이터베이스에 저장
-            self._save_span_to_db(span)
+                # 데이터베이스에 저장
+                self._save_span_to_db(span)
 
     def _save_span_to_db(self, span: Dict[str, Any]) -> None:
         """span을 데이터베이스에 저장"""
         try:
-            self.conn.execute(
-                """
-                INSERT OR REPLACE INTO spans
-                (id, command_id, user_id, start_time, end_time, duration, status, meta, events, extra)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    span["id"],
-                    span["meta"].get("commandId", ""),
-                    span["meta"].get("userId", ""),
-                    span["start_time"],
-                    span.get("end_time", 0),
-                    span.get("duration", 0),
-                    span.get("status", "unknown"),
-                    json.dumps(span["meta"]),
-                    json.dumps(span["events"]),
-                    json.dumps(span.get("extra", {})),
-                ),
-            )
-            self.conn.commit()
+            with self._lock:
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO spans
+                    (id, command_id, user_id, start_time, end_time, duration, status, meta, events, extra)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (
+                        span["id"],
+                        span["meta"].get("commandId", ""),
+                        span["meta"].get("userId", ""),
+                        span["start_time"],
+                        span.get("end_time", 0),
+                        span.get("duration", 0),
+                        span.get("status", "unknown"),
+                        json.dumps(span["meta"]),
+                        json.dumps(span["events"]),
+                        json.dumps(span.get("extra", {})),
+                    ),
+                )
+                self.conn.commit()
             # Silent span save success for clean MCP operation
         except Exception as e:
             # Silent span save error for clean MCP operation
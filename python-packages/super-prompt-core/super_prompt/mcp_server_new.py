@@ -4,6 +4,7 @@ Super Prompt MCP Server - Simple Version
 This is a simple version of the MCP server that manually registers all tools using @mcp.tool() decorator.
 """
 
+import asyncio
 import json
 import os
 from typing import Optional
@@ -30,7 +31,15 @@ else:
     mcp, _ = create_fallback_mcp()
 
 # Import required modules
-from .personas.tools.system_tools import (
+from .mode_store import get_mode, set_mode
+from .high_mode import is_high_mode_enabled, set_high_mode
+from .tools.registry import ToolRegistry
+from .utils.lazy import lazy_import
+
+# Tool implementations load on first call, so registering tools (and answering
+# `initialize`) doesn't wait for the context collector, persona pipeline, prompt
+# tables or the span database.
+(
     sp_version,
     sp_list_commands,
     list_personas,
@@ -42,17 +51,35 @@ from .personas.tools.system_tools import (
     grok_mode_off,
     gpt_mode_off,
     claude_mode_off,
+) = lazy_import(
+    ".personas.tools.system_tools",
+    "sp_version",
+    "sp_list_commands",
+    "list_personas",
+    "mode_get",
+    "mode_set",
+    "grok_mode_on",
+    "gpt_mode_on",
+    "claude_mode_on",
+    "grok_mode_off",
+    "gpt_mode_off",
+    "claude_mode_off",
+    package=__package__,
+)
+render_sdd_brief, list_sdd_sections = lazy_import(
+    ".sdd.architecture", "render_sdd_brief", "list_sdd_sections", package=__package__
+)
+ContextCollector = lazy_import(".context.collector", "ContextCollector", package=__package__)
+span_manager, progress, memory_span = lazy_import(
+    ".core.memory_manager", "span_manager", "progress", "memory_span", package=__package__
+)
+PersonaPipeline = lazy_import(".personas.pipeline_manager", "PersonaPipeline", package=__package__)
+run_prompt_based_workflow = lazy_import(
+    ".prompts.workflow_executor", "run_prompt_based_workflow", package=__package__
 )
-from .mode_store import get_mode, set_mode
-from .sdd.architecture import render_sdd_brief, list_sdd_sections
-from .context.collector import ContextCollector
-from .core.memory_manager import span_manager, progress, memory_span
-from .personas.pipeline_manager import PersonaPipeline
-from .prompts.workflow_executor import run_prompt_based_workflow
-from .high_mode import is_high_mode_enabled, set_high_mode
 
 # Tool registry for stdio access
-_TOOL_REGISTRY = {}
+_TOOL_REGISTRY = ToolRegistry()
 
 # Context cache for Grok optimization
 _CONTEXT_CACHE = {}
@@ -412,14 +439,15 @@ _TOOL_REGISTRY["sp_sdd_mode_off"] = sp_sdd_mode_off_mcp
 
 # Context Management Protocol Tools
 @mcp.tool()
-def sp_context_collect(query: str, max_tokens: int = 16000) -> str:
-    """Collect relevant context for a given query using Context Management Protocol"""
+async def sp_context_collect(query: str, max_tokens: int = 16000, mode: str = "full") -> str:
+    """Collect relevant context for a given query using Context Management Protocol (mode: full or snippets)"""
     try:
         with memory_span(f"context_collect_{hash(query) % 10000}") as span_id:
             progress.show_progress(f"Collecting context for: {query[:50]}...")
 
-            collector = ContextCollector()
-            context_result = collector.collect_context(query, max_tokens=max_tokens)
+            # The first collector per process loads indexes and the cache from disk
+            collector = await asyncio.to_thread(ContextCollector)
+            context_result = await collector.collect_context_async(query, max_tokens=max_tokens, mode=mode)
 
             span_manager.write_event(
                 span_id,
@@ -513,6 +541,7 @@ def sp_memory_stats() -> str:
 📊 Context Collection Statistics:
 • Cache size: {context_stats.get('cache_size', 0)} entries
 • .gitignore loaded: {context_stats.get('gitignore_loaded', False)}
+• Indexed files: {context_stats.get('indexed_files', 0)}
 
 ✅ Statistics retrieved successfully"""
 
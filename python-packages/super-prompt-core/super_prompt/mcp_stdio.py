@@ -4,24 +4,45 @@
 from __future__ import annotations
 
 import asyncio
+import codecs
+import functools
 import inspect
 import json
+import os
+import re
+import stat
 import sys
-from typing import Any, Dict, Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
 
 from . import __version__ as SUPER_PROMPT_VERSION
+from .tools.registry import ToolRegistry, tool_descriptor
 
 LOG_PREFIX = "-------- MCP:"
 
+# Synchronous tools run in a bounded thread pool (SUPER_PROMPT_TOOL_WORKERS);
+# each tool is also capped on its own so one slow tool cannot take every worker.
+TOOL_WORKERS = 8
+TOOL_CONCURRENCY = 4
+TOOL_CONCURRENCY_LIMITS = {"sp_context_collect": 2}
+
+_WHITESPACE = re.compile(r"\s*")
+
 
 def main() -> None:
     """Start the MCP server using FastMCP when available, fallback otherwise."""
+    # The server lives for the whole IDE session, so let the shared context cache
+    # expire stale entries in the background (set to 0 to disable).
+    os.environ.setdefault("SUPER_PROMPT_CACHE_SWEEP_INTERVAL", "300")
+
     try:
         from .mcp_server_new import _TOOL_REGISTRY, mcp
     except Exception as exc:  # pragma: no cover - import level failure is fatal
         _log_error(f"failed to import MCP server modules: {exc}")
         raise
 
+    _start_file_watcher()
+
     # Try to run the official FastMCP runtime first. When the optional dependency is
     # missing the stub implementation raises a RuntimeError that we can intercept and
     # continue with a lightweight protocol handler instead of exiting abruptly.
@@ -47,36 +68,285 @@ def main() -> None:
     asyncio.run(_run_fallback_stdio(_TOOL_REGISTRY))
 
 
+def _start_file_watcher() -> None:
+    """Keep the file index, context cache and dossier live while the server runs.
+
+    Opt-in via SUPER_PROMPT_WATCH=1 (inotify where available, polling otherwise)
+    or SUPER_PROMPT_WATCH=poll to force polling.
+    """
+    mode = os.environ.get("SUPER_PROMPT_WATCH", "").strip().lower()
+    if mode not in ("1", "true", "on", "yes", "poll"):
+        return
+    try:
+        from .context.watcher import watch_project
+        from .paths import project_data_dir, project_root
+        from .personas.tools.system_tools import dossier_invalidator
+
+        watcher = watch_project(project_root(), use_inotify=mode != "poll")
+        watcher.file_index.subscribe(dossier_invalidator(project_data_dir()))
+        _log_info(f"File watcher started ({watcher.backend})")
+    except Exception as exc:
+        _log_error(f"file watcher unavailable: {exc}")
+
+
 async def _run_fallback_stdio(tool_registry: Dict[str, Any]) -> None:
-    """Minimal MCP stdio server implementation for environments without FastMCP."""
+    """Minimal MCP stdio server implementation for environments without FastMCP.
+
+    A reader task feeds incoming messages to the dispatcher, which handles every
+    message in its own task, so a slow tool call never holds up pings or other
+    calls. Responses are written as they complete.
+    """
+
+    transport = await _PipeTransport.open() or _ThreadedTransport()
+    _log_info(f"Fallback MCP stdio server started ({transport.name} transport)")
+
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+    reader = asyncio.create_task(_read_messages(transport, queue))
+    runner = _ToolRunner(_env_int("SUPER_PROMPT_TOOL_WORKERS", TOOL_WORKERS))
+    pending: Set[asyncio.Task] = set()
+
+    try:
+        while True:
+            message = await queue.get()
+            if message is _END_OF_INPUT:
+                break
+
+            task = asyncio.create_task(_dispatch_message(tool_registry, message, runner, transport))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
 
-    loop = asyncio.get_running_loop()
-    _log_info("Fallback MCP stdio server started")
+        # Input closed: let in-flight calls finish and answer before exiting
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        reader.cancel()
+        runner.shutdown()
+        await transport.close()
 
-    while True:
-        line = await loop.run_in_executor(None, sys.stdin.readline)
-        if not line:
-            break
 
-        line = line.strip()
-        if not line:
-            continue
+# Queue markers: a line that is not valid JSON, and the end of stdin
+_PARSE_ERROR = object()
+_END_OF_INPUT = object()
 
+
+async def _read_messages(transport: Any, queue: "asyncio.Queue[Any]") -> None:
+    """Move decoded messages from the transport into the dispatcher queue."""
+
+    try:
+        async for message in transport.messages():
+            await queue.put(message)
+    except Exception as exc:
+        _log_error(f"stdin read failed: {exc}")
+    finally:
+        await queue.put(_END_OF_INPUT)
+
+
+async def _dispatch_message(
+    tool_registry: Dict[str, Any], message: Any, runner: "_ToolRunner", transport: Any
+) -> None:
+    """Handle and answer one incoming message."""
+
+    if message is _PARSE_ERROR:
+        transport.send(_error_response(None, -32700, "Parse error"))
+        return
+
+    try:
+        response = await _handle_message(tool_registry, message, runner)
+    except Exception as exc:
+        msg_id = message.get("id") if isinstance(message, dict) else None
+        response = _error_response(msg_id, -32603, f"Internal error: {exc}")
+    if response is not None:
+        transport.send(response)
+
+
+class _PipeTransport:
+    """Non-blocking stdin/stdout transport on the event loop's pipe support.
+
+    Input is decoded incrementally: messages may arrive split across reads,
+    several per read, or pretty-printed over multiple lines. Responses sent in
+    the same loop iteration are coalesced into a single pipe write.
+    """
+
+    name = "pipe"
+    READ_CHUNK = 65536
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._outgoing: list[bytes] = []
+        self._flushing: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def open(cls) -> Optional["_PipeTransport"]:
+        """Attach to stdin/stdout; None unless both are pipes or sockets (files, ttys)."""
+
+        try:
+            fds = (sys.stdin.fileno(), sys.stdout.fileno())
+            if not all(_is_pipe_or_socket(fd) for fd in fds):
+                return None
+        except (AttributeError, OSError, ValueError):
+            return None
+
+        loop = asyncio.get_running_loop()
+        # Work on duplicates so closing the transports never closes fds 0 and 1
+        read_transport = None
         try:
-            message = json.loads(line)
-        except json.JSONDecodeError:
-            _write_response(_error_response(None, -32700, "Parse error"))
-            continue
+            sys.stdout.flush()
+            stdin = os.fdopen(os.dup(fds[0]), "rb", buffering=0)
+            stdout = os.fdopen(os.dup(fds[1]), "wb", buffering=0)
+            reader = asyncio.StreamReader()
+            read_transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), stdin
+            )
+            write_transport, protocol = await loop.connect_write_pipe(
+                asyncio.streams.FlowControlMixin, stdout
+            )
+        except (NotImplementedError, ValueError, OSError):
+            # e.g. no pipe support in this event loop; hand the fds back in blocking mode
+            if read_transport is not None:
+                read_transport.close()
+            for fd in fds:
+                os.set_blocking(fd, True)
+            return None
+        return cls(reader, asyncio.StreamWriter(write_transport, protocol, reader, loop))
+
+    async def messages(self) -> AsyncIterator[Any]:
+        while True:
+            message = self._next_message()
+            if message is not None:
+                yield message
+                continue
+            if self._eof:
+                return
+
+            chunk = await self._reader.read(self.READ_CHUNK)
+            self._eof = not chunk
+            self._buffer = self._buffer[self._pos:] + self._text.decode(chunk, final=self._eof)
+            self._pos = 0
+
+    def _next_message(self) -> Any:
+        """Decode the next complete message from the buffer (None: need more input)"""
+        buffer = self._buffer
+        start = _WHITESPACE.match(buffer, self._pos).end()
+        self._pos = start
+        if start == len(buffer):
+            return None
+
+        try:
+            message, end = self._decoder.raw_decode(buffer, start)
+        except json.JSONDecodeError as exc:
+            newline = buffer.find("\n", start)
+            if not self._eof and (newline == -1 or self._incomplete(buffer, exc)):
+                return None
+            # Not JSON: drop the offending line and report it
+            self._pos = newline + 1 if newline != -1 else len(buffer)
+            return _PARSE_ERROR
+
+        self._pos = end
+        return message
+
+    @staticmethod
+    def _incomplete(buffer: str, exc: json.JSONDecodeError) -> bool:
+        """Whether decoding failed only because the message hasn't fully arrived"""
+        if exc.pos >= len(buffer.rstrip()):
+            return True
+        # JSON strings can't hold raw newlines, so an open string without one is just cut off
+        return exc.msg.startswith("Unterminated string") and "\n" not in buffer[exc.pos:]
+
+    def send(self, payload: Any) -> None:
+        self._outgoing.append(_encode(payload) + b"\n")
+        if self._flushing is None:
+            self._flushing = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self) -> None:
+        try:
+            while self._outgoing:
+                # Let responses completing in this loop iteration join the write
+                await asyncio.sleep(0)
+                data = b"".join(self._outgoing)
+                self._outgoing.clear()
+                self._writer.write(data)
+                await self._writer.drain()
+        except (ConnectionError, OSError) as exc:
+            self._outgoing.clear()
+            _log_error(f"stdout write failed: {exc}")
+        finally:
+            self._flushing = None
+
+    async def close(self) -> None:
+        if self._flushing is not None:
+            await self._flushing
+        self._writer.close()
+
+
+class _ThreadedTransport:
+    """Blocking stdin/stdout transport for when pipes can't join the event loop."""
+
+    name = "threaded"
+
+    async def messages(self) -> AsyncIterator[Any]:
+        loop = asyncio.get_running_loop()
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                return
+
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield _PARSE_ERROR
+
+    def send(self, payload: Any) -> None:
+        _write_response(payload)
+
+    async def close(self) -> None:
+        return None
 
-        response = await _handle_message(tool_registry, message)
-        if response is not None:
-            _write_response(response)
+
+class _ToolRunner:
+    """Runs tool calls off the event loop with a shared pool and per-tool limits."""
+
+    def __init__(self, max_workers: int = TOOL_WORKERS) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="super-prompt-tool")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def run(self, tool_name: str, tool_func: Any, arguments: Dict[str, Any]) -> Any:
+        semaphore = self._semaphores.get(tool_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(TOOL_CONCURRENCY_LIMITS.get(tool_name, TOOL_CONCURRENCY))
+            self._semaphores[tool_name] = semaphore
+
+        async with semaphore:
+            if inspect.iscoroutinefunction(tool_func):
+                return await tool_func(**arguments)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, functools.partial(tool_func, **arguments))
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
 
 async def _handle_message(
-    tool_registry: Dict[str, Any], message: Dict[str, Any]
-) -> Optional[Dict[str, Any]]:
-    """Dispatch incoming MCP messages for the fallback server."""
+    tool_registry: Dict[str, Any], message: Any, runner: Optional["_ToolRunner"] = None
+) -> Optional[Any]:
+    """Dispatch incoming MCP messages (single or JSON-RPC batch) for the fallback server."""
+
+    if isinstance(message, list):
+        return await _handle_batch(tool_registry, message, runner)
+    if not isinstance(message, dict):
+        return _error_response(None, -32600, "Invalid Request")
 
     method = message.get("method")
     msg_id = message.get("id")
@@ -90,9 +360,9 @@ async def _handle_message(
     if method == "ping":
         return {"jsonrpc": "2.0", "id": msg_id, "result": {}}
     if method == "tools/list":
-        return {"jsonrpc": "2.0", "id": msg_id, "result": {"tools": _list_tools(tool_registry)}}
+        return _list_tools_response(tool_registry, msg_id)
     if method == "tools/call":
-        return await _call_tool(tool_registry, message, msg_id)
+        return await _call_tool(tool_registry, message, msg_id, runner)
     if method == "prompts/list":
         return {"jsonrpc": "2.0", "id": msg_id, "result": {"prompts": []}}
     if method == "prompts/get":
@@ -101,6 +371,26 @@ async def _handle_message(
     return _error_response(msg_id, -32601, f"Method '{method}' not implemented")
 
 
+async def _handle_batch(
+    tool_registry: Dict[str, Any], batch: list, runner: Optional["_ToolRunner"]
+) -> Optional[Any]:
+    """Run a JSON-RPC batch concurrently and answer with one array (None if all were notifications)."""
+
+    if not batch:
+        return _error_response(None, -32600, "Invalid Request")
+
+    async def handle(item: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(item, dict):
+            return _error_response(None, -32600, "Invalid Request")
+        try:
+            return await _handle_message(tool_registry, item, runner)
+        except Exception as exc:
+            return _error_response(item.get("id"), -32603, f"Internal error: {exc}")
+
+    responses = await asyncio.gather(*(handle(item) for item in batch))
+    return [response for response in responses if response is not None] or None
+
+
 def _initialize_response(msg_id: Any) -> Dict[str, Any]:
     """Return a minimal initialize response compliant with the MCP spec."""
 
@@ -121,25 +411,27 @@ def _initialize_response(msg_id: Any) -> Dict[str, Any]:
     }
 
 
+def _list_tools_response(tool_registry: Dict[str, Any], msg_id: Any) -> Any:
+    """tools/list response; a ToolRegistry supplies its pre-serialized result."""
+
+    if isinstance(tool_registry, ToolRegistry):
+        return (
+            b'{"jsonrpc": "2.0", "id": ' + json.dumps(msg_id).encode("utf-8")
+            + b', "result": ' + tool_registry.list_payload() + b"}"
+        )
+    return {"jsonrpc": "2.0", "id": msg_id, "result": {"tools": _list_tools(tool_registry)}}
+
+
 def _list_tools(tool_registry: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
     """Build tool descriptors from the in-memory registry."""
 
-    tools: list[Dict[str, Any]] = []
-    for tool_name, tool_func in tool_registry.items():
-        description = inspect.getdoc(tool_func) or f"{tool_name} tool"
-        schema = _build_input_schema(tool_func)
-        entry: Dict[str, Any] = {
-            "name": tool_name,
-            "description": description,
-        }
-        if schema:
-            entry["inputSchema"] = schema
-        tools.append(entry)
-    return tools
+    if isinstance(tool_registry, ToolRegistry):
+        return tool_registry.descriptors()
+    return [tool_descriptor(tool_name, tool_func) for tool_name, tool_func in tool_registry.items()]
 
 
 async def _call_tool(
-    tool_registry: Dict[str, Any], message: Dict[str, Any], msg_id: Any
+    tool_registry: Dict[str, Any], message: Dict[str, Any], msg_id: Any, runner: Optional[_ToolRunner] = None
 ) -> Dict[str, Any]:
     """Execute a registry tool and serialize the response."""
 
@@ -153,9 +445,12 @@ async def _call_tool(
     tool_func = tool_registry[tool_name]
 
     try:
-        result = tool_func(**arguments)
-        if inspect.isawaitable(result):
-            result = await result
+        if runner is not None:
+            result = await runner.run(tool_name, tool_func, arguments)
+        else:
+            result = tool_func(**arguments)
+            if inspect.isawaitable(result):
+                result = await result
     except TypeError as exc:
         return _error_response(msg_id, -32602, f"Invalid arguments for {tool_name}: {exc}")
     except Exception as exc:  # pragma: no cover - tool execution errors are propagated
@@ -169,56 +464,6 @@ async def _call_tool(
     }
 
 
-def _build_input_schema(func: Any) -> Optional[Dict[str, Any]]:
-    """Derive a JSON schema from a tool callable's signature."""
-
-    try:
-        signature = inspect.signature(func)
-    except (TypeError, ValueError):
-        return {"type": "object"}
-
-    properties: Dict[str, Dict[str, Any]] = {}
-    required: list[str] = []
-
-    for name, param in signature.parameters.items():
-        if name == "self" or param.kind in (
-            inspect.Parameter.VAR_POSITIONAL,
-            inspect.Parameter.VAR_KEYWORD,
-        ):
-            continue
-
-        schema: Dict[str, Any] = {"type": _python_type_to_json_type(param.annotation)}
-        if param.default is not inspect._empty:
-            schema["default"] = param.default
-        else:
-            required.append(name)
-        properties[name] = schema
-
-    schema: Dict[str, Any] = {
-        "type": "object",
-        "properties": properties,
-        "additionalProperties": False,
-    }
-    if required:
-        schema["required"] = required
-    if not properties:
-        schema.pop("properties")
-        schema.pop("additionalProperties", None)
-    return schema
-
-
-def _python_type_to_json_type(annotation: Any) -> str:
-    """Map Python annotations to JSON schema types."""
-
-    if annotation in (bool, "bool"):
-        return "boolean"
-    if annotation in (int, "int"):
-        return "integer"
-    if annotation in (float, "float"):
-        return "number"
-    return "string"
-
-
 def _normalize_content(result: Any) -> list[Dict[str, Any]]:
     """Convert tool return values into MCP text content."""
 
@@ -258,13 +503,38 @@ def _error_response(msg_id: Any, code: int, message: str) -> Dict[str, Any]:
     }
 
 
-def _write_response(payload: Dict[str, Any]) -> None:
+def _encode(payload: Any) -> bytes:
+    """Serialize a response (or batch); pre-serialized bytes pass through as-is."""
+
+    if isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, list):
+        return b"[" + b", ".join(_encode(item) for item in payload) + b"]"
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _write_response(payload: Any) -> None:
     """Serialize and flush a JSON-RPC response."""
 
-    sys.stdout.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    sys.stdout.buffer.write(_encode(payload) + b"\n")
     sys.stdout.flush()
 
 
+def _is_pipe_or_socket(fd: int) -> bool:
+    # The pipe transports set O_NONBLOCK on the open file description, which dup'd
+    # fds share. On a tty that description usually backs stderr too, so a stray
+    # write could fail with EAGAIN; ttys and regular files use _ThreadedTransport.
+    mode = os.fstat(fd).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
 def _log_info(message: str) -> None:
     print(f"{LOG_PREFIX} {message}", file=sys.stderr)
 
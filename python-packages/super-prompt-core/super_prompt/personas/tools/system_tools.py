@@ -70,15 +70,42 @@ def _copytree(src, dst, force=False, clean=False):
             shutil.copy2(p, t)
 
 
+# Dossiers whose project changed structurally since they were written
+_STALE_DOSSIERS = set()
+
+# Files whose edits change what the dossier reports
+_DOSSIER_SOURCES = {
+    "package.json", "pyproject.toml", "requirements.txt", "setup.py", "setup.cfg",
+    "Cargo.toml", "go.mod", "Gemfile", "pom.xml", "build.gradle", "tsconfig.json",
+}
+
+
 def ensure_project_dossier(project_root: Path, data_root: Path) -> Path:
-    """Ensure the project dossier exists, generating it if necessary."""
+    """Ensure the project dossier exists (and is current), generating it if necessary."""
     dossier_dir = data_root / "context"
     dossier_path = dossier_dir / "project-dossier.md"
-    if dossier_path.exists():
+    if dossier_path.exists() and dossier_path not in _STALE_DOSSIERS:
         return dossier_path
+    _STALE_DOSSIERS.discard(dossier_path)
     return _generate_project_dossier(project_root, data_root)
 
 
+def invalidate_project_dossier(data_root: Path) -> None:
+    """Mark the dossier stale so the next ensure_project_dossier regenerates it."""
+    _STALE_DOSSIERS.add(data_root / "context" / "project-dossier.md")
+
+
+def dossier_invalidator(data_root: Path):
+    """FileIndex subscriber that marks the dossier stale on structural changes."""
+    def on_change(changes) -> None:
+        if changes.added or changes.removed or any(
+            path.rpartition("/")[2] in _DOSSIER_SOURCES for path in changes.modified
+        ):
+            invalidate_project_dossier(data_root)
+
+    return on_change
+
+
 def _generate_project_dossier(project_root: Path, data_root: Path) -> Path:
     """Analyze the repository and write a human-readable dossier."""
     dossier_dir = data_root / "context"
@@ -5,11 +5,15 @@ Tool management and registration system
 from .registry import (
     TOOL_METADATA,
     REGISTERED_TOOL_ANNOTATIONS,
+    ToolRegistry,
+    build_input_schema,
     register_tool
 )
 
 __all__ = [
     "TOOL_METADATA",
     "REGISTERED_TOOL_ANNOTATIONS", 
+    "ToolRegistry",
+    "build_input_schema",
     "register_tool"
 ]
@@ -4,7 +4,8 @@ Tool registration and metadata management
 
 import inspect
 import json
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, Callable, List, Optional
 
 
 # Tool metadata registry
@@ -99,6 +100,144 @@ def _short_description(doc: Optional[str]) -> str:
     return lines[0] if lines else ""
 
 
+def _json_type(annotation: Any) -> str:
+    """Map a Python annotation to a JSON schema type"""
+    if annotation in (bool, "bool"):
+        return "boolean"
+    if annotation in (int, "int"):
+        return "integer"
+    if annotation in (float, "float"):
+        return "number"
+    return "string"
+
+
+def build_input_schema(fn: Callable) -> Dict[str, Any]:
+    """Derive a tool's JSON input schema from its signature"""
+    try:
+        fn_sig = inspect.signature(fn)
+    except (TypeError, ValueError):
+        return {"type": "object"}
+
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    for param_name, param in fn_sig.parameters.items():
+        if param_name == "self" or param.kind in (
+            inspect.Parameter.VAR_POSITIONAL,
+            inspect.Parameter.VAR_KEYWORD,
+        ):
+            continue
+        schema: Dict[str, Any] = {"type": _json_type(param.annotation)}
+        if param.default is not inspect._empty:
+            schema["default"] = param.default
+        else:
+            required.append(param_name)
+        properties[param_name] = schema
+
+    if not properties:
+        return {"type": "object"}
+
+    input_schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": properties,
+        "additionalProperties": False,
+    }
+    if required:
+        input_schema["required"] = required
+    return input_schema
+
+
+def tool_descriptor(tool_name: str, fn: Callable) -> Dict[str, Any]:
+    """MCP `tools/list` entry for a tool callable"""
+    return {
+        "name": tool_name,
+        "description": inspect.getdoc(fn) or f"{tool_name} tool",
+        "inputSchema": build_input_schema(fn),
+    }
+
+
+class ToolRegistry(dict):
+    """
+    Tool name -> callable mapping that caches its `tools/list` descriptors.
+
+    Descriptors are built once per registered tool, and the serialized
+    `{"tools": [...]}` payload once per registry version, so listing tools
+    doesn't re-inspect every callable. Any change to the mapping bumps the
+    version and drops the affected cache entries.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+        self._descriptors: Dict[str, Dict[str, Any]] = {}
+        self._payload: Optional[bytes] = None
+        self._payload_version = -1
+        self._lock = threading.Lock()
+
+    def _changed(self, *tool_names: str) -> None:
+        with self._lock:
+            self.version += 1
+            for tool_name in tool_names:
+                self._descriptors.pop(tool_name, None)
+
+    def __setitem__(self, tool_name: str, fn: Callable) -> None:
+        super().__setitem__(tool_name, fn)
+        self._changed(tool_name)
+
+    def __delitem__(self, tool_name: str) -> None:
+        super().__delitem__(tool_name)
+        self._changed(tool_name)
+
+    def pop(self, tool_name: str, *default):
+        fn = super().pop(tool_name, *default)
+        self._changed(tool_name)
+        return fn
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed(item[0])
+        return item
+
+    def setdefault(self, tool_name: str, fn: Callable = None):
+        if tool_name in self:
+            return self[tool_name]
+        self[tool_name] = fn
+        return fn
+
+    def update(self, *args, **kwargs) -> None:
+        for tool_name, fn in dict(*args, **kwargs).items():
+            self[tool_name] = fn
+
+    def clear(self) -> None:
+        names = list(self)
+        super().clear()
+        self._changed(*names)
+
+    def descriptors(self) -> List[Dict[str, Any]]:
+        """`tools/list` entries in registration order"""
+        with self._lock:
+            entries = []
+            for tool_name, fn in self.items():
+                descriptor = self._descriptors.get(tool_name)
+                if descriptor is None:
+                    descriptor = tool_descriptor(tool_name, fn)
+                    self._descriptors[tool_name] = descriptor
+                entries.append(descriptor)
+            return entries
+
+    def list_payload(self) -> bytes:
+        """UTF-8 JSON of the `tools/list` result, serialized once per registry version"""
+        with self._lock:
+            if self._payload is not None and self._payload_version == self.version:
+                return self._payload
+            version = self.version
+        payload = json.dumps({"tools": self.descriptors()}, ensure_ascii=False, default=str).encode("utf-8")
+        with self._lock:
+            if self.version == version:
+                self._payload = payload
+                self._payload_version = version
+        return payload
+
+
 def register_tool(tool_name: str):
     """Tool registration decorator"""
     meta = TOOL_METADATA.get(tool_name, {})
@@ -120,43 +259,8 @@ def register_tool(tool_name: str):
         if meta.get("examples"):
             annotations["examples"] = meta["examples"]
 
-        input_schema: Optional[Dict[str, Any]] = None
-        try:
-            fn_sig = inspect.signature(fn)
-        except Exception:
-            fn_sig = None
-
-        if fn_sig:
-            properties: Dict[str, Any] = {}
-            required: List[str] = []
-            for param_name, param in fn_sig.parameters.items():
-                if param_name == "self":
-                    continue
-                schema: Dict[str, Any] = {}
-                annotation = param.annotation
-                schema_type = "string"
-                if annotation in (bool, "bool"):
-                    schema_type = "boolean"
-                elif annotation in (int, "int"):
-                    schema_type = "integer"
-                elif annotation in (float, "float"):
-                    schema_type = "number"
-                schema["type"] = schema_type
-                if param.default is not inspect._empty:
-                    schema["default"] = param.default
-                properties[param_name] = schema
-                if param.default is inspect._empty:
-                    required.append(param_name)
-            if properties:
-                input_schema = {
-                    "type": "object",
-                    "properties": properties,
-                    "additionalProperties": False,
-                }
-                if required:
-                    input_schema["required"] = required
-
-        if input_schema:
+        input_schema = build_input_schema(fn)
+        if input_schema.get("properties"):
             annotations["input_schema"] = input_schema
 
         REGISTERED_TOOL_ANNOTATIONS[tool_name] = annotations
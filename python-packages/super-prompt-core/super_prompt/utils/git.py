@@ -0,0 +1,249 @@
+"""
+Git helpers - Cached git metadata shared by context collection and validation
+"""
+
+import asyncio
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class GitRepo:
+    """
+    Process-wide view of one repository's git metadata.
+
+    HEAD is resolved by reading `.git` directly, without spawning git. Command
+    results are cached against the repository state (HEAD plus the index
+    mtime) and a short max age, so the context collector, file index and
+    validators share one `git status` / `git log` run instead of each forking
+    their own per call.
+
+    The project root may be a subdirectory of the work tree: git reports paths
+    relative to the top level, so they are mapped back to the project root and
+    paths outside it are dropped.
+    """
+
+    # Working-tree edits don't move HEAD or the index, so status is also time-bounded
+    STATUS_MAX_AGE = 2.0
+    LOG_MAX_AGE = 60.0
+    TIMEOUT = 10
+
+    _instances: Dict[Path, "GitRepo"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, project_root: Path):
+        self.project_root = Path(project_root).resolve()
+        self.top_level: Optional[Path] = None
+        self.git_dir = self._resolve_git_dir()
+        # Project root relative to the work tree top level, "" when they are the same
+        self._prefix = ""
+        if self.top_level is not None and self.top_level != self.project_root:
+            self._prefix = self.project_root.relative_to(self.top_level).as_posix()
+        self._cache: Dict[Any, Tuple[Tuple[Optional[str], int], float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, project_root: Path) -> "GitRepo":
+        """Return the process-wide helper for a project root"""
+        root = Path(project_root).resolve()
+        with cls._instances_lock:
+            repo = cls._instances.get(root)
+            if repo is None:
+                repo = cls(root)
+                cls._instances[root] = repo
+            return repo
+
+    @property
+    def available(self) -> bool:
+        return self.git_dir is not None
+
+    def head(self) -> Optional[str]:
+        """Resolve HEAD to a commit id (or ref name for an unborn branch); None outside git"""
+        if self.git_dir is None:
+            return None
+        try:
+            head = (self.git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+
+        if not head.startswith("ref:"):
+            return head
+
+        ref = head[4:].strip()
+        for refs_dir in self._refs_dirs():
+            try:
+                return (refs_dir / ref).read_text(encoding="utf-8").strip()
+            except OSError:
+                pass
+            try:
+                with open(refs_dir / "packed-refs", "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.rstrip().endswith(f" {ref}"):
+                            return line.split(" ", 1)[0]
+            except OSError:
+                pass
+        return ref
+
+    def state(self) -> Tuple[Optional[str], int]:
+        """(HEAD, index mtime in ns): changes whenever commits or staging change"""
+        if self.git_dir is None:
+            return None, 0
+        try:
+            index_mtime = (self.git_dir / "index").stat().st_mtime_ns
+        except OSError:
+            index_mtime = 0
+        return self.head(), index_mtime
+
+    def status_paths(self) -> Optional[List[str]]:
+        """Paths `git status` reports as modified or untracked; None when git is unavailable"""
+        return self._cached(
+            ("status",),
+            ["git", "status", "--porcelain", "-z", "--untracked-files=all", *self._pathspec()],
+            self._parse_status,
+            self.STATUS_MAX_AGE,
+        )
+
+    def recent_changes(self, days: int = 1) -> Optional[List[str]]:
+        """Paths touched by commits in the last `days` days; None when git is unavailable"""
+        return self._cached(("log", days), self._log_command(days), self._parse_log, self.LOG_MAX_AGE)
+
+    async def recent_changes_async(self, days: int = 1) -> Optional[List[str]]:
+        """Async variant of recent_changes sharing the same cache"""
+        key = ("log", days)
+        state = self.state()
+        cached = self._lookup(key, state, self.LOG_MAX_AGE)
+        if cached is not None or self.git_dir is None:
+            return cached
+
+        output = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self._log_command(days),
+                cwd=self.project_root,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(process.communicate(), timeout=self.TIMEOUT)
+                if process.returncode == 0:
+                    output = stdout.decode("utf-8", errors="ignore")
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        except (OSError, ValueError):
+            pass
+
+        if output is None:
+            return None
+        return self._store(key, self._parse_log(output))
+
+    def invalidate(self) -> None:
+        """Forget cached command results"""
+        with self._lock:
+            self._cache.clear()
+
+    def _log_command(self, days: int) -> List[str]:
+        return [
+            "git", "log", "--since", f"{days}.days.ago", "--name-only", "--pretty=format:",
+            *self._pathspec(),
+        ]
+
+    def _pathspec(self) -> List[str]:
+        # Commands run in the project root; limit them to it when it is a subdirectory
+        return ["--", "."] if self._prefix else []
+
+    def _relative(self, paths) -> List[str]:
+        """Map top-level-relative paths to project-relative ones, dropping outside paths"""
+        if not self._prefix:
+            return list(paths)
+        prefix = self._prefix + "/"
+        return [path[len(prefix):] for path in paths if path.startswith(prefix)]
+
+    def _parse_status(self, output: str) -> List[str]:
+        paths = []
+        records = iter(output.split("\0"))
+        for record in records:
+            if len(record) <= 3:
+                continue
+            paths.append(record[3:])
+            if "R" in record[:2] or "C" in record[:2]:
+                # Renames and copies are followed by a record holding the original path
+                next(records, None)
+        return self._relative(paths)
+
+    def _parse_log(self, output: str) -> List[str]:
+        paths = {line.strip() for line in output.splitlines()}
+        paths.discard("")
+        return sorted(self._relative(paths))
+
+    def _cached(self, key: Any, cmd: List[str], parse, max_age: float) -> Optional[Any]:
+        state = self.state()
+        cached = self._lookup(key, state, max_age)
+        if cached is not None or self.git_dir is None:
+            return cached
+
+        try:
+            result = subprocess.run(
+                cmd,
+                cwd=self.project_root,
+                capture_output=True,
+                text=True,
+                timeout=self.TIMEOUT
+            )
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
+            return None
+        if result.returncode != 0:
+            return None
+        return self._store(key, parse(result.stdout))
+
+    def _lookup(self, key: Any, state: Tuple[Optional[str], int], max_age: float) -> Optional[Any]:
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None:
+            return None
+        cached_state, stored_at, value = entry
+        if cached_state != state or time.monotonic() - stored_at > max_age:
+            return None
+        return value
+
+    def _store(self, key: Any, value: Any) -> Any:
+        # Read the state afterwards: `git status` may itself rewrite the index
+        state = self.state()
+        with self._lock:
+            self._cache[key] = (state, time.monotonic(), value)
+        return value
+
+    def _resolve_git_dir(self) -> Optional[Path]:
+        """Find the work tree's git directory from the project root or any parent"""
+        for top_level in (self.project_root, *self.project_root.parents):
+            dot_git = top_level / ".git"
+            if dot_git.is_dir():
+                self.top_level = top_level
+                return dot_git
+            try:
+                # Worktrees and submodules: ".git" is a file pointing at the real directory
+                content = dot_git.read_text(encoding="utf-8").strip()
+            except OSError:
+                continue
+            if not content.startswith("gitdir:"):
+                return None
+            git_dir = Path(content[7:].strip())
+            if not git_dir.is_absolute():
+                git_dir = (top_level / git_dir).resolve()
+            if not git_dir.is_dir():
+                return None
+            self.top_level = top_level
+            return git_dir
+        return None
+
+    def _refs_dirs(self) -> List[Path]:
+        dirs = [self.git_dir]
+        try:
+            common = (self.git_dir / "commondir").read_text(encoding="utf-8").strip()
+            common_dir = Path(common)
+            dirs.append(common_dir if common_dir.is_absolute() else (self.git_dir / common_dir).resolve())
+        except OSError:
+            pass
+        return dirs
@@ -0,0 +1,54 @@
+"""
+Lazy imports - Defer loading heavy modules until a name is first used
+"""
+
+import importlib
+import threading
+from typing import Any, Optional
+
+
+_OWN_ATTRIBUTES = frozenset({"_module", "_name", "_package", "_target", "_lock"})
+
+
+class LazyAttribute:
+    """
+    Stand-in for `from module import name` that imports on first use.
+
+    Calling the stand-in or reading an attribute from it imports the module
+    and forwards to the real object, so call sites stay unchanged.
+    """
+
+    def __init__(self, module: str, name: str, package: Optional[str] = None):
+        self._module = module
+        self._name = name
+        self._package = package
+        self._target: Any = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Any:
+        """Import the module (once) and return the real object"""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    module = importlib.import_module(self._module, self._package)
+                    self._target = getattr(module, self._name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr in _OWN_ATTRIBUTES:
+            # Not initialized yet (e.g. during copy); don't recurse into resolve()
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._target is not None else "not loaded"
+        return f"<lazy {self._module}.{self._name} ({state})>"
+
+
+def lazy_import(module: str, *names: str, package: Optional[str] = None):
+    """LazyAttribute stand-ins for several names of one module"""
+    attributes = tuple(LazyAttribute(module, name, package) for name in names)
+    return attributes[0] if len(attributes) == 1 else attributes
@@ -5,6 +5,7 @@ Span management for memory tracking and observability
 import time
 import json
 import sqlite3
+import threading
 import sys
 import traceback
 from pathlib import Path
@@ -18,7 +19,17 @@ class SpanManager:
     def __init__(self):
         self.spans: Dict[str, Dict[str, Any]] = {}
         self._span_counter = 0
-        self._init_db()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Guards spans, the counter and the lazily opened connection across tool threads
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Span database connection, opened on first use"""
+        with self._lock:
+            if self._conn is None:
+                self._init_db()
+            return self._conn
 
     def _init_db(self):
         """Initialize memory database"""
@@ -27,8 +38,8 @@ class SpanManager:
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
         self.db_path = str(db_path)
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.execute(
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
             """
             CREATE TABLE IF NOT EXISTS spans (
                 id TEXT PRIMARY KEY,
@@ -44,68 +55,72 @@ class SpanManager:
             )
         """
         )
-        self.conn.commit()
+        self._conn.commit()
 
     def start_span(self, meta: Dict[str, Any]) -> str:
         """Start new span"""
-        span_id = f"span_{self._span_counter}"
-        self._span_counter += 1
-
-        self.spans[span_id] = {
-            "id": span_id,
-            "start_time": time.time(),
-            "meta": meta,
-            "events": [],
-            "status": "active",
-        }
+        with self._lock:
+            span_id = f"span_{self._span_counter}"
+            self._span_counter += 1
+
+            self.spans[span_id] = {
+                "id": span_id,
+                "start_time": time.time(),
+                "meta": meta,
+                "events": [],
+                "status": "active",
+            }
 
         return span_id
 
     def write_event(self, span_id: str, event: Dict[str, Any]) -> None:
         """Record event in span"""
-        if span_id in self.spans:
-            event_with_time = {"timestamp": time.time(), **event}
-            self.spans[span_id]["events"].append(event_with_time)
+        event_with_time = {"timestamp": time.time(), **event}
+        with self._lock:
+            if span_id in self.spans:
+                self.spans[span_id]["events"].append(event_with_time)
 
     def end_span(
         self, span_id: str, status: str = "ok", extra: Optional[Dict[str, Any]] = None
     ) -> None:
         """End span"""
-        if span_id in self.spans:
-            span = self.spans[span_id]
-            span["end_time"] = time.time()
-            span["duration"] = span["end_time"] - span["start_time"]
-            span["status"] = status
-            if extra:
-                span["extra"] = extra
+        with self._lock:
+            if span_id in self.spans:
+                span = self.spans[span_id]
+                span["end_time"] = time.time()
+                span["duration"] = span["end_time"] - span["start_time"]
+                span["status"] = status
+                if extra:
+                    span["extra"] = extra
 
 
-            # Save to database
-            self._save_span_to_db(span)
+                # Save to database
+                self._save_span_to_db(span)
 
     def _save_span_to_db(self, span: Dict[str, Any]) -> None:
         """Save span to database"""
         try:
-            self.conn.execute(
-                """
-                INSERT OR REPLACE INTO spans
-                (id, command_id, user_id, start_time, end_time, duration, status, meta, events, extra)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    span["id"],
-                    span["meta"].get("commandId", ""),
-                    span["meta"].get("userId", ""),
-                    span["start_time"],
-                    span.get("end_time", 0),
-                    span.get("duration", 0),
-                    span.get("status", "unknown"),
-                    json.dumps(span["meta"]),
-                    json.dumps(span["events"]),
-                    json.dumps(span.get("extra", {})),
-                ),
-            )
-            self.conn.commit()
+            with self._lock:
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO spans
+                    (id, command_id, user_id, start_time, end_time, duration, status, meta, events, extra)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    (
+                        span["id"],
+                        span["meta"].get("commandId", ""),
+                        span["meta"].get("userId", ""),
+                        span["start_time"],
+                        span.get("end_time", 0),
+                        span.get("duration", 0),
+                        span.get("status", "unknown"),
+                        json.dumps(span["meta"]),
+                        json.dumps(span["events"]),
+                        json.dumps(span.get("extra", {})),
+                    ),
+                )
+                self.conn.commit()
         except Exception as e:
             # Handle database errors gracefully
             pass
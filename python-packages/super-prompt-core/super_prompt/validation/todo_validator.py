@@ -8,6 +8,8 @@ from pathlib import Path
 from typing import Tuple, List, Optional
 from enum import Enum
 
+from ..utils.git import GitRepo
+
 
 class TaskStatus(Enum):
     PENDING = "pending"
@@ -60,25 +62,17 @@ class TodoValidator:
 
     def _check_file_changes(self) -> Tuple[bool, Optional[str]]:
         """Check for recent file changes indicating work was done"""
-        try:
-            # Check git status for modified files
-            result = subprocess.run(
-                ["git", "status", "--porcelain"],
-                cwd=self.project_root,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-
-            if result.returncode == 0 and result.stdout.strip():
-                return True, None
-
-            return False, "No file changes detected"
-
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
+        # Check git status for modified files (shared with context collection)
+        changed_paths = GitRepo.open(self.project_root).status_paths()
+        if changed_paths is None:
             # If git is not available, check for recent file modifications
             return self._check_recent_file_modifications()
 
+        if changed_paths:
+            return True, None
+
+        return False, "No file changes detected"
+
     def _check_recent_file_modifications(self) -> Tuple[bool, Optional[str]]:
         """Fallback check for file modifications when git is not available"""
         try:
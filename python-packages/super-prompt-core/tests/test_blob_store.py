@@ -0,0 +1,69 @@
+"""
+Tests for the content-addressed blob store
+"""
+
+import os
+
+import pytest
+
+from super_prompt.context import blob_store
+from super_prompt.context.blob_store import BlobStore
+
+
+def _blob_files(store):
+    return [entry.path for entry in store._iter_blob_entries()]
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = BlobStore(tmp_path)
+    first = store.put("shared = 1\n")
+    second = store.put("shared = 1\n")
+    other = store.put("other = 2\n")
+
+    assert first == second != other
+    assert len(_blob_files(store)) == 2
+    assert first in store
+
+
+def test_round_trip_preserves_text(tmp_path):
+    store = BlobStore(tmp_path)
+    content = "héllo 世界\n\ttabs and \r\n endings\n"
+    digest = store.put(content)
+
+    assert store.get(digest) == content
+    assert BlobStore(tmp_path).get(digest) == content
+    assert store.get("not-a-digest") is None
+    assert store.get("0" * 32) is None
+
+
+def test_zstd_blobs_are_compressed(tmp_path):
+    pytest.importorskip("zstandard")
+    store = BlobStore(tmp_path)
+    content = "repeated line\n" * 1000
+    digest = store.put(content)
+
+    assert store.compressed
+    assert os.path.getsize(store._path_for(digest)) < len(content) // 10
+    assert store.get(digest) == content
+
+
+def test_uncompressed_blobs_stay_readable(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "zstandard", None)
+    digest = BlobStore(tmp_path).put("written without zstandard\n")
+    monkeypatch.undo()
+
+    assert BlobStore(tmp_path).get(digest) == "written without zstandard\n"
+
+
+def test_least_recently_used_blobs_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "zstandard", None)
+    store = BlobStore(tmp_path, max_size_mb=2500 / (1024 * 1024))
+    digests = []
+    for index in range(5):
+        digests.append(store.put(f"{index}" * 1000))
+        # Distinct mtimes so recency is unambiguous
+        os.utime(store._path_for(digests[-1]), (index, index))
+
+    assert store._total_size <= store.max_size_bytes
+    assert store.get(digests[0]) is None
+    assert store.get(digests[-1]) == "4" * 1000
@@ -0,0 +1,111 @@
+"""
+Tests for the log-backed context cache
+"""
+
+import json
+import time
+
+from super_prompt.context.cache import ContextCache
+
+
+def test_legacy_snapshot_migration_counts_log_once(tmp_path):
+    entry = {"key": "k", "content": "v", "timestamp": time.time(), "hits": 0, "size_bytes": 3, "expires_at": None}
+    (tmp_path / "context_cache.json").write_text(json.dumps({"k": entry}))
+
+    cache = ContextCache(tmp_path)
+
+    assert cache.get("k") == "v"
+    assert not cache.cache_file.exists()
+    assert cache._log_bytes == cache.log_file.stat().st_size
+
+
+def test_len_ignores_expired_entries(tmp_path):
+    cache = ContextCache(tmp_path)
+    cache.set("live", "a")
+    cache.set("stale", "b")
+    cache.memory_cache["stale"].expires_at = time.time() - 1
+
+    assert len(cache) == 1
+    assert "stale" not in cache
+    assert len(cache) == 1
+
+
+def test_log_replay_restores_sets_and_deletes(tmp_path):
+    cache = ContextCache(tmp_path)
+    cache.set("kept", {"files": ["a.py"]})
+    cache.set("dropped", "x")
+    cache.set("kept", {"files": ["b.py"]})
+    cache.invalidate("dropped")
+
+    reopened = ContextCache(tmp_path)
+    assert reopened.get("kept") == {"files": ["b.py"]}
+    assert "dropped" not in reopened
+    assert reopened._total_size == cache._total_size
+
+
+def test_torn_final_record_is_truncated(tmp_path):
+    cache = ContextCache(tmp_path)
+    cache.set("complete", "value")
+    intact_size = cache.log_file.stat().st_size
+    with open(cache.log_file, "ab") as f:
+        f.write(b'{"op": "set", "entry": {"key": "torn"')
+
+    reopened = ContextCache(tmp_path)
+    assert reopened.get("complete") == "value"
+    assert "torn" not in reopened
+    assert reopened.log_file.stat().st_size == intact_size
+
+    reopened.set("after", "crash")
+    assert ContextCache(tmp_path).get("after") == "crash"
+
+
+def test_log_compacts_once_mostly_dead(tmp_path):
+    cache = ContextCache(tmp_path)
+    cache.COMPACT_MIN_BYTES = 0
+    for value in range(50):
+        cache.set("key", "v" * 100 + str(value))
+
+    # Each overwrite leaves a dead record; compaction keeps the log near the live size
+    assert cache.log_file.stat().st_size < 2 * 300
+    assert cache._log_bytes == cache.log_file.stat().st_size
+    assert ContextCache(tmp_path).get("key") == "v" * 100 + "49"
+
+
+def test_ttl_expiry_hides_and_drops_entries(tmp_path):
+    cache = ContextCache(tmp_path)
+    cache.set("short", "a", ttl_seconds=60)
+    cache.set("forever", "b", ttl_seconds=None)
+    assert cache.memory_cache["forever"].expires_at is None
+
+    cache.memory_cache["short"].expires_at = time.time() - 1
+    assert cache.get("short") is None
+    assert "short" not in cache.memory_cache
+    # The lazy drop is logged, so the entry stays gone after a restart
+    assert "short" not in ContextCache(tmp_path).memory_cache
+
+
+def test_sweeper_removes_expired_entries(tmp_path):
+    cache = ContextCache(tmp_path)
+    cache.set("stale", "a", ttl_seconds=60)
+    cache.set("fresh", "b", ttl_seconds=60)
+    cache.memory_cache["stale"].expires_at = time.time() - 1
+
+    cache.start_sweeper(0.01)
+    try:
+        deadline = time.time() + 5
+        while "stale" in cache.memory_cache and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        cache.stop_sweeper()
+
+    assert set(cache.memory_cache) == {"fresh"}
+
+
+def test_eviction_keeps_total_within_budget(tmp_path):
+    cache = ContextCache(tmp_path, max_size_mb=0.01)
+    for index in range(40):
+        cache.set(f"key{index}", "x" * 200)
+
+    assert cache._total_size <= cache.max_size_bytes
+    assert "key39" in cache
+    assert "key0" not in cache
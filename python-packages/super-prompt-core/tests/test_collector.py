@@ -0,0 +1,106 @@
+"""
+Tests for ContextCollector selection and snippet extraction
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from super_prompt.context import tokenizer
+from super_prompt.context.collector import ContextCollector
+from super_prompt.context.tokenizer import CharEstimateBackend
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # The result cache lives under the working directory
+    monkeypatch.chdir(tmp_path)
+    tokenizer.set_backend(CharEstimateBackend())
+    yield
+    tokenizer.set_backend(None)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    return root
+
+
+def test_snippets_find_hits_past_the_cached_head(project):
+    filler = "".join(f"filler line {i} with nothing to see\n" for i in range(8000))
+    assert len(filler) > ContextCollector.MAX_FILE_SIZE
+    (project / "big.py").write_text(filler + "def rebalance_shards():\n    pass\n" + filler[:2000])
+
+    collector = ContextCollector(str(project))
+    windows = collector._snippet_windows(project / "big.py", collector._hit_pattern(["rebalance"]))
+    assert [(start, end, hits) for start, end, hits, _ in windows] == [(7997, 8004, 1)]
+    assert "def rebalance_shards():" in windows[0][3]
+
+    result = collector.collect_context("rebalance shards", max_tokens=500, use_cache=False, mode="snippets")
+    assert [part["path"] for part in result["files"]] == ["big.py"]
+    assert "def rebalance_shards():" in result["files"][0]["content"]
+
+
+def test_snippets_stay_within_budget_and_prefer_dense_windows(project):
+    sparse = "".join(f"filler {i}\n" for i in range(30)) + "shard here\n" + "".join(f"filler {i}\n" for i in range(30))
+    dense = "".join("shard shard shard\n" for _ in range(5))
+    (project / "sparse.py").write_text(sparse)
+    (project / "dense.py").write_text(dense)
+
+    collector = ContextCollector(str(project))
+    result = collector.collect_context("shard", max_tokens=40, use_cache=False, mode="snippets")
+
+    assert result["metadata"]["context_tokens"] <= 40
+    assert [part["path"] for part in result["files"]] == ["dense.py"]
+    assert result["files"][0]["snippets"] == [[1, 6]]
+
+    roomy = collector.collect_context("shard", max_tokens=500, use_cache=False, mode="snippets")
+    assert sorted(part["path"] for part in roomy["files"]) == ["dense.py", "sparse.py"]
+    sparse_part = next(part for part in roomy["files"] if part["path"] == "sparse.py")
+    assert sparse_part["snippets"] == [[28, 34]]
+
+
+def test_working_tree_changes_invalidate_cached_results(project):
+    (project / "module.py").write_text("def rebalance():\n    return 1\n")
+    collector = ContextCollector(str(project))
+    collector.file_index.min_refresh_interval = 0
+
+    first = collector.collect_context("rebalance", max_tokens=500)
+    assert not first["metadata"]["cached"]
+    # Rewordings with the same keywords share the entry
+    assert collector.collect_context("Rebalance!", max_tokens=500)["metadata"]["cached"]
+
+    (project / "module.py").write_text("def rebalance():\n    return 22\n")
+    os.utime(project / "module.py", (2_000_000_000, 2_000_000_000))
+    fresh = collector.collect_context("rebalance", max_tokens=500)
+    assert not fresh["metadata"]["cached"]
+    assert "return 22" in fresh["files"][0]["content"]
+
+
+def test_no_prefetch_is_still_running_after_selection(project):
+    for index in range(20):
+        (project / f"module_{index}.py").write_text(f"value_{index} = {index}\n" * 50)
+
+    collector = ContextCollector(str(project))
+    loading = collector._load_file_content
+    lock = threading.Lock()
+    running = [0]
+
+    def slow_load(file_path):
+        with lock:
+            running[0] += 1
+        try:
+            time.sleep(0.05)
+            return loading(file_path)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    collector._load_file_content = slow_load
+    files = [(path, 1.0) for path in sorted(project.glob("*.py"))]
+    # The first file already exceeds the budget, so selection stops early
+    assert collector._extract_content_with_budget(files, max_tokens=10) == []
+    assert running[0] == 0
@@ -0,0 +1,115 @@
+"""
+Tests for cache eviction policies
+"""
+
+import random
+
+import pytest
+
+from super_prompt.context.eviction import EvictionPolicy, LFUPolicy, LRUPolicy, TinyLFUPolicy, create_policy
+
+
+def test_base_policy_is_abstract():
+    with pytest.raises(TypeError):
+        EvictionPolicy()
+
+
+def test_create_policy_falls_back_to_lru():
+    assert isinstance(create_policy("TinyLFU"), TinyLFUPolicy)
+    assert isinstance(create_policy("unknown"), LRUPolicy)
+
+
+def test_lru_evicts_least_recently_used():
+    policy = LRUPolicy()
+    for key in "abc":
+        policy.record_insert(key)
+    policy.record_access("a")
+    assert policy.victim() == "b"
+    policy.record_remove("b")
+    assert policy.victim() == "c"
+
+
+def test_lfu_tracks_minimum_across_removals():
+    policy = LFUPolicy()
+    for key, accesses in (("a", 0), ("b", 2), ("c", 5)):
+        policy.record_insert(key)
+        for _ in range(accesses):
+            policy.record_access(key)
+    assert policy.victim() == "a"
+    policy.record_remove("a")
+    assert policy.victim() == "b"
+    policy.record_remove("b")
+    assert policy.victim() == "c"
+    policy.record_insert("d")
+    assert policy.victim() == "d"
+    policy.record_remove("c")
+    policy.record_remove("d")
+    assert policy.victim() is None
+
+
+def test_lfu_matches_brute_force():
+    rng = random.Random(7)
+    policy = LFUPolicy()
+    counts = {}
+    order = []  # Keys in the order they reached their current count
+    for _ in range(5000):
+        key = f"k{rng.randrange(40)}"
+        action = rng.random()
+        if action < 0.2 and key in counts:
+            policy.record_remove(key)
+            del counts[key]
+            order.remove(key)
+        elif key in counts:
+            policy.record_access(key)
+            counts[key] += 1
+            order.remove(key)
+            order.append(key)
+        else:
+            policy.record_insert(key)
+            counts[key] = 1
+            order.append(key)
+        expected = min(order, key=lambda k: counts[k]) if order else None
+        assert policy.victim() == expected
+
+
+def test_tinylfu_victim_has_no_side_effects():
+    policy = TinyLFUPolicy(window_fraction=0.25)
+    for key in "abcdefgh":
+        policy.record_insert(key)
+    state = (list(policy._window), list(policy._main), list(policy._rejected))
+    assert policy.victim() == policy.victim()
+    assert (list(policy._window), list(policy._main), list(policy._rejected)) == state
+
+
+def test_tinylfu_newest_entry_is_not_the_victim():
+    policy = TinyLFUPolicy()
+    for index in range(50):
+        policy.record_insert(f"k{index}")
+        assert policy.victim() != f"k{index}" or index == 0
+
+
+def test_tinylfu_keeps_frequent_entries_through_a_scan():
+    policy = TinyLFUPolicy(window_fraction=0.1)
+    live = set()
+
+    def insert(key):
+        # A cache bounded at 20 entries
+        policy.record_insert(key)
+        live.add(key)
+        while len(live) > 20:
+            victim = policy.victim()
+            policy.record_evict(victim)
+            live.remove(victim)
+
+    for index in range(30):
+        insert(f"warm{index}")
+    hot = [f"hot{i}" for i in range(10)]
+    for key in hot:
+        insert(key)
+        for _ in range(5):
+            policy.record_access(key)
+
+    for index in range(200):
+        insert(f"scan{index}")
+    assert set(hot) <= live
+    assert len(live) == 20
@@ -0,0 +1,119 @@
+"""
+Tests for the incremental FileIndex refresh
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from super_prompt.context.file_index import FileIndex
+from super_prompt.context.keyword_index import KeywordIndex
+
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(root, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    )
+
+
+def _write(path, content, mtime):
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    _git(root, "init", "-q")
+    _write(root / "module.py", "committedword = 1\n", 1_000_000)
+    _git(root, "add", "module.py")
+    _git(root, "commit", "-q", "-m", "initial")
+    return root
+
+
+def _refresh(file_index):
+    file_index.git.invalidate()  # Don't wait out the status cache between edits
+    return file_index.refresh()
+
+
+def test_refresh_restats_file_reverted_to_committed_content(repo, tmp_path):
+    file_index = FileIndex(repo, index_dir=tmp_path / "index", min_refresh_interval=0)
+    keyword_index = KeywordIndex(repo, index_dir=tmp_path / "index")
+    file_index.refresh(force=True)
+    keyword_index.update(file_index)
+
+    _write(repo / "module.py", "uncommittedword = 22\n", 1_000_100)
+    assert _refresh(file_index) == 1
+    keyword_index.update(file_index)
+    assert [path for path, _ in keyword_index.search(["uncommittedword"])] == ["module.py"]
+
+    # Back to the committed content: `git status` no longer lists the file
+    _write(repo / "module.py", "committedword = 1\n", 1_000_200)
+    assert _refresh(file_index) == 1
+    entry = file_index.get("module.py")
+    assert (entry.mtime, entry.size) == (1_000_200, len("committedword = 1\n"))
+
+    keyword_index.update(file_index)
+    assert keyword_index.search(["uncommittedword"]) == []
+    assert [path for path, _ in keyword_index.search(["committedword"])] == ["module.py"]
+
+
+def test_refresh_restats_reverted_file_after_reopening_index(repo, tmp_path):
+    file_index = FileIndex(repo, index_dir=tmp_path / "index", min_refresh_interval=0)
+    file_index.refresh(force=True)
+    _write(repo / "module.py", "uncommittedword = 22\n", 1_000_100)
+    _refresh(file_index)
+
+    # A new process only knows the dirty set that was persisted with the index
+    reopened = FileIndex(repo, index_dir=tmp_path / "index", min_refresh_interval=0)
+    _write(repo / "module.py", "committedword = 1\n", 1_000_200)
+    assert _refresh(reopened) == 1
+    assert reopened.get("module.py").mtime == 1_000_200
+
+
+def test_queries_are_safe_during_refresh(tmp_path):
+    root = tmp_path / "plain"
+    root.mkdir()
+    file_index = FileIndex(root, index_dir=tmp_path / "index", min_refresh_interval=0)
+    file_index.refresh(force=True)
+    errors = []
+    done = threading.Event()
+
+    def read():
+        try:
+            while not done.is_set():
+                stats = file_index.get_stats()
+                assert stats["indexed_files"] + stats["ignored_files"] >= 0
+                "f0.txt" in file_index
+                len(file_index)
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for round_ in range(30):
+            for i in range(50):
+                path = root / f"f{i}.txt"
+                if round_ % 2:
+                    path.unlink()
+                else:
+                    path.write_text("x")
+            file_index.refresh(force=True)
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
+    assert len(file_index) == 0
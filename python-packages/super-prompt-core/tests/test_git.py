@@ -0,0 +1,51 @@
+"""
+Tests for the cached git helpers
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from super_prompt.utils.git import GitRepo
+
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(root, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "pkg").mkdir(parents=True)
+    (root / "top.py").write_text("top = 1\n")
+    (root / "pkg" / "old.py").write_text("old = 1\n")
+    _git(root, "init", "-q")
+    _git(root, "add", ".")
+    _git(root, "commit", "-q", "-m", "initial")
+    return root
+
+
+def test_status_paths_skip_rename_source(repo):
+    _git(repo, "mv", "pkg/old.py", "pkg/new.py")
+    assert GitRepo(repo).status_paths() == ["pkg/new.py"]
+
+
+def test_subdirectory_project_root(repo):
+    (repo / "top.py").write_text("top = 2\n")
+    (repo / "pkg" / "added.py").write_text("added = 1\n")
+
+    git = GitRepo(repo / "pkg")
+    assert git.available
+    assert git.git_dir == repo / ".git"
+    assert git.head() == GitRepo(repo).head()
+    assert git.status_paths() == ["added.py"]
+    assert git.recent_changes() == ["old.py"]
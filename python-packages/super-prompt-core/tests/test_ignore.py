@@ -0,0 +1,70 @@
+"""
+Tests for git-style ignore decisions
+"""
+
+import pytest
+
+from super_prompt.context.ignore import IgnoreMatcher
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "app" / "generated").mkdir(parents=True)
+    (root / "vendor" / "lib").mkdir(parents=True)
+    (root / ".gitignore").write_text("*.log\nvendor/\nsecret*\n")
+    (root / "app" / ".gitignore").write_text("!keep.log\n*.tmp\n/local.txt\n")
+    (root / "app" / "generated" / ".gitignore").write_text("*\n!.gitignore\n!schema.py\n")
+    return root
+
+
+def test_defaults_apply_without_a_gitignore(tmp_path):
+    matcher = IgnoreMatcher(tmp_path)
+    assert not matcher.has_gitignore
+    assert matcher.is_ignored("node_modules/pkg/index.js")
+    assert matcher.is_ignored("pkg/__pycache__", is_dir=True)
+    assert matcher.is_ignored("module.pyc")
+    assert not matcher.is_ignored("module.py")
+
+
+def test_root_rules(project):
+    matcher = IgnoreMatcher(project)
+    assert matcher.is_ignored("debug.log")
+    assert matcher.is_ignored("app/secret.key")
+    assert not matcher.is_ignored("app/main.py")
+
+
+def test_nested_rules_are_relative_to_their_directory(project):
+    matcher = IgnoreMatcher(project)
+    assert matcher.is_ignored("app/cache.tmp")
+    assert not matcher.is_ignored("cache.tmp")
+    # Anchored patterns only match directly inside the directory that declares them
+    assert matcher.is_ignored("app/local.txt")
+    assert not matcher.is_ignored("app/sub/local.txt")
+    assert not matcher.is_ignored("local.txt")
+
+
+def test_deeper_negation_overrides_shallower_rules(project):
+    matcher = IgnoreMatcher(project)
+    assert not matcher.is_ignored("app/keep.log")
+    assert matcher.is_ignored("app/other.log")
+    assert matcher.is_ignored("app/generated/client.py")
+    assert not matcher.is_ignored("app/generated/schema.py")
+
+
+def test_nothing_below_an_ignored_directory_is_included(project):
+    (project / "vendor" / ".gitignore").write_text("!lib/\n!*.py\n")
+    matcher = IgnoreMatcher(project)
+    assert matcher.is_dir_ignored("vendor")
+    assert matcher.is_dir_ignored("vendor/lib")
+    assert matcher.is_ignored("vendor/lib/module.py")
+
+
+def test_reset_picks_up_edited_rules(project):
+    matcher = IgnoreMatcher(project)
+    assert not matcher.is_ignored("app/main.py")
+
+    (project / "app" / ".gitignore").write_text("main.py\n")
+    assert not matcher.is_ignored("app/main.py")  # Compiled rules are reused until reset
+    matcher.reset()
+    assert matcher.is_ignored("app/main.py")
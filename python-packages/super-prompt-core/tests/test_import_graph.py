@@ -0,0 +1,85 @@
+"""
+Tests for import-graph extraction and resolution
+"""
+
+import pytest
+
+from super_prompt.context.file_index import FileIndex
+from super_prompt.context.import_graph import ImportGraph, js_import_specs, python_import_specs
+
+
+def _graph(root, tmp_path, files):
+    for rel_path, content in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    file_index = FileIndex(root, index_dir=tmp_path / "index")
+    file_index.refresh(force=True)
+    graph = ImportGraph(root, index_dir=tmp_path / "index")
+    graph.update(file_index)
+    return graph, file_index
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    return root
+
+
+def test_python_import_specs():
+    content = "import os, pkg.util\nfrom . import sibling\nfrom ..core import thing as alias\n"
+    assert python_import_specs(content, "pkg/sub/mod.py") == [
+        "mod:os",
+        "mod:pkg.util",
+        "path:pkg/sub/sibling",
+        "path:pkg/sub",
+        "path:pkg/core/thing",
+        "path:pkg/core",
+    ]
+
+
+def test_js_import_specs_keep_relative_targets():
+    content = "import a from './a';\nconst b = require('../lib/b');\nimport React from 'react';\n"
+    assert js_import_specs(content, "src/app/main.ts") == ["js:src/app/a", "js:src/lib/b"]
+
+
+def test_absolute_imports_resolve_by_full_dotted_name(root, tmp_path):
+    graph, _ = _graph(root, tmp_path, {
+        "src/pkg/__init__.py": "",
+        "src/pkg/core.py": "import json\nimport time\nfrom pkg import util\nimport pkg.sub.deep\n",
+        "src/pkg/util.py": "from .core import helper\n",
+        "src/pkg/sub/__init__.py": "",
+        "src/pkg/sub/deep.py": "",
+        # Same basenames as stdlib modules, but not importable under those names
+        "src/pkg/json.py": "",
+        "tools/time.py": "",
+    })
+    assert graph.imports_of("src/pkg/core.py") == {"src/pkg/util.py", "src/pkg/sub/deep.py", "src/pkg/__init__.py"}
+    assert graph.imports_of("src/pkg/util.py") == {"src/pkg/core.py"}
+    assert graph.importers_of("src/pkg/json.py") == set()
+    assert graph.importers_of("tools/time.py") == set()
+
+
+def test_suffixes_of_package_modules_do_not_resolve(root, tmp_path):
+    graph, _ = _graph(root, tmp_path, {
+        "app/__init__.py": "",
+        "app/paths.py": "",
+        "app/main.py": "import app.paths\n",
+        "scripts/run.py": "import paths\nimport helpers\n",
+        "scripts/helpers.py": "",
+    })
+    assert graph.imports_of("app/main.py") == {"app/paths.py"}
+    # A script sees its own directory, but not the last component of package modules
+    assert graph.imports_of("scripts/run.py") == {"scripts/helpers.py"}
+
+
+def test_relinks_when_module_is_added(root, tmp_path):
+    graph, file_index = _graph(root, tmp_path, {"main.py": "import extra\n"})
+    assert graph.imports_of("main.py") == set()
+
+    (root / "extra.py").write_text("")
+    file_index.refresh(force=True)
+    graph.update(file_index)
+    assert graph.imports_of("main.py") == {"extra.py"}
+    assert graph.distances(["extra.py"]) == {"extra.py": 0, "main.py": 1}
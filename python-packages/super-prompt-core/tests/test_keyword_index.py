@@ -0,0 +1,71 @@
+"""
+Tests for the SQLite keyword index and BM25 ranking
+"""
+
+import pytest
+
+from super_prompt.context.file_index import FileIndex
+from super_prompt.context.keyword_index import KeywordIndex, split_identifier, tokenize
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    return root
+
+
+def _index(project, tmp_path):
+    file_index = FileIndex(project, index_dir=tmp_path / "index", min_refresh_interval=0)
+    keyword_index = KeywordIndex(project, index_dir=tmp_path / "index")
+    file_index.refresh(force=True)
+    keyword_index.update(file_index)
+    return file_index, keyword_index
+
+
+def test_identifiers_split_into_terms():
+    assert split_identifier("loadContext_cache") == ["loadcontext_cache", "load", "context", "cache"]
+    terms = tokenize("def load_cache(): return loadCache(42)")
+    assert terms["cache"] == 2
+    assert terms["load"] == 2
+    assert "42" not in terms
+
+
+def test_postings_follow_file_changes(project, tmp_path):
+    (project / "a.py").write_text("alpha = 1\n")
+    (project / "b.py").write_text("beta = 2\n")
+    file_index, keyword_index = _index(project, tmp_path)
+    assert len(keyword_index) == 2
+    assert [path for path, _ in keyword_index.search(["alpha"])] == ["a.py"]
+
+    (project / "a.py").unlink()
+    (project / "b.py").write_text("beta = alpha\n")
+    file_index.refresh(force=True)
+    assert keyword_index.update(file_index) == 2
+    assert len(keyword_index) == 1
+    assert [path for path, _ in keyword_index.search(["alpha"])] == ["b.py"]
+
+    # Nothing changed since the last sync
+    assert keyword_index.update(file_index) == 0
+
+
+def test_bm25_ranks_by_term_frequency_and_rarity(project, tmp_path):
+    (project / "many.py").write_text("parser parser parser tokens\n")
+    (project / "once.py").write_text("parser tokens lexer\n")
+    (project / "other.py").write_text("tokens unrelated words\n")
+    _, keyword_index = _index(project, tmp_path)
+
+    ranked = [path for path, _ in keyword_index.search(["parser"])]
+    assert ranked == ["many.py", "once.py"]
+
+    # "lexer" appears in one file, "tokens" in all three, so it weighs more
+    scores = keyword_index.bm25_scores(["tokens", "lexer"])
+    assert max(scores, key=scores.get) == "once.py"
+    assert keyword_index.bm25_scores(["tokens"], paths=["other.py"]).keys() == {"other.py"}
+
+
+def test_longer_terms_match_as_prefixes(project, tmp_path):
+    (project / "collector.py").write_text("class ContextCollector:\n    pass\n")
+    _, keyword_index = _index(project, tmp_path)
+    assert [path for path, _ in keyword_index.search(["collect"])] == ["collector.py"]
+    assert keyword_index.search(["col"]) == []
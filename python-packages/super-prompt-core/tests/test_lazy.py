@@ -0,0 +1,56 @@
+"""
+Tests for deferred imports
+"""
+
+import sys
+
+import pytest
+
+from super_prompt.utils.lazy import LazyAttribute, lazy_import
+
+
+@pytest.fixture
+def module_dir(tmp_path, monkeypatch):
+    (tmp_path / "heavy_module.py").write_text(
+        "LOADS = 1\n"
+        "def build(value):\n"
+        "    return value * 2\n"
+        "class Engine:\n"
+        "    kind = 'heavy'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    sys.modules.pop("heavy_module", None)
+
+
+def test_import_is_deferred_until_first_use(module_dir):
+    build, engine = lazy_import("heavy_module", "build", "Engine")
+    assert "heavy_module" not in sys.modules
+    assert "not loaded" in repr(build)
+
+    assert build(21) == 42
+    assert "heavy_module" in sys.modules
+    assert engine.kind == "heavy"
+    assert engine.resolve() is sys.modules["heavy_module"].Engine
+
+
+def test_single_name_returns_one_stand_in(module_dir):
+    build = lazy_import("heavy_module", "build")
+    assert isinstance(build, LazyAttribute)
+    assert build.resolve() is build.resolve()
+
+
+def test_missing_names_fail_on_use_not_on_declaration(module_dir):
+    missing = lazy_import("heavy_module", "missing")
+    with pytest.raises(AttributeError):
+        missing()
+    absent = lazy_import("absent_module_for_tests", "anything")
+    with pytest.raises(ImportError):
+        absent.resolve()
+
+
+def test_relative_imports_resolve_against_the_package():
+    collector_class = lazy_import(".context.collector", "ContextCollector", package="super_prompt")
+    from super_prompt.context.collector import ContextCollector
+
+    assert collector_class.resolve() is ContextCollector
@@ -0,0 +1,114 @@
+"""
+Tests for the fallback MCP stdio dispatcher
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+from super_prompt import mcp_stdio
+from super_prompt.tools.registry import ToolRegistry
+
+
+def _registry():
+    started = threading.Barrier(2, timeout=5)
+
+    def rendezvous(label: str = "") -> str:
+        """Returns once another call is running at the same time"""
+        started.wait()
+        return f"met {label}"
+
+    async def echo(text: str) -> str:
+        """Echo text"""
+        return text
+
+    def slow() -> str:
+        """Sleep for a while"""
+        time.sleep(0.5)
+        return "slow done"
+
+    return ToolRegistry(rendezvous=rendezvous, echo=echo, slow=slow)
+
+
+def _call(msg_id, tool_name, **arguments):
+    params = {"name": tool_name, "arguments": arguments}
+    return {"jsonrpc": "2.0", "id": msg_id, "method": "tools/call", "params": params}
+
+
+def _handle(registry, message):
+    async def run():
+        runner = mcp_stdio._ToolRunner()
+        try:
+            return await mcp_stdio._handle_message(registry, message, runner)
+        finally:
+            runner.shutdown()
+
+    return asyncio.run(run())
+
+
+def test_batch_answers_each_request_and_skips_notifications():
+    responses = _handle(_registry(), [
+        {"jsonrpc": "2.0", "id": 1, "method": "ping"},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        _call(2, "echo", text="hi"),
+        _call(3, "missing"),
+        "not a request",
+    ])
+
+    assert [response.get("id") for response in responses] == [1, 2, 3, None]
+    assert responses[1]["result"]["content"] == [{"type": "text", "text": "hi"}]
+    assert responses[2]["error"]["code"] == -32602
+    assert responses[3]["error"]["code"] == -32600
+
+
+def test_batch_edge_cases():
+    registry = _registry()
+    assert _handle(registry, [])["error"]["code"] == -32600
+    assert _handle(registry, [{"jsonrpc": "2.0", "method": "notifications/initialized"}]) is None
+    assert _handle(registry, 42)["error"]["code"] == -32600
+
+
+def test_batch_calls_run_concurrently():
+    # Each call blocks until the other one is running, so serial dispatch would time out
+    responses = _handle(_registry(), [_call(1, "rendezvous", label="a"), _call(2, "rendezvous", label="b")])
+    assert [response["result"]["content"][0]["text"] for response in responses] == ["met a", "met b"]
+
+
+class _RecordingTransport:
+    name = "recording"
+
+    def __init__(self, messages):
+        self._messages = messages
+        self.sent = []
+
+    async def messages(self):
+        for message in self._messages:
+            yield message
+
+    def send(self, payload):
+        self.sent.append(json.loads(mcp_stdio._encode(payload)))
+
+    async def close(self):
+        return None
+
+
+def test_slow_call_does_not_hold_up_later_messages(monkeypatch):
+    transport = _RecordingTransport([
+        _call(1, "slow"),
+        {"jsonrpc": "2.0", "id": 2, "method": "ping"},
+        {"jsonrpc": "2.0", "id": 3, "method": "tools/list"},
+        mcp_stdio._PARSE_ERROR,
+    ])
+
+    async def open_transport():
+        return transport
+
+    monkeypatch.setattr(mcp_stdio._PipeTransport, "open", open_transport)
+    asyncio.run(mcp_stdio._run_fallback_stdio(_registry()))
+
+    # Input ended while the slow call ran; it still answers, last
+    assert [response.get("id") for response in transport.sent] == [2, 3, None, 1]
+    assert [tool["name"] for tool in transport.sent[1]["result"]["tools"]] == ["rendezvous", "echo", "slow"]
+    assert transport.sent[2]["error"]["code"] == -32700
+    assert transport.sent[3]["result"]["content"][0]["text"] == "slow done"
@@ -0,0 +1,72 @@
+"""
+Tests for memory-mapped, range-limited file reading
+"""
+
+import re
+
+from super_prompt.context.reader import MMAP_THRESHOLD, find_hit_lines, read_head, read_line_ranges, read_windows
+
+
+def _numbered(count):
+    return "".join(f"line {index:06d}\n" for index in range(count))
+
+
+def test_read_head_cuts_at_a_line_boundary(tmp_path):
+    path = tmp_path / "small.txt"
+    path.write_text("first line\nsecond line\nthird line\n")
+
+    assert read_head(path, 1000) == ("first line\nsecond line\nthird line\n", False)
+    assert read_head(path, 20) == ("first line\n", True)
+
+
+def test_read_head_never_splits_a_character(tmp_path):
+    path = tmp_path / "wide.txt"
+    path.write_text("가" * 100)  # Three bytes each, no newlines
+
+    text, truncated = read_head(path, 10)
+    assert truncated
+    assert text == "가" * 3
+
+
+def test_read_head_maps_large_files(tmp_path):
+    path = tmp_path / "large.txt"
+    content = _numbered(MMAP_THRESHOLD // 10)
+    path.write_text(content)
+
+    text, truncated = read_head(path, 1000)
+    assert truncated
+    assert content.startswith(text)
+    assert text.endswith("\n") and len(text) <= 1000
+
+
+def test_read_windows_cover_head_middle_and_tail(tmp_path):
+    path = tmp_path / "large.txt"
+    content = _numbered(20000)
+    path.write_text(content)
+
+    head, middle, tail = read_windows(path, 1000)
+    assert head.startswith("line 000000\n")
+    assert tail.endswith("line 019999\n")
+    assert "line 010000" in middle or "line 009999" in middle
+    # Every window holds whole lines
+    for window in (head, middle, tail):
+        assert all(re.fullmatch(r"line \d{6}", line) for line in window.splitlines())
+
+    path.write_text("short\n")
+    assert read_windows(path, 1000) == ["short\n"]
+
+
+def test_hit_lines_and_line_ranges(tmp_path):
+    path = tmp_path / "large.txt"
+    lines = _numbered(20000).splitlines()
+    lines[5] += " needle"
+    lines[15000] += " needle needle"
+    path.write_text("\n".join(lines) + "\n")
+
+    hit_lines, line_count = find_hit_lines(path, re.compile(rb"needle"))
+    assert hit_lines == {5: 1, 15000: 2}
+    assert line_count == 20001  # The trailing newline starts an empty last line
+
+    content = path.read_text().split("\n")
+    ranges = [(3, 8), (14998, 15002), (19998, 20001)]
+    assert read_line_ranges(path, ranges) == ["\n".join(content[a:b]) for a, b in ranges]
@@ -0,0 +1,69 @@
+"""
+Tests for ToolRegistry descriptor caching
+"""
+
+import json
+
+from super_prompt.tools.registry import ToolRegistry, build_input_schema
+
+
+def greet(name: str, excited: bool = False) -> str:
+    """Greet someone"""
+    return name
+
+
+def farewell(name: str) -> str:
+    """Say goodbye"""
+    return name
+
+
+def test_input_schema_follows_the_signature():
+    assert build_input_schema(greet) == {
+        "type": "object",
+        "properties": {"name": {"type": "string"}, "excited": {"type": "boolean", "default": False}},
+        "additionalProperties": False,
+        "required": ["name"],
+    }
+    assert build_input_schema(lambda: None) == {"type": "object"}
+
+
+def test_descriptors_are_built_once():
+    registry = ToolRegistry(greet=greet)
+    first = registry.descriptors()
+    assert first[0]["description"] == "Greet someone"
+    assert registry.descriptors()[0] is first[0]
+
+    payload = registry.list_payload()
+    assert registry.list_payload() is payload
+    assert json.loads(payload) == {"tools": first}
+
+
+def test_changes_invalidate_only_the_affected_descriptors():
+    registry = ToolRegistry(greet=greet, bye=farewell)
+    greet_descriptor, bye_descriptor = registry.descriptors()
+    payload = registry.list_payload()
+
+    registry["bye"] = greet
+    assert registry.descriptors()[0] is greet_descriptor
+    assert registry.descriptors()[1] is not bye_descriptor
+    assert registry.descriptors()[1]["description"] == "Greet someone"
+    assert registry.list_payload() is not payload
+
+
+def test_every_mutation_bumps_the_version():
+    registry = ToolRegistry()
+    versions = [registry.version]
+    registry["greet"] = greet
+    registry.update(bye=farewell)
+    registry.setdefault("greet", farewell)  # Already present: no change
+    versions.append(registry.version)
+    registry.pop("greet")
+    del registry["bye"]
+    registry["greet"] = greet
+    registry.popitem()
+    registry["bye"] = farewell
+    registry.clear()
+    versions.append(registry.version)
+
+    assert versions == [0, 2, 8]
+    assert json.loads(registry.list_payload()) == {"tools": []}
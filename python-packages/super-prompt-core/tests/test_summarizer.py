@@ -0,0 +1,91 @@
+"""
+Tests for structure-aware file outlines
+"""
+
+import pytest
+
+from super_prompt.context import tokenizer
+from super_prompt.context.summarizer import OUTLINE_MARKER, outline, summarize
+from super_prompt.context.tokenizer import CharEstimateBackend, Tokenizer
+
+
+PYTHON_SOURCE = '''"""Storage helpers."""
+
+import os
+
+
+@cached
+def load(path: str) -> bytes:
+    """Read a file.
+
+    Longer explanation that the outline leaves out.
+    """
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class Store:
+    """Keeps things."""
+
+    def put(self, key, value):
+        self.items[key] = value
+
+    async def fetch(self, key):
+        return self.items[key]
+'''
+
+
+@pytest.fixture(autouse=True)
+def estimate_backend():
+    tokenizer.set_backend(CharEstimateBackend())
+    yield
+    tokenizer.set_backend(None)
+
+
+def test_python_outline_keeps_signatures_and_first_docstring_lines():
+    assert [text for _, text in outline(PYTHON_SOURCE, ".py")] == [
+        '"""Storage helpers."""',
+        "@cached\ndef load(path: str) -> bytes:",
+        '    """Read a file."""',
+        "class Store:",
+        '    """Keeps things."""',
+        "    def put(self, key, value):",
+        "    async def fetch(self, key):",
+    ]
+
+
+def test_unparsable_python_falls_back_to_regex_outline():
+    # A head cut mid-file rarely parses
+    head = PYTHON_SOURCE + "    def broken(:\n"
+    texts = [text for _, text in outline(head, ".py")]
+    assert "class Store:" in texts
+    assert "    def broken(:" in texts
+
+
+def test_regex_outline_for_typescript():
+    source = (
+        "export async function load(path: string) {\n  return read(path);\n}\n"
+        "const handler = (event) => {\n  if (event) {\n    run();\n  }\n};\n"
+        "class Store {\n  put(key: string): void {\n    this.items.set(key);\n  }\n}\n"
+    )
+    assert outline(source, ".ts") == [
+        (1, "export async function load(path: string) {"),
+        (4, "const handler = (event) => {"),
+        (9, "class Store {"),
+        (10, "  put(key: string): void {"),
+    ]
+
+
+def test_summary_fits_budget_and_outlines_the_rest():
+    source = PYTHON_SOURCE + "".join(f"\n\ndef helper_{i}(x):\n    return x + {i}\n" for i in range(40))
+    summary = summarize(source, 150, ".py")
+
+    assert Tokenizer.estimate_tokens(summary) <= 150
+    head, _, rest = summary.partition(OUTLINE_MARKER)
+    assert source.startswith(head.rstrip("\n"))
+    assert "def helper_0(x):" in rest
+    assert "return x + 0" not in rest
+
+
+def test_no_summary_without_an_outline():
+    assert summarize("just some words\n" * 50, 20, ".txt") is None
@@ -0,0 +1,109 @@
+"""
+Tests for token counting backends and chunking
+"""
+
+import pytest
+
+from super_prompt.context import tokenizer
+from super_prompt.context.tokenizer import CharEstimateBackend, HeuristicBackend, TiktokenBackend, Tokenizer
+
+
+@pytest.fixture(autouse=True)
+def reset_backend():
+    tokenizer.set_backend(None)
+    yield
+    tokenizer.set_backend(None)
+
+
+def test_defaults_to_packaged_vocab(monkeypatch):
+    monkeypatch.delenv("SUPER_PROMPT_TOKENIZER", raising=False)
+    monkeypatch.delenv("SUPER_PROMPT_TOKENIZER_VOCAB", raising=False)
+    assert Tokenizer.backend_name() == "tiktoken"
+    backend = tokenizer.get_backend()
+    assert backend.encoding.encode_ordinary("hello world") == [15339, 1917]
+    assert Tokenizer.estimate_tokens("def rebalance_shards(self):\n    return 42\n") == 12
+    assert Tokenizer.truncate_to_tokens("hello world again", 2) == "hello world"
+
+
+def test_falls_back_to_char_estimate_without_tiktoken(monkeypatch):
+    monkeypatch.delenv("SUPER_PROMPT_TOKENIZER", raising=False)
+    monkeypatch.setattr(tokenizer, "tiktoken", None)
+    assert Tokenizer.backend_name() == "estimate"
+    assert Tokenizer.estimate_tokens("x" * 40) == 10
+
+
+def test_heuristic_is_opt_in(monkeypatch):
+    monkeypatch.setenv("SUPER_PROMPT_TOKENIZER", "heuristic")
+    assert Tokenizer.backend_name() == "heuristic"
+
+
+@pytest.mark.parametrize(
+    "backend",
+    [CharEstimateBackend(), HeuristicBackend(), TiktokenBackend.from_vocab(tokenizer.PACKAGED_VOCAB)],
+)
+def test_chunks_fit_budget_and_preserve_text(backend):
+    tokenizer.set_backend(backend)
+    text = "\n".join(f"def function_{i}(value):\n    return value * {i}" for i in range(500))
+    chunks = Tokenizer.split_into_chunks(text, 100)
+    assert "\n".join(chunks) == text
+    assert all(Tokenizer.estimate_tokens(chunk) <= 100 for chunk in chunks)
+
+
+def test_heuristic_line_costs_add_up_to_count():
+    backend = HeuristicBackend()
+    text = "import os\n\n    value = compute_something_long(1234567)  # héllo — wörld\n\tend\n"
+    assert sum(backend.line_costs(text)) == backend.count(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "컨텍스트 수집기는 토큰 예산 안에서 관련 파일을 고릅니다.",
+        "上下文收集器在令牌预算内选择相关文件。",
+        "コンテキストをトークン予算内で収集します。",
+    ],
+)
+def test_char_estimate_does_not_undercount_cjk(text):
+    backend = CharEstimateBackend()
+    # BPE vocabularies spend at least about one token per CJK character
+    cjk_chars = sum(1 for char in text if ord(char) > 0x2E80)
+    assert backend.count(text) >= cjk_chars
+    assert -(-sum(backend.line_costs(text + "\n" + text)) // backend.line_cost_scale) == backend.count(text + "\n" + text)
+    assert backend.count(backend.truncate(text, 5)) <= 5
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "\n".join("x" for _ in range(100)),
+        "\n".join(f"def f_{i}(): {{ return {i}; }}" for i in range(50)),
+        "a\n\n수집기\nb\n",
+    ],
+)
+def test_char_estimate_line_costs_add_up_to_count(text):
+    backend = CharEstimateBackend()
+    units = sum(backend.line_costs(text))
+    assert -(-units // backend.line_cost_scale) == backend.count(text)
+
+    tokenizer.set_backend(backend)
+    # Text that fits by estimate_tokens stays in one chunk
+    assert Tokenizer.split_into_chunks(text, Tokenizer.estimate_tokens(text)) == [text]
+
+
+def test_char_estimate_charges_more_for_code():
+    backend = CharEstimateBackend()
+    prose = "a" * 100
+    code = "def f() { return value; }".ljust(100)
+    assert backend.count(prose) == 25
+    assert backend.count(code) == 30
+    assert -(-sum(backend.line_costs(code + "\n" + code)) // backend.line_cost_scale) == backend.count(code + "\n" + code)
+
+
+def test_file_chunks_drop_crlf_line_endings(tmp_path):
+    tokenizer.set_backend(CharEstimateBackend())
+    path = tmp_path / "crlf.txt"
+    path.write_bytes(b"".join(b"line number %d of the file\r\n" % i for i in range(200)))
+    chunks = list(Tokenizer.iter_chunks(path, 50))
+    assert len(chunks) > 1
+    assert not any(chunk.endswith("\r") for chunk in chunks[:-1])
+    assert "\r\n".join(chunks) == path.read_bytes().decode()
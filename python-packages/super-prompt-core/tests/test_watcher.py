@@ -0,0 +1,101 @@
+"""
+Tests for applying file watcher events to the FileIndex
+"""
+
+import os
+
+import pytest
+
+from super_prompt.context import watcher
+from super_prompt.context.cache import ContextCache
+from super_prompt.context.file_index import FileIndex
+from super_prompt.context.watcher import FileWatcher
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "keep.py").write_text("keep = 1\n")
+    (root / "edit.py").write_text("edit = 1\n")
+    (root / "gone.py").write_text("gone = 1\n")
+    return root
+
+
+@pytest.fixture
+def file_index(project, tmp_path):
+    index = FileIndex(project, index_dir=tmp_path / "index", min_refresh_interval=0)
+    index.refresh(force=True)
+    return index
+
+
+def _edit(path, content):
+    mtime = path.stat().st_mtime + 10
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+
+
+def test_apply_events_updates_only_reported_paths(project, file_index):
+    heard = []
+    file_index.subscribe(heard.append)
+    generation = file_index.generation
+
+    _edit(project / "edit.py", "edit = 22\n")
+    (project / "gone.py").unlink()
+    (project / "new.py").write_text("new = 1\n")
+
+    assert file_index.apply_events(["edit.py", "gone.py", "new.py"]) == 3
+    assert file_index.generation == generation + 1
+    assert sorted(entry.path for entry in file_index.iter_files()) == ["edit.py", "keep.py", "new.py"]
+    assert file_index.get("edit.py").size == len("edit = 22\n")
+
+    assert len(heard) == 1
+    assert (heard[0].added, heard[0].modified, heard[0].removed) == (["new.py"], ["edit.py"], ["gone.py"])
+
+
+def test_apply_events_walks_new_directories(project, file_index):
+    (project / "pkg" / "sub").mkdir(parents=True)
+    (project / "pkg" / "sub" / "module.py").write_text("x = 1\n")
+
+    assert file_index.apply_events(["pkg"]) == 1
+    assert "pkg/sub/module.py" in file_index
+
+
+def test_apply_events_rechecks_ignore_rules(project, file_index):
+    (project / ".gitignore").write_text("keep.py\n")
+    file_index.apply_events([".gitignore"])
+
+    assert file_index.get("keep.py").ignored
+    assert "keep.py" not in [entry.path for entry in file_index.iter_files()]
+
+
+def test_events_are_batched_into_the_index(project, file_index):
+    file_watcher = FileWatcher(file_index, use_inotify=False)
+    file_watcher._watches = {1: ""}
+    _edit(project / "edit.py", "edit = 333\n")
+
+    file_watcher._handle_events([
+        (1, watcher._IN_CLOSE_WRITE, "edit.py"),
+        (1, watcher._IN_MODIFY, "edit.py"),
+        (1, watcher._IN_CREATE, ".git"),  # Excluded
+        (2, watcher._IN_CREATE, "unknown.py"),  # Watch already removed
+    ])
+    assert file_index.get("edit.py").size == len("edit = 333\n")
+
+    # A queue overflow loses events; the watcher falls back to a full refresh
+    (project / "late.py").write_text("late = 1\n")
+    file_watcher._handle_events([(-1, watcher._IN_Q_OVERFLOW, "")])
+    assert "late.py" in file_index
+
+
+def test_changes_invalidate_cached_file_contents(project, file_index, tmp_path):
+    cache = ContextCache(tmp_path / "cache")
+    edited = str(project / "edit.py")
+    cache.set(f"file:{edited}:1.0:9", "digest")
+    cache.set(f"file:{project / 'keep.py'}:1.0:9", "digest")
+    file_index.subscribe(watcher._cache_invalidator(project, cache))
+
+    _edit(project / "edit.py", "edit = 4444\n")
+    file_index.apply_events(["edit.py"])
+
+    assert [key.split(":")[1] for key in cache.memory_cache] == [str(project / "keep.py")]